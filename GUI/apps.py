@@ -2,20 +2,30 @@ import logging
 import os
 import sys
 import traceback
+from module.config import load_config
 from module.send_message import send_slack_message
 from PySide6.QtWidgets import QApplication
 from GUI.windows.mainWindow import MainWindow
 from GUI.windows.HomeWindow import HomeWindow
+from GUI.utils.pipeline_service import start_pipeline_service
 
 def main():
-    """ GUI アプリケーションを起動するメイン関数 """
+    """
+    GUI アプリケーションを起動するメイン関数。
+    ホーム画面を先に描画し、データ処理のライブラリ（pandas・openpyxl など）はその後に
+    バックグラウンドで読み込む（起動時に読み込むモジュールは python -m scripts.startup_budget で確認する）。
+    """
     try:
+        load_config()
         app = QApplication(sys.argv)
         main_window = MainWindow()
         home_page = HomeWindow()
         main_window.setup_pages(home_page)
         home_page.switch_to_drag_drop.connect(main_window.switch_to_drag_drop)
         main_window.show()
+        # ホーム画面を描画してから、処理に必要なモジュールの読み込みとテンプレートの解析を始める
+        app.processEvents()
+        start_pipeline_service()
         sys.exit(app.exec())
     except Exception as e:
         logging.error(f"GUIアプリケーション起動時にエラー: {e}", exc_info=True)
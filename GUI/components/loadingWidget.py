@@ -1,8 +1,13 @@
-from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import QWidget, QVBoxLayout, QLabel, QProgressBar, QPushButton
+from PySide6.QtCore import Qt, QTimer, Signal, Slot
+
+# プログレスバーの目盛り数（全体の進捗 0.0～1.0 をこの段階に分けて表示する）
+PROGRESS_STEPS = 1000
 
 class LoadingWidget(QWidget):
-    """処理中のローディング表示を行うコンポーネント"""
+    """処理中のローディング表示を行うコンポーネント（工程・件数・残り時間を表示する）"""
+    
+    cancel_requested = Signal()  # キャンセルボタンが押された時に発火するシグナル
     
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -22,7 +27,7 @@ class LoadingWidget(QWidget):
         
         # プログレスバー
         self.progress_bar = QProgressBar(self)
-        self.progress_bar.setRange(0, 0)  # 不定のプログレス表示
+        self.progress_bar.setRange(0, 0)  # 最初の進捗通知までは不定のプログレス表示
         self.progress_bar.setFixedSize(300, 20)
         self.progress_bar.setStyleSheet("""
             QProgressBar {
@@ -36,9 +41,75 @@ class LoadingWidget(QWidget):
             }
         """)
         
+        # 工程・件数・残り時間
+        self.detail_label = QLabel("", self)
+        self.detail_label.setAlignment(Qt.AlignCenter)
+        self.detail_label.setStyleSheet("""
+            font-size: 12px;
+            color: #7f8c8d;
+            margin-top: 10px;
+        """)
+        
+        # キャンセルボタン
+        self.cancel_button = QPushButton("キャンセル", self)
+        self.cancel_button.setFixedSize(120, 32)
+        self.cancel_button.setCursor(Qt.PointingHandCursor)
+        self.cancel_button.setStyleSheet("""
+            QPushButton {
+                background-color: #e74c3c;
+                border: none;
+                border-radius: 5px;
+                color: white;
+                font-size: 13px;
+            }
+            QPushButton:hover {
+                background-color: #c0392b;
+            }
+            QPushButton:disabled {
+                background-color: #bdc3c7;
+            }
+        """)
+        self.cancel_button.clicked.connect(self.on_cancel_clicked)
+        
         # レイアウトに追加
         layout.addWidget(self.message_label)
         layout.addWidget(self.progress_bar)
+        layout.addWidget(self.detail_label)
+        layout.addWidget(self.cancel_button, alignment=Qt.AlignCenter)
         
         self.setLayout(layout)
-        self.setFixedSize(400, 200)
\ No newline at end of file
+        self.setFixedSize(400, 240)
+
+    def reset(self):
+        """ 処理開始時の表示（不定のプログレス表示）に戻す """
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setValue(0)
+        self.detail_label.setText("準備中...")
+        self.cancel_button.setEnabled(True)
+        self.cancel_button.setText("キャンセル")
+
+    def on_cancel_clicked(self):
+        """ キャンセルボタン: 実行中の種目の書き込みが終わった所で処理を打ち切る """
+        self.cancel_button.setEnabled(False)
+        self.cancel_button.setText("キャンセル中...")
+        self.cancel_requested.emit()
+
+    @Slot(object)
+    def update_progress(self, event):
+        """
+        進捗通知（module.progress.ProgressEvent）を表示に反映する（UIスレッドで呼ばれる）。
+        """
+        if self.progress_bar.maximum() != PROGRESS_STEPS:
+            self.progress_bar.setRange(0, PROGRESS_STEPS)
+        self.progress_bar.setValue(int(event.fraction * PROGRESS_STEPS))
+        count = f" {event.done}/{event.total}" if event.total else ""
+        item = f"（{event.item}）" if event.item else ""
+        eta = f"  残り約{format_seconds(event.eta)}" if event.eta is not None and event.fraction < 1.0 else ""
+        self.detail_label.setText(f"{event.label}{count}{item}{eta}")
+
+def format_seconds(seconds):
+    """ 残り時間を "1分05秒" / "12秒" の形式にする """
+    seconds = int(round(seconds))
+    if seconds >= 60:
+        return f"{seconds // 60}分{seconds % 60:02d}秒"
+    return f"{seconds}秒"
\ No newline at end of file
@@ -1,5 +1,6 @@
 import os
 import shutil
+from module.progress import PipelineCancelled
 
 class FileManager:
     """ ファイル管理クラス: データフォルダのリセット、コピー処理を担当 """
@@ -20,10 +21,12 @@ class FileManager:
                 elif os.path.isdir(file_path):
                     shutil.rmtree(file_path)
 
-    def copy_files(self, files):
-        """ ファイルをフォルダにコピー """
+    def copy_files(self, files, cancel_event=None):
+        """ ファイルをフォルダにコピー（cancel_event がセットされたらファイルの区切りで打ち切る） """
         copied_files = []
         for file_path in files:
+            if cancel_event is not None and cancel_event.is_set():
+                raise PipelineCancelled()
             file_name = os.path.basename(file_path)
             dest_path = os.path.join(self.target_folder, file_name)
             shutil.copy2(file_path, dest_path)
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import time
+import traceback
+from module.send_message import send_slack_message
+
+class PipelineService:
+    """
+    GUIの起動中ずっと常駐する処理サービス。
+    起動直後にバックグラウンドのスレッドで重いモジュール（pandas・openpyxl・各処理スクリプト）の読み込みと
+    テンプレート（template.xlsx）の解析、前回の結合CSVの名簿の読み込みを済ませておき、
+    「OK（コピー実行）」を押したらすぐに書き出しを始められるようにする。
+    テンプレートの解析結果と名簿は同じプロセス内のキャッシュに残るため、2回目以降の実行でも読み直さない。
+    Qt には依存しない（スレッドの起動と実行の受付だけを行う）。
+    """
+
+    def __init__(self, template_file=None, input_data_file=None, merged_csv_data_file=None):
+        self.template_file = template_file or os.getenv("TEMPLATE_FILE", "template.xlsx")
+        self.input_data_file = input_data_file or os.getenv("INPUT_DATA_FILE", "input_data_folder")
+        # main.main と同じく、MERGED_CSV_DATA_FILE はそのままのパスとして扱う
+        self.merged_csv_data_file = merged_csv_data_file or os.getenv("MERGED_CSV_DATA_FILE") or os.path.join(self.input_data_file, "merged_output.csv")
+        self.timings = {}  # 事前準備の項目 -> 秒数
+        self._ready = threading.Event()
+        self._run_lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self._ready.is_set()
+
+    def start(self):
+        """ 事前準備をバックグラウンドのスレッドで開始する（2回目以降の呼び出しは何もしない） """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self.warm_up, name="PipelineServiceWarmUp", daemon=True)
+            self._thread.start()
+        return self
+
+    def wait_until_ready(self, timeout=None):
+        """ 事前準備が終わるまで待つ（start していない場合はその場で準備する） """
+        if self._thread is None:
+            self.warm_up()
+        return self._ready.wait(timeout)
+
+    def _step(self, name, func):
+        started = time.perf_counter()
+        try:
+            func()
+        except Exception as e:
+            # 事前準備は高速化のためのものなので、失敗しても実行時に改めて読み込む
+            logging.warning(f"PipelineService の事前準備（{name}）に失敗しました: {e}")
+        self.timings[name] = time.perf_counter() - started
+
+    def warm_up(self):
+        """
+        重いモジュールの読み込み、テンプレートの解析、前回の結合CSVの名簿の読み込みを行う。
+        いずれかに失敗しても例外は送出しない（実行時に通常どおり読み込む）。
+        """
+        try:
+            self._step("モジュール", self._import_modules)
+            self._step("テンプレート", self._load_template)
+            self._step("名簿", self._load_roster)
+            logging.info("PipelineService の準備が完了しました: " + ", ".join(f"{name} {seconds:.2f}秒" for name, seconds in self.timings.items()))
+        finally:
+            self._ready.set()
+
+    def _import_modules(self):
+        import jaconv  # noqa: F401  正規化（DataConvert）で初めて使われる
+        import main  # noqa: F401
+        import scripts.ExcelToMergedCSV  # noqa: F401  pandas
+        import scripts.write_ID  # noqa: F401  openpyxl・numpy
+        import scripts.fill_name  # noqa: F401
+
+    def _load_template(self):
+        from module.template_cache import get_template_cache
+        from module.xlsx_writer import WRITER_FAST, get_skeleton, resolve_writer
+
+        if not os.path.exists(self.template_file):
+            return
+        template = get_template_cache(self.template_file)
+        for sheet_name in template.sheetnames:
+            try:
+                template.layout(sheet_name)
+            except ValueError:
+                continue  # 組ブロックのないシートは書き込みの対象外
+            if resolve_writer() == WRITER_FAST:
+                # 1ページの種目がほとんどのため、1シート分の雛形を作っておく
+                get_skeleton(template, sheet_name, 1)
+
+    def _load_roster(self):
+        from module.entry_index import load_entry_index
+
+        if os.path.exists(self.merged_csv_data_file):
+            load_entry_index(self.merged_csv_data_file, category="mixed")
+
+    def run(self, result_data_file, progress=None, cancel_event=None, **kwargs):
+        """
+        Excel→CSV変換から競技プログラムの書き出しまでを実行する（事前準備が終わっていなければ待つ）。
+        同時に実行できるのは1件だけで、実行中に呼ばれた場合は前の実行が終わるまで待つ。
+
+        引数:
+            - result_data_file: 競技プログラムの出力先フォルダ
+            - progress: 進捗を受け取るコールバック
+            - cancel_event: 中止の要求（threading.Event）
+            - kwargs: main.main へそのまま渡す引数
+
+        例外:
+            - PipelineCancelled: cancel_event により処理を打ち切った場合
+            - Exception: main.main で発生した例外
+        """
+        self.wait_until_ready()
+        with self._run_lock:
+            import main
+            return main.main(result_data_file=result_data_file, template_file=kwargs.pop("template_file", self.template_file),
+                             progress=progress, cancel_event=cancel_event, **kwargs)
+
+
+_SERVICE = None
+_SERVICE_LOCK = threading.Lock()
+
+def get_pipeline_service():
+    """ プロセスで1つだけの PipelineService を返す（初回の呼び出しで作成する） """
+    global _SERVICE
+    with _SERVICE_LOCK:
+        if _SERVICE is None:
+            _SERVICE = PipelineService()
+        return _SERVICE
+
+def start_pipeline_service():
+    """ GUIの起動時に呼び、PipelineService の事前準備をバックグラウンドで開始する """
+    try:
+        return get_pipeline_service().start()
+    except Exception as e:
+        logging.error(f"PipelineService の起動でエラー: {e}", exc_info=True)
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"PipelineService の起動でエラー: {e}\n{traceback.format_exc()}")
+        return None
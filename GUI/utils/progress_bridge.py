@@ -0,0 +1,13 @@
+from PySide6.QtCore import QObject, Signal
+
+class ProgressBridge(QObject):
+    """
+    処理スレッドからの進捗通知（module.progress.ProgressEvent）をUIスレッドへ渡す橋渡し。
+    report は処理スレッドから呼んでよく、progressed シグナルはキュー接続でUIスレッドのスロットに届く。
+    """
+
+    progressed = Signal(object)  # ProgressEvent
+
+    def report(self, event):
+        """ 進捗通知のコールバック（main.main の progress 引数に渡す） """
+        self.progressed.emit(event)
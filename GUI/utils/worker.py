@@ -0,0 +1,61 @@
+import logging
+import os
+import threading
+import traceback
+from PySide6.QtCore import QRunnable, Signal
+from module.progress import PipelineCancelled
+from module.send_message import send_slack_message
+from GUI.utils.progress_bridge import ProgressBridge
+
+class WorkerSignals(ProgressBridge):
+    """
+    Worker からUIスレッドへ結果を渡すシグナル（UIスレッドで作成し、スロットにはキュー接続で届く）。
+    progressed は ProgressBridge から引き継ぐ。
+    """
+
+    succeeded = Signal(object)  # 処理の戻り値
+    failed = Signal(str)        # エラーメッセージ
+    cancelled = Signal()        # 中止の要求で打ち切った
+    finished = Signal()         # 成功・失敗・中止のいずれでも最後に発火する
+
+class Worker(QRunnable):
+    """
+    QThreadPool で実行する処理。task(worker, *args, **kwargs) をUIスレッドの外で呼び出す。
+    task は worker.report を進捗のコールバックに、worker.cancel_event を中止の要求に使う。
+    UIの更新はすべて signals 経由で行い、処理スレッドからウィジェットを直接操作しない。
+    """
+
+    def __init__(self, task, *args, **kwargs):
+        super().__init__()
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancel_event = threading.Event()
+
+    def report(self, event):
+        """ 進捗通知のコールバック（処理スレッドから呼ばれる） """
+        self.signals.report(event)
+
+    def cancel(self):
+        """ 中止を要求する（処理はファイル・種目の区切りで打ち切られる） """
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            result = self.task(self, *self.args, **self.kwargs)
+        except PipelineCancelled:
+            logging.info("処理が中止されました")
+            self.signals.cancelled.emit()
+        except Exception as e:
+            logging.error(f"Worker runでエラー: {e}", exc_info=True)
+            send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Worker runでエラー: {e}\n{traceback.format_exc()}")
+            self.signals.failed.emit(str(e))
+        else:
+            # 中止の要求が最後の区切りより後に届いた場合は、処理は完了しているため成功として扱う
+            self.signals.succeeded.emit(result)
+        finally:
+            self.signals.finished.emit()
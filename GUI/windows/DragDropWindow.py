@@ -1,20 +1,41 @@
 import logging
 import os
 import traceback
-import threading
 from module.send_message import send_slack_message
 from PySide6.QtWidgets import QWidget, QVBoxLayout, QMessageBox, QPushButton, QHBoxLayout, QStackedWidget
-from PySide6.QtCore import Signal, Qt, Slot
+from PySide6.QtCore import Signal, Qt, Slot, QThreadPool
 from GUI.utils.file_manager import FileManager
+from GUI.utils.worker import Worker
+from GUI.utils.pipeline_service import get_pipeline_service
 from GUI.components.dropArea import DropArea
 from GUI.components.fileListWidget import FileListWidget
 from GUI.components.loadingWidget import LoadingWidget
 from GUI.components.completionWidget import CompletionWidget
 from GUI.styles.stylesheet import MAIN_WINDOW
-from dotenv import load_dotenv
-load_dotenv()
+from module.config import load_config
+load_config()
 INPUT_DATA_FOLDER = os.getenv("INPUT_DATA_FILE", "input_data_folder")
 
+def run_pipeline_task(worker, file_manager, files, result_folder_path):
+    """
+    ファイルのコピーから競技プログラムの作成までを行う（Worker からUIスレッドの外で呼ばれる）。
+
+    引数:
+        - worker: 実行中の Worker（進捗の通知と中止の要求に使う）
+        - file_manager: コピー先を管理する FileManager
+        - files: ドロップされたファイルのパスのリスト
+        - result_folder_path: 競技プログラムの出力先フォルダ
+
+    例外:
+        - ValueError: ファイルを1件もコピーできなかった場合
+        - PipelineCancelled: 中止が要求された場合
+    """
+    copied_files = file_manager.copy_files(files, cancel_event=worker.cancel_event)
+    if not copied_files:
+        raise ValueError("ファイルのコピーに失敗しました")
+    # 起動時に準備済みの常駐サービスで実行する（テンプレートと名簿は前回の実行から引き継ぐ）
+    get_pipeline_service().run(result_folder_path, progress=worker.report, cancel_event=worker.cancel_event)
+
 class DragDropWindow(QWidget):
     # 画面遷移用のシグナル
     switch_to_home = Signal()
@@ -66,8 +87,10 @@ class DragDropWindow(QWidget):
         main_layout.setContentsMargins(15, 15, 15, 15)
         main_layout.setSpacing(10)
         
-        # ローディングウィジェット
+        # ローディングウィジェット（処理スレッドからの進捗はシグナル経由でUIスレッドに届く）
         self.loading_widget = LoadingWidget()
+        self.loading_widget.cancel_requested.connect(self.on_cancel_requested)
+        self.worker = None  # 実行中の Worker（UIスレッドの外でコピーと処理を行う）
         
         # 完了通知ウィジェット
         self.completion_widget = CompletionWidget()
@@ -93,33 +116,37 @@ class DragDropWindow(QWidget):
             if not files:
                 QMessageBox.warning(self, "警告", "コピーするファイルがありません")
                 return
-            copied_files = self.file_manager.copy_files(files)
-            if not copied_files:
-                QMessageBox.warning(self, "エラー", "ファイルのコピーに失敗しました")
+            if self.worker is not None:
+                # 前回の処理が終わるまでは新しい処理を始めない
                 return
             self.file_list_widget.clear_files()
+            self.loading_widget.reset()
             self.stacked_widget.setCurrentIndex(1)
-            self.process_thread = threading.Thread(target=self.run_processing)
-            self.process_thread.daemon = True
-            self.process_thread.start()
+            worker = Worker(run_pipeline_task, self.file_manager, list(files), self.result_folder_path)
+            worker.signals.progressed.connect(self.loading_widget.update_progress)
+            worker.signals.succeeded.connect(self.show_completion)
+            worker.signals.failed.connect(self.show_error)
+            worker.signals.cancelled.connect(self.show_cancelled)
+            worker.signals.finished.connect(self.on_worker_finished)
+            self.worker = worker
+            QThreadPool.globalInstance().start(worker)
         except Exception as e:
             logging.error(f"on_copy_requestedでエラー: {e}", exc_info=True)
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"DragDropWindow on_copy_requestedでエラー: {e}\n{traceback.format_exc()}")
             QMessageBox.critical(self, "エラー", f"ファイルコピー処理中にエラーが発生しました: {e}")
 
-    def run_processing(self):
-        try:
-            import main
-            main.main(result_data_file=self.result_folder_path)
-            from PySide6.QtCore import QMetaObject, Qt, Q_ARG
-            QMetaObject.invokeMethod(self, "show_completion", Qt.QueuedConnection)
-        except Exception as e:
-            logging.error(f"run_processingでエラー: {e}", exc_info=True)
-            send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"DragDropWindow run_processingでエラー: {e}\n{traceback.format_exc()}")
-            self.show_error(str(e))
+    @Slot()
+    def on_cancel_requested(self):
+        """ 実行中の処理に中止を要求する（実行中の種目の書き込みが終わった所で止まる） """
+        if self.worker is not None:
+            self.worker.cancel()
 
     @Slot()
-    def show_completion(self):
+    def on_worker_finished(self):
+        self.worker = None
+
+    @Slot(object)
+    def show_completion(self, result=None):
         """ 処理完了画面を表示する """
         self.stacked_widget.setCurrentIndex(2)
     
@@ -132,6 +159,12 @@ class DragDropWindow(QWidget):
             logging.error(f"show_errorでエラー: {e}", exc_info=True)
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"DragDropWindow show_errorでエラー: {e}\n{traceback.format_exc()}")
     
+    @Slot()
+    def show_cancelled(self):
+        """ 中止した場合はファイル選択画面に戻る """
+        self.stacked_widget.setCurrentIndex(0)
+        QMessageBox.information(self, "中止", "処理を中止しました")
+
     def on_completion_close(self):
         """ 完了画面の閉じるボタンがクリックされた時の処理 """
         self.stacked_widget.setCurrentIndex(0)  # メイン画面に戻る
@@ -6,10 +6,10 @@ from PySide6.QtWidgets import QWidget, QVBoxLayout, QPushButton, QLabel
 from PySide6.QtCore import Qt, Signal
 from GUI.styles.stylesheet import MAIN_WINDOW
 from GUI.components.select_folder_dialog import SelectFolderDialogWidget
-from dotenv import load_dotenv
+from module.config import load_config
 
 # 環境変数から設定を読み込む
-load_dotenv()
+load_config()
 APP_NAME = os.getenv("APP_NAME", "AquaProgrammer")  # デフォルト値として"AquaProgrammer"を設定
 
 class HomeWindow(QWidget):
@@ -5,11 +5,10 @@ from module.send_message import send_slack_message
 from PySide6.QtWidgets import QMainWindow, QStackedWidget
 from PySide6.QtCore import Qt
 from GUI.styles.stylesheet import MAIN_WINDOW
-from GUI.windows.DragDropWindow import DragDropWindow
-from dotenv import load_dotenv
+from module.config import load_config
 
 # 環境変数から設定を読み込む
-load_dotenv()
+load_config()
 APP_NAME = os.getenv("APP_NAME", "AquaProgrammer")  # デフォルト値として"AquaProgrammer"を設定
 
 class MainWindow(QMainWindow):
@@ -52,7 +51,8 @@ class MainWindow(QMainWindow):
             if self.drag_drop_page:
                 self.stacked_widget.removeWidget(self.drag_drop_page)
                 self.drag_drop_page.deleteLater()
-            # 新しいDragDropWindowを生成し、保存先パスを渡す
+            # 新しいDragDropWindowを生成し、保存先パスを渡す（ホーム画面の表示を先にするため、初めて開くときに読み込む）
+            from GUI.windows.DragDropWindow import DragDropWindow
             self.drag_drop_page = DragDropWindow(result_folder_path)
             self.drag_drop_page.switch_to_home.connect(self.switch_to_home)
             self.stacked_widget.addWidget(self.drag_drop_page)
@@ -1,7 +1,13 @@
 import pandas as pd
+import numpy as np
 import glob
 import os
-from openpyxl import load_workbook, Workbook
+import argparse
+from module.template_cache import get_template_cache
+from module.calc_time import parse_times_centis
+from module.normalize import cache_stats, intern_text
+from module.parallel import resolve_worker_count, run_jobs
+from module.seeding import resolve_circle_heats, seed_heats
 
 # ===== 設定 =====
 input_xlsx_folder = "input_data_folder/"
@@ -9,130 +15,134 @@ template_path = "template.xlsx"
 output_csv_path = "output_data/entries.csv"
 output_templates = "output_data/output_templates/"
 
-os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
-os.makedirs(output_templates, exist_ok=True)
 
 # ===== STEP1: Excelファイルを読み込み、統合DataFrameを作成 =====
-xlsx_paths = glob.glob(os.path.join(input_xlsx_folder, "*.xlsx"))
-column_sets = []
-for path in xlsx_paths:
-    df_raw = pd.ExcelFile(path).parse("個人エントリー", header=None)
-    header_row = df_raw.iloc[7]
-    column_sets.append(set(header_row.dropna()))
-
-base_cols = ['氏名', 'ﾌﾘｶﾞﾅ', '学校名', '学年', '性別']
-all_columns = set.union(*column_sets)
-event_cols = sorted(str(c) for c in (all_columns - set(base_cols) - {'種目数'}) if isinstance(c, str))
-final_columns = ['id', 'member_num'] + base_cols + event_cols + ['種目数']
-all_df = pd.DataFrame(columns=final_columns)
-
-for path in xlsx_paths:
-    try:
-        raw = pd.ExcelFile(path).parse("個人エントリー", header=None)
-        hdr = raw.iloc[7]
-        df = pd.DataFrame(raw.iloc[10:].values, columns=hdr)
-
-        df = df[df['氏名'] != '駒場　太郎']
-        df = df[df['氏名'].notna()]
-        if df['ﾌﾘｶﾞﾅ'].isna().any():
-            raise ValueError("フリガナ欠損があります")
-
-        shomoku = df.pop('種目数') if '種目数' in df.columns else None
-        df.insert(0, 'member_num', range(1, len(df)+1))
-        df.insert(0, 'id', range(len(all_df)+1, len(all_df)+1+len(df)))
-        for col in final_columns:
-            if col not in df.columns:
-                df[col] = pd.NA
-        df = df[final_columns]
-        if shomoku is not None:
-            df['種目数'] = shomoku.values
-
-        all_df = pd.concat([all_df, df], ignore_index=True)
-
-    except Exception as e:
-        print(f"⚠ {os.path.basename(path)} をスキップ: {e}")
-
-all_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
-print(f"✔ 統合CSVを保存: {output_csv_path}")
-
-# ===== STEP2: 種目別テンプレート書き出し（6コース、センターアウト） =====
-for ev in event_cols:
-    try:
-        part = all_df[all_df[ev].notna()].copy()
-        if len(part) > 175:
-            raise ValueError(f"{ev} の出場者が175人超過")
-
-        distance = ''.join(filter(str.isdigit, ev))
-        stroke = ''.join(filter(str.isalpha, ev))
-
-        def convert_to_seconds(time_val):
-            try:
-                time_val = float(time_val)
-                minutes = int(time_val // 100)
-                seconds = time_val - (minutes * 100)
-                return minutes * 60 + seconds
-            except:
-                return float('inf')
-
-        part['タイム秒'] = part[ev].apply(convert_to_seconds)
-        part = part.sort_values(by='タイム秒', ascending=False).reset_index(drop=True)
-
-        wb_template = load_workbook(template_path)
-        sheet = f"{distance}m"
-        if sheet not in wb_template.sheetnames:
-            raise ValueError(f"{sheet} シートが存在しません")
-
-        new_wb = Workbook()
-        new_ws = wb_template[sheet]
-        new_sheet = new_wb.active
-        new_sheet.title = sheet
-
-        for row in new_ws.iter_rows():
-            for cell in row:
-                new_sheet[cell.coordinate].value = cell.value
-
-        spacing_adjust = {
-            "50": 0,
-            "100": 1,
-            "200": 3,
-            "400": 7
-        }
-        col_spacing = spacing_adjust.get(distance, 0)
-
-        total_participants = len(part)
-        lanes_per_heat = 6
-        full_groups = total_participants // lanes_per_heat
-        remainder = total_participants % lanes_per_heat
-        total_groups = full_groups + (1 if remainder > 0 else 0)
-
-        group_assignments = []
-        idx = 0
-        if remainder > 0:
-            group_assignments.append(part.iloc[idx:idx+remainder])
-            idx += remainder
-        for _ in range(full_groups):
-            group_assignments.append(part.iloc[idx:idx+lanes_per_heat])
-            idx += lanes_per_heat
-
-        center_out_order = [3, 2, 4, 1, 5, 0]
-
-        for group_index, group_df in enumerate(reversed(group_assignments)):
-            actual_group = total_groups - 1 - group_index
-            group_df = group_df.reset_index(drop=True)
-            for logical_lane_index, true_lane_index in enumerate(center_out_order[:len(group_df)]):
-                row = group_df.iloc[logical_lane_index]
-                row_blk = (actual_group % 6) * 10
-                col_blk = (actual_group // 6) * (7 + col_spacing)
-                r = row_blk + true_lane_index + 4
-                c = col_blk + 2
-                new_sheet.cell(row=r, column=c, value=row['氏名'])
-                new_sheet.cell(row=r, column=c+1, value=row['ﾌﾘｶﾞﾅ'])
-                new_sheet.cell(row=r, column=c+2, value=row['学校名'])
-                new_sheet.cell(row=r, column=c+3, value=row['学年'])
-
-        out_xlsx = os.path.join(output_templates, f"{stroke}_{distance}.xlsx")
-        new_wb.save(out_xlsx)
-        print(f"✔ 出力完了: {out_xlsx}")
-
-    except Exception as e:
-        print(f"⚠ {ev} 処理エラー: {e}")
+def build_entries():
+    """
+    入力フォルダのエントリーシートを統合し、(統合DataFrame, 種目列のリスト) を返す。
+    """
+    xlsx_paths = glob.glob(os.path.join(input_xlsx_folder, "*.xlsx"))
+    column_sets = []
+    for path in xlsx_paths:
+        df_raw = pd.ExcelFile(path).parse("個人エントリー", header=None)
+        header_row = df_raw.iloc[7]
+        column_sets.append(set(header_row.dropna()))
+
+    base_cols = ['氏名', 'ﾌﾘｶﾞﾅ', '学校名', '学年', '性別']
+    all_columns = set.union(*column_sets)
+    event_cols = sorted(str(c) for c in (all_columns - set(base_cols) - {'種目数'}) if isinstance(c, str))
+    final_columns = ['id', 'member_num'] + base_cols + event_cols + ['種目数']
+
+    # 学校ごとのDataFrameを集め、最後に1回だけ結合して列を揃える
+    frames = []
+    for path in xlsx_paths:
+        try:
+            raw = pd.ExcelFile(path).parse("個人エントリー", header=None)
+            hdr = raw.iloc[7]
+            df = pd.DataFrame(raw.iloc[10:].values, columns=hdr)
+
+            df = df[df['氏名'] != '駒場　太郎']
+            df = df[df['氏名'].notna()]
+            if df['ﾌﾘｶﾞﾅ'].isna().any():
+                raise ValueError("フリガナ欠損があります")
+
+            df = df.loc[:, df.columns.isin(final_columns)]
+            if df.columns.duplicated().any():
+                raise ValueError("見出しが重複しています")
+            df.insert(0, 'member_num', range(1, len(df)+1))
+            frames.append(df)
+
+        except Exception as e:
+            print(f"⚠ {os.path.basename(path)} をスキップ: {e}")
+
+    # 列の整列とIDの採番は結合後にまとめて行う
+    all_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+    all_df = all_df.reindex(columns=final_columns)
+    all_df['id'] = range(1, len(all_df)+1)
+
+    # 繰り返し現れる値は1つの文字列を共有する（値は変えない）
+    if not all_df.empty:
+        for col in ['ﾌﾘｶﾞﾅ', '学校名', '学年', '性別']:
+            all_df[col] = all_df[col].map(intern_text)
+
+    return all_df, event_cols
+
+
+def convert_to_seconds(values):
+    """
+    エントリーシートの数値タイム（220.0 → 2分20秒）をまとめて秒に変換する。
+    解釈できない値は inf（最も遅い扱い）にする。
+    """
+    centis = parse_times_centis(values, packed_numeric=True, errors="coerce")
+    return np.where(np.isnan(centis), np.inf, centis / 100)
+
+
+# ===== STEP2: 種目別テンプレート書き出し（6コース、センターアウト：module.seeding） =====
+def write_event_template(job):
+    """
+    1種目分のテンプレートを書き出す（並列実行時はワーカープロセスで呼ばれる）。
+
+    引数:
+        - job: (種目列名, その種目の出場者のDataFrame, サークルシーディングを行う組数)
+
+    戻り値:
+        - 出力したExcelファイルのパス
+    """
+    ev, part, circle_heats = job
+
+    distance = ''.join(filter(str.isdigit, ev))
+    stroke = ''.join(filter(str.isalpha, ev))
+
+    part['タイム秒'] = convert_to_seconds(part[ev])
+    # 早い順に並べ、組・コースの割り当てはまとめて計算する（write_ID と同じセンターアウト）
+    part = part.sort_values(by='タイム秒', kind='stable').reset_index(drop=True)
+
+    template = get_template_cache(template_path)
+    sheet = f"{distance}m"
+    if sheet not in template.sheetnames:
+        raise ValueError(f"{sheet} シートが存在しません")
+
+    # 組ブロックの配置（行・列番号）はテンプレートのシートから求め、入りきらない組は続きのシートに書き込む
+    layout = template.layout(sheet)
+    assignment = seed_heats(len(part), lanes=layout.lane_count, circle_heats=circle_heats)
+    values = list(zip(part['氏名'], part['ﾌﾘｶﾞﾅ'], part['学校名'], part['学年']))
+
+    # テンプレートは1回だけ解析し、書式ごと複製して保存する（HEAT_SHEET_WRITER=fast ならXMLへ直接書き込む）
+    out_xlsx = os.path.join(output_templates, f"{stroke}_{distance}.xlsx")
+    template.save_heats(sheet, assignment.heats, assignment.lanes, values, out_xlsx, layout)
+    return out_xlsx
+
+
+def warm_template_cache(path):
+    """
+    ワーカープロセスの起動時にテンプレートを解析しておく。
+    """
+    get_template_cache(path)
+
+
+def main(workers=None, circle_heats=None):
+    os.makedirs(os.path.dirname(output_csv_path), exist_ok=True)
+    os.makedirs(output_templates, exist_ok=True)
+
+    all_df, event_cols = build_entries()
+    all_df.to_csv(output_csv_path, index=False, encoding='utf-8-sig')
+    print(f"✔ 統合CSVを保存: {output_csv_path}")
+
+    # 種目ごとの書き出しは互いに独立しているため、ワーカー数が2以上なら並列に実行する
+    circle_heats = resolve_circle_heats(circle_heats)
+    jobs = [(ev, all_df[all_df[ev].notna()].copy(), circle_heats) for ev in event_cols]
+    workers = resolve_worker_count(workers)
+    for (ev, _, _), out_xlsx, error in run_jobs(write_event_template, jobs, workers, warm_template_cache, (template_path,)):
+        if error is None:
+            print(f"✔ 出力完了: {out_xlsx}")
+        else:
+            print(f"⚠ {ev} 処理エラー: {error}")
+    print(f"文字列正規化キャッシュ: {cache_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="エントリーシートを統合し、種目別テンプレートを書き出す")
+    parser.add_argument("--workers", default=None, help="並列に書き出すプロセス数（auto でCPU数、省略時は環境変数 HEAT_SHEET_WORKERS）")
+    parser.add_argument("--circle-heats", default=None, help="最終組から何組をサークルシーディングするか（省略時は環境変数 CIRCLE_SEED_HEATS、0 で行わない）")
+    args = parser.parse_args()
+    main(workers=args.workers, circle_heats=args.circle_heats)
@@ -25,16 +25,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None, template_file=None) -> NoReturn:
+def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None, template_file=None, heat_sheet_mode=None, workers=None,
+         progress=None, cancel_event=None, profile=None) -> NoReturn:
     """
     メイン処理:
     1. CSV からプレイヤーデータを取得
     2. 指定されたカテゴリごとに選手をソート
     3. 結果をコンソールに出力
+    引数:
+        heat_sheet_mode: "fused"（既定）は選手情報まで1回で書き込む。
+                         "two_phase" は従来通りID書き込み後に fill_name で補完する。
+        workers: 種目別Excelを並列に書き込むプロセス数（省略時は環境変数 HEAT_SHEET_WORKERS）
+        progress: 進捗を受け取るコールバック（module.progress.ProgressEvent を渡して呼ばれる）
+        cancel_event: 中止の要求（threading.Event）。セットされるとファイル・種目の区切りで処理を打ち切る
+        profile: "cprofile" / "pyinstrument" を指定すると実行全体をプロファイルする（省略時は環境変数 PIPELINE_PROFILE）
+    工程・種目・ファイル入出力ごとの処理時間は、出力先フォルダの run_report.json に記録する。
     戻り値:
         NoReturn: この関数は値を返しません
     例外:
         Exception: 処理中に発生した例外はログに記録され、処理を続行します
+        PipelineCancelled: cancel_event により処理を打ち切った場合
     """
     # 環境変数の取得（グローバル変数として管理）
     SLACK_TOKEN = os.getenv("SLACK_TOKEN")
@@ -44,18 +54,36 @@ def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None,
     merged_csv_data_file = os.getenv("MERGED_CSV_DATA_FILE", merged_csv_data_file)
     result_data_file = os.getenv("RESULT_DATA_FILE", result_data_file)
     template_file = os.getenv("TEMPLATE_FILE", template_file)
+    heat_sheet_mode = heat_sheet_mode or os.getenv("HEAT_SHEET_MODE", "fused")
 
     try:
         logger.info("Excelファイルの変換と結合を開始します")
         from scripts.ExcelToMergedCSV import main as ExcelToMergedCSV_main
         from scripts.write_ID import main as write_to_excel
-        from scripts.fill_name import main as fill_name
-        # 1. Excel→CSV→マージ
-        ExcelToMergedCSV_main(input_data_file, merged_csv_data_file)
-        # 2. IDデータの書き込み
-        write_to_excel(result_data_file, input_data_file, merged_csv_data_file, template_file)
-        # 3. 選手情報の補完
-        fill_name(result_data_file, merged_csv_data_file)
+        from module.progress import STAGE_EXCEL_TO_CSV, STAGE_FILL, STAGE_MERGE, STAGE_WRITE, ProgressReporter
+        from module.instrumentation import KIND_STAGE, run_recording, span
+        stages = [STAGE_EXCEL_TO_CSV, STAGE_MERGE, STAGE_WRITE] + ([STAGE_FILL] if heat_sheet_mode == "two_phase" else [])
+        reporter = ProgressReporter(progress, stages, cancel_event)
+        report_dir = result_data_file or "result_output_folder"
+        with run_recording(report_dir, profile, mode=heat_sheet_mode, workers=workers or os.getenv("HEAT_SHEET_WORKERS", "1"),
+                           writer=os.getenv("HEAT_SHEET_WRITER", "openpyxl")):
+            # 1. Excel→CSV→マージ
+            with span("ExcelToMergedCSV", KIND_STAGE):
+                ExcelToMergedCSV_main(input_data_file, merged_csv_data_file, progress=reporter)
+            if heat_sheet_mode == "two_phase":
+                from scripts.fill_name import main as fill_name
+                # 2. IDデータの書き込み
+                with span("write_ID", KIND_STAGE):
+                    write_to_excel(result_data_file, input_data_file, merged_csv_data_file, template_file, workers=workers, progress=reporter)
+                # 3. 選手情報の補完
+                with span("fill_name", KIND_STAGE):
+                    fill_name(result_data_file, merged_csv_data_file, template_file, progress=reporter)
+            else:
+                # 2-3. 選手情報を配置と同時に書き込み、完成版を1回で保存する
+                with span("write_ID", KIND_STAGE):
+                    write_to_excel(result_data_file, input_data_file, merged_csv_data_file, template_file, fill_player_data=True, workers=workers,
+                                   progress=reporter)
+        logger.info("処理時間: " + ", ".join(f"{stage} {seconds:.2f}秒" for stage, seconds in reporter.timings.items()))
         logger.info("処理が正常に完了しました")
         return True
     except FileNotFoundError as e:
@@ -1,6 +1,9 @@
 import logging
 import os
 import traceback
+from typing import Iterable
+import numpy as np
+import pandas as pd
 from module.send_message import send_slack_message
 
 
@@ -25,6 +28,99 @@ def parse_time_str(time_str: str) -> float:
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"parse_time_strでエラー: {e}\n{traceback.format_exc()}")
         raise
 
+def _parse_time_fallback(text: str) -> float:
+    """
+    parse_time_str と同じ解釈で1件を秒に変換する（通知は送らない）。
+    高速パスで扱えない形式（符号・指数・小数第3位以降など）に使う。
+    """
+    if ":" in text:
+        parts = text.split(":")
+        if len(parts) != 2:
+            raise ValueError(f"不正なタイム形式: {text}")
+        return float(parts[0] or "0") * 60 + float(parts[1])
+    return float(text)
+
+
+def parse_times_centis(values: Iterable, packed_numeric: bool = False, errors: str = "raise") -> np.ndarray:
+    """
+    タイムの並びをまとめてセンチ秒（1/100秒）の数値配列に変換する。
+    "m:ss.xx" / "ss.xx" 形式は文字コードの行列に対する整数演算で一括変換し、
+    それ以外の形式だけ1件ずつ parse_time_str と同じ規則で解釈する。
+
+    引数:
+        - values: タイムの並び
+            * 通常: "m:ss.xx" / ":ss.xx" / "ss.xx" 形式の文字列（parse_time_str と同じ解釈）
+            * packed_numeric=True: 220.0 → 2分20秒 のように、百の位以上を分とする数値
+        - packed_numeric: 数値形式として解釈する場合はTrue
+        - errors: "raise" なら解釈できない値で ValueError、"coerce" なら NaN にする
+
+    戻り値:
+        - センチ秒の float64 配列（未エントリー "" / "0" は NaN）
+
+    例外:
+        - ValueError: errors="raise" で解釈できない値がある場合
+    """
+    if packed_numeric:
+        packed = pd.to_numeric(pd.Series(list(values), dtype=object), errors="coerce").to_numpy(dtype=float)
+        minutes = np.floor_divide(packed, 100)
+        return np.rint((minutes * 60 + (packed - minutes * 100)) * 100)
+
+    values = list(values)
+    if None in values:
+        values = ["" if v is None else v for v in values]
+    text = np.strings.strip(np.asarray(values, dtype=str))
+    centis = np.full(len(text), np.nan)
+    if len(text) == 0:
+        return centis
+    width = text.dtype.itemsize // 4
+    if width == 0:
+        return centis
+
+    # 1文字 = 1列の文字コード行列（短い文字列の後ろは 0 で埋まる）を左から1列ずつ読み、
+    # 分・秒の整数部・小数部の3つの数値を全行同時に組み立てる
+    columns = np.ascontiguousarray(text.view(np.uint32).reshape(len(text), width).T.astype(np.int64))
+    minutes, whole, frac, n_frac = (np.zeros(len(text), dtype=np.int64) for _ in range(4))
+    seen_colon = np.zeros(len(text), dtype=bool)
+    seen_dot = np.zeros(len(text), dtype=bool)
+    has_digit = np.zeros(len(text), dtype=bool)
+    fast = np.full(len(text), width <= 18)
+    for column in columns:
+        digit = column - 48
+        is_digit = (digit >= 0) & (digit <= 9)
+        is_colon = column == 58
+        is_dot = column == 46
+        # コロンは1つまで・小数点より前、小数点は1つまで
+        fast &= (is_digit | is_colon | is_dot | (column == 0)) & ~(is_colon & (seen_colon | seen_dot)) & ~(is_dot & seen_dot)
+        # コロンが来たら、それまでに読んだ数字は分
+        minutes = np.where(is_colon, whole, minutes)
+        whole = np.where(is_colon, 0, whole)
+        seen_colon |= is_colon
+        seen_dot |= is_dot
+        in_frac = is_digit & seen_dot
+        in_whole = is_digit & ~seen_dot
+        frac = np.where(in_frac, frac * 10 + digit, frac)
+        n_frac += in_frac
+        whole = np.where(in_whole, whole * 10 + digit, whole)
+        # 分の後ろ（秒）に数字があるかを記録する
+        has_digit = (has_digit & ~is_colon) | is_digit
+
+    fast &= has_digit & (n_frac <= 2)
+    fast_centis = minutes * 6000 + whole * 100 + frac * 10 ** (2 - np.minimum(n_frac, 2))
+    centis[fast] = fast_centis[fast]
+
+    empty = (text == "") | (text == "0")
+    invalid = []
+    for i in np.flatnonzero(~fast & ~empty):
+        try:
+            centis[i] = np.rint(_parse_time_fallback(str(text[i])) * 100)
+        except ValueError:
+            invalid.append(str(text[i]))
+    if invalid and errors == "raise":
+        raise ValueError(f"不正なタイム形式: {', '.join(repr(v) for v in invalid[:5])}")
+    centis[empty] = np.nan
+    return centis
+
+
 if __name__ == "__main__":
     try:
         print(parse_time_str("1:23.45"))  # 83.45
@@ -37,6 +133,8 @@ if __name__ == "__main__":
         print(parse_time_str("1:23.45.6"))  # ValueError
         print(parse_time_str("1:23.45.6"))  # ValueError
         print(parse_time_str("1:23.45.6"))  # ValueError
+        print(parse_times_centis(["1:23.45", "58.12", "0", ""]))  # [8345. 5812. nan nan]
+        print(parse_times_centis([220.0, 65.3], packed_numeric=True))  # [14000. 6530.]
     except Exception as e:
         logging.error(f"__main__テストでエラー: {e}", exc_info=True)
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"calc_time.py __main__テストでエラー: {e}\n{traceback.format_exc()}")
\ No newline at end of file
@@ -0,0 +1,32 @@
+# config.py
+# 役割: .env の設定を環境変数へ読み込む処理を一か所にまとめ、プロセスで1回だけ行う。
+#       GUIの各画面や処理スクリプトはモジュールの読み込み時・実行のたびに load_dotenv を呼ばず、
+#       load_config を呼んでから os.getenv で設定を参照する。
+# 変数:
+#   - _LOADED: .env を読み込み済みかどうか
+
+import threading
+
+_LOADED = False
+_LOCK = threading.Lock()
+
+
+def load_config(force: bool = False) -> None:
+    """
+    .env を環境変数へ読み込む（既に設定されている環境変数は上書きしない）。
+    2回目以降の呼び出しは何もしない。
+
+    引数:
+        - force: Trueの場合は読み込み済みでも .env を読み直す
+    """
+    global _LOADED
+    if _LOADED and not force:
+        return
+    with _LOCK:
+        if _LOADED and not force:
+            return
+        # python-dotenv は設定の読み込み時にだけ必要なため、ここで読み込む
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _LOADED = True
@@ -3,75 +3,286 @@
 # 変数:
 #   - file_path: 読み込むCSVファイルのパス
 #   - data: 読み込んだCSVデータを格納するリスト
+#   - _ENCODING_CACHE: read_text がファイル全体をデコードできたエンコーディングのキャッシュ
+#   - _STREAM_ENCODING_CACHE: iter_csv_rows 用に、ファイル全体を順にデコードして確かめたエンコーディングのキャッシュ
 
 import csv
+import io
 import os
+import codecs
+import itertools
 import logging
-from typing import List, Union, Dict, Any, Optional
+from typing import List, Union, Dict, Any, Iterator, Optional, Sequence, Tuple
 import traceback
 from module.send_message import send_slack_message
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
-def read_csv_data(file_path: str) -> List[List[str]]:
+# BOMがない場合に試すエンコーディング（先に成功したものを使う）
+CANDIDATE_ENCODINGS = ["utf-8", "shift-jis", "cp932", "euc-jp"]
+
+# エンコーディング判定に使う先頭部分のバイト数
+SNIFF_BYTES = 64 * 1024
+
+# ファイルの絶対パス -> (更新時刻, サイズ, エンコーディング)
+# どちらもファイル全体をデコードできたエンコーディングだけを保持する
+_ENCODING_CACHE: Dict[str, Tuple[float, int, str]] = {}
+_STREAM_ENCODING_CACHE: Dict[str, Tuple[float, int, str]] = {}
+
+
+def detect_encoding(data: bytes) -> Optional[str]:
     """
-    指定したパスのCSVファイルを読み込み、二次元リストとして返す。
+    バイト列のエンコーディングを推定する。
+    BOMがあればそれに従い、なければ先頭 SNIFF_BYTES バイトを候補の順に試しにデコードする。
+    先頭部分だけで判定するため、後半に候補でデコードできない文字がある場合もある（呼び出し側で全体を確かめる）。
 
     引数:
-        - file_path: 読み込むCSVファイルのパス
+        - data: ファイルの内容（先頭部分だけでもよい）
 
     戻り値:
-        - データを格納したリスト（最初の行をヘッダーとして含む）
-        
+        - エンコーディング名（どの候補でもデコードできない場合は None）
+    """
+    if data.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    if data.startswith((codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE)):
+        return "utf-16"
+    prefix = data[:SNIFF_BYTES]
+    for encoding in CANDIDATE_ENCODINGS:
+        try:
+            # 途中で切れた複数バイト文字はエラーにしない（final=False）
+            codecs.getincrementaldecoder(encoding)().decode(prefix, final=False)
+            return encoding
+        except UnicodeDecodeError:
+            continue
+    return None
+
+
+def _cached_encoding(file_path: str, cache: Dict[str, Tuple[float, int, str]]) -> Tuple[str, Optional[str], os.stat_result]:
+    key = os.path.abspath(file_path)
+    stat = os.stat(file_path)
+    cached = cache.get(key)
+    if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+        return key, cached[2], stat
+    return key, None, stat
+
+
+def read_text(file_path: str) -> Tuple[str, str]:
+    """
+    ファイルを1回だけ読み込み、エンコーディングを判定してデコードした文字列を返す。
+    判定結果はパスと更新時刻ごとに保持し、同じファイルの再読み込みでは判定を省く。
+
+    引数:
+        - file_path: 読み込むファイルのパス
+
+    戻り値:
+        - (デコードした文字列, エンコーディング名)
+
     例外:
         - FileNotFoundError: ファイルが存在しない場合
         - PermissionError: ファイルを読み取る権限がない場合
-        - UnicodeDecodeError: ファイルのエンコーディングが不正な場合
+        - UnicodeDecodeError: どのエンコーディングでもデコードできない場合
+    """
+    key, encoding, stat = _cached_encoding(file_path, _ENCODING_CACHE)
+    with open(file_path, mode="rb") as file:
+        data = file.read()
+
+    # キャッシュ → 先頭部分での判定 → 残りの候補 の順に、全体をデコードできるものを使う
+    tried = []
+    for candidate in [encoding, detect_encoding(data), "utf-8-sig"] + CANDIDATE_ENCODINGS:
+        if candidate is None or candidate in tried:
+            continue
+        tried.append(candidate)
+        try:
+            text = data.decode(candidate)
+        except UnicodeDecodeError:
+            continue
+        _ENCODING_CACHE[key] = (stat.st_mtime, stat.st_size, candidate)
+        return text, candidate
+    raise UnicodeDecodeError("utf-8", b"", 0, 1, f"ファイルのエンコーディングが不正です: {file_path}")
+
+
+def _decodes_fully(file_path: str, encoding: str) -> bool:
+    """
+    ファイル全体を SNIFF_BYTES ずつ読み、encoding でデコードできるかを確かめる（内容は保持しない）。
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        with open(file_path, mode="rb") as file:
+            for chunk in iter(lambda: file.read(SNIFF_BYTES), b""):
+                decoder.decode(chunk)
+        decoder.decode(b"", final=True)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def _stream_encoding(file_path: str) -> str:
+    """
+    iter_csv_rows で使うエンコーディングを返す。
+    先頭部分での判定結果 → 残りの候補 の順に、ファイル全体をデコードできるものを使い、キャッシュする。
+
+    例外:
+        - UnicodeDecodeError: どのエンコーディングでもデコードできない場合
+    """
+    key, encoding, stat = _cached_encoding(file_path, _STREAM_ENCODING_CACHE)
+    if encoding is not None:
+        return encoding
+    with open(file_path, mode="rb") as file:
+        prefix = file.read(SNIFF_BYTES)
+    tried = []
+    for candidate in [detect_encoding(prefix), "utf-8-sig"] + CANDIDATE_ENCODINGS:
+        if candidate is None or candidate in tried:
+            continue
+        tried.append(candidate)
+        if _decodes_fully(file_path, candidate):
+            if len(tried) > 1:
+                logger.info(f"先頭部分の判定（{tried[0]}）ではデコードできないため {candidate} で読み込みます: {file_path}")
+            _STREAM_ENCODING_CACHE[key] = (stat.st_mtime, stat.st_size, candidate)
+            return candidate
+    raise UnicodeDecodeError("utf-8", b"", 0, 1, f"ファイルのエンコーディングが不正です: {file_path}")
+
+
+def _resolve_columns(header: List[str], columns: Sequence[Union[str, int]]) -> List[int]:
+    """
+    列名または列番号（負の値は末尾から）のリストを、列番号のリストに変換する。
+    """
+    indices = []
+    for column in columns:
+        if isinstance(column, int):
+            indices.append(column if column >= 0 else len(header) + column)
+        elif column in header:
+            indices.append(header.index(column))
+        else:
+            raise ValueError(f"列 '{column}' がヘッダーにありません")
+    return indices
+
+
+def iter_csv_rows(
+    file_path: str,
+    columns: Optional[Sequence[Union[str, int]]] = None,
+    skip_header: bool = False,
+) -> Iterator[List[str]]:
+    """
+    CSVファイルを1行ずつ返すイテレータ。ファイル全体をメモリに読み込まない。
+    エンコーディングはキャッシュ、なければ先頭部分から判定し、ファイル全体を順にデコードできることを確かめてから使う。
+
+    引数:
+        - file_path: 読み込むCSVファイルのパス
+        - columns: 取り出す列（列名、または列番号。-1 は最終列）。省略時は全列
+          列番号はヘッダー行の列数を基準に解決し、列が足りない行は "" で補う
+        - skip_header: Trueの場合はヘッダー行を返さない
+
+    戻り値:
+        - 各行（文字列のリスト）のイテレータ（skip_header=False なら最初の行はヘッダー）
+
+    例外:
+        - FileNotFoundError: ファイルが存在しない場合
+        - UnicodeDecodeError: エンコーディングを判定できない場合
+        - ValueError: columns の列名がヘッダーにない場合
     """
     if not os.path.exists(file_path):
         logger.error(f"CSVファイルが見つかりません: {file_path}")
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが見つかりません: {file_path}")
         raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
-        
+
+    encoding = _stream_encoding(file_path)
+
+    count = 0
+    with open(file_path, mode="r", encoding=encoding) as file:
+        reader = csv.reader(file)
+        header = next(reader, None)
+        if header is None:
+            return
+        indices = None if columns is None else _resolve_columns(header, columns)
+        rows = itertools.chain([header] if not skip_header else [], reader)
+        for row in rows:
+            count += 1
+            if indices is None:
+                yield row
+            else:
+                yield [row[i] if i < len(row) else "" for i in indices]
+    logger.debug(f"CSVファイルを順に読み込みました: {file_path}, {count}行")
+
+
+def iter_csv_dicts(file_path: str, columns: Optional[Sequence[str]] = None) -> Iterator[Dict[str, str]]:
+    """
+    CSVファイルを1行ずつ、ヘッダーをキーとした辞書で返すイテレータ。
+
+    引数:
+        - file_path: 読み込むCSVファイルのパス
+        - columns: 取り出す列名（省略時は全列）
+
+    戻り値:
+        - 各行の辞書のイテレータ
+
+    例外:
+        - FileNotFoundError: ファイルが存在しない場合
+        - ValueError: columns の列名がヘッダーにない場合
+    """
+    rows = iter_csv_rows(file_path, columns)
+    keys = next(rows, None)
+    if keys is None:
+        return
+    for row in rows:
+        yield dict(zip(keys, row))
+
+
+def _read_csv(file_path: str, parse, description: str):
+    """
+    read_csv_data / read_csv_as_dict の共通処理。ファイルは1回だけ読み込み、デコード済みの文字列を解析する。
+    """
+    if not os.path.exists(file_path):
+        logger.error(f"CSVファイルが見つかりません: {file_path}")
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが見つかりません: {file_path}")
+        raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
+
     try:
-        with open(file_path, mode="r", encoding="utf-8") as file:
-            csv_reader = csv.reader(file)
-            data = [row for row in csv_reader]
-            
-            if not data:
-                logger.warning(f"CSVファイルが空です: {file_path}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが空です: {file_path}")
-                return []
-                
-            logger.info(f"CSVファイルを正常に読み込みました: {file_path}, {len(data)}行")
-            return data
+        text, encoding = read_text(file_path)
+        if "\r" in text:
+            # open() の既定と同じく改行を \n にそろえる
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        data = parse(io.StringIO(text))
+        if encoding != "utf-8":
+            logger.info(f"CSVファイルを {encoding} エンコーディングで{description}読み込みました: {file_path}")
+        return data
     except PermissionError as e:
         logger.error(f"CSVファイルの読み取り権限がありません: {file_path} - {e}")
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルの読み取り権限がありません: {file_path} - {e}")
         raise PermissionError(f"ファイルの読み取り権限がありません: {file_path}")
-    except UnicodeDecodeError as e:
-        # UTF-8以外のエンコーディングで試行
-        encodings = ["utf-8-sig", "shift-jis", "cp932", "euc-jp"]
-        for encoding in encodings:
-            try:
-                with open(file_path, mode="r", encoding=encoding) as file:
-                    csv_reader = csv.reader(file)
-                    data = [row for row in csv_reader]
-                    logger.info(f"CSVファイルを {encoding} エンコーディングで読み込みました: {file_path}")
-                    return data
-            except UnicodeDecodeError:
-                continue
-        
-        # すべてのエンコーディングが失敗
+    except UnicodeDecodeError:
         logger.error(f"CSVファイルのエンコーディングが不正です: {file_path}")
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルのエンコーディングが不正です: {file_path}")
-        raise UnicodeDecodeError("utf-8", b"", 0, 1, f"ファイルのエンコーディングが不正です: {file_path}")
+        raise
     except Exception as e:
         logger.error(f"CSVファイル読み込み中に予期しないエラーが発生しました: {file_path} - {e}")
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイル読み込み中に予期しないエラーが発生しました: {file_path} - {e}\n{traceback.format_exc()}")
         raise
 
+
+def read_csv_data(file_path: str) -> List[List[str]]:
+    """
+    指定したパスのCSVファイルを読み込み、二次元リストとして返す。
+
+    引数:
+        - file_path: 読み込むCSVファイルのパス
+
+    戻り値:
+        - データを格納したリスト（最初の行をヘッダーとして含む）
+
+    例外:
+        - FileNotFoundError: ファイルが存在しない場合
+        - PermissionError: ファイルを読み取る権限がない場合
+        - UnicodeDecodeError: ファイルのエンコーディングが不正な場合
+    """
+    data = _read_csv(file_path, lambda buffer: [row for row in csv.reader(buffer)], "")
+    if not data:
+        logger.warning(f"CSVファイルが空です: {file_path}")
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが空です: {file_path}")
+        return []
+    logger.debug(f"CSVファイルを正常に読み込みました: {file_path}, {len(data)}行")
+    return data
+
 def write_csv_data(file_path: str, data: List[List[Any]], headers: Optional[List[str]] = None) -> bool:
     """
     指定したパスにCSVファイルを書き込む。
@@ -130,39 +341,6 @@ def read_csv_as_dict(file_path: str) -> List[Dict[str, str]]:
         - FileNotFoundError: ファイルが存在しない場合
         - PermissionError: ファイルを読み取る権限がない場合 
     """
-    if not os.path.exists(file_path):
-        logger.error(f"CSVファイルが見つかりません: {file_path}")
-        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが見つかりません: {file_path}")
-        raise FileNotFoundError(f"ファイルが見つかりません: {file_path}")
-        
-    try:
-        with open(file_path, mode="r", encoding="utf-8") as file:
-            csv_reader = csv.DictReader(file)
-            data = [dict(row) for row in csv_reader]
-            
-            logger.info(f"CSVファイルを辞書として正常に読み込みました: {file_path}, {len(data)}行")
-            return data
-    except PermissionError as e:
-        logger.error(f"CSVファイルの読み取り権限がありません: {file_path} - {e}")
-        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルの読み取り権限がありません: {file_path} - {e}")
-        raise PermissionError(f"ファイルの読み取り権限がありません: {file_path}")
-    except UnicodeDecodeError:
-        # UTF-8以外のエンコーディングで試行
-        for encoding in ["utf-8-sig", "shift-jis", "cp932", "euc-jp"]:
-            try:
-                with open(file_path, mode="r", encoding=encoding) as file:
-                    csv_reader = csv.DictReader(file)
-                    data = [dict(row) for row in csv_reader]
-                    logger.info(f"CSVファイルを {encoding} エンコーディングで辞書として読み込みました: {file_path}")
-                    return data
-            except UnicodeDecodeError:
-                continue
-        
-        # すべてのエンコーディングが失敗
-        logger.error(f"CSVファイルのエンコーディングが不正です: {file_path}")
-        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルのエンコーディングが不正です: {file_path}")
-        raise
-    except Exception as e:
-        logger.error(f"CSVファイル読み込み中に予期しないエラーが発生しました: {file_path} - {e}")
-        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイル読み込み中に予期しないエラーが発生しました: {file_path} - {e}\n{traceback.format_exc()}")
-        raise
+    data = _read_csv(file_path, lambda buffer: [dict(row) for row in csv.DictReader(buffer)], "辞書として")
+    logger.debug(f"CSVファイルを辞書として正常に読み込みました: {file_path}, {len(data)}行")
+    return data
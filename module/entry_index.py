@@ -0,0 +1,157 @@
+# entry_index.py
+# 役割: 結合CSVを一度だけ読み込み、種目別のタイム順選手リストを必要になった時点で作成して共有する。
+#       write_ID / fill_name / get_ID はこのインデックスを経由して選手データを参照する。
+# 変数:
+#   - roster: CSVから作成した列指向の名簿
+#   - players: 名簿の各行の PlayerView のリスト
+#   - events: (泳法, 距離) -> タイム順（早い順）の選手リスト（参照時にソートする LazyEventMap）
+#   - _INDEX_CACHE: (CSVパス, 更新時刻, サイズ, カテゴリ) -> EntryIndex のキャッシュ
+
+import os
+import logging
+import traceback
+from typing import Dict, List, Mapping, Optional, Tuple, Union
+from module.csv_utils import iter_csv_rows
+from module.player_data import PlayerData
+from module.roster import PlayerView, Roster
+from module.roster_cache import load_roster_cache, remember_roster
+from module.instrumentation import KIND_IO, instrumented
+from module.player_sort_utils import group_and_sort_all_events
+from module.send_message import send_slack_message
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+_INDEX_CACHE: Dict[Tuple[str, float, int, str], "EntryIndex"] = {}
+
+
+@instrumented(kind=KIND_IO, rows=len)
+def load_roster(csv_path: str) -> Roster:
+    """
+    結合CSVから列指向の名簿を作成する。CSVより新しい名簿キャッシュ（merged_output.roster.pkl）が
+    あればそれを読み込み、なければCSVを1行ずつ読み込んで作成する（行のリストは作らない）。
+    作成・読み込んだ名簿はメモリにも保持し、同じ内容のCSVでは次回から再利用する。
+
+    引数:
+        - csv_path: 読み込み対象のCSVファイルのパス
+
+    戻り値:
+        - 名簿（データがない場合は0行の名簿）
+
+    例外:
+        - FileNotFoundError: CSVファイルが存在しない場合
+        - ValueError: タイムを解釈できない場合
+    """
+    roster = load_roster_cache(csv_path)
+    if roster is None:
+        roster = Roster.from_rows(iter_csv_rows(csv_path, skip_header=True))
+        remember_roster(roster, csv_path)
+    if len(roster) == 0:  # ヘッダーのみ、またはデータなし
+        logger.warning(f"CSVファイルにデータがありません: {csv_path}")
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルにデータがありません: {csv_path}")
+    return roster
+
+
+class EntryIndex:
+    """
+    全種目のタイム順選手リストを保持するインデックス。
+    選手データは列指向の名簿（Roster）に1つだけ持ち、種目ごとの絞り込みと
+    並べ替えはタイム行列の列に対する配列演算で、その種目が必要になったときに行う。
+    """
+
+    def __init__(self, players: Union[Roster, List[PlayerData]], category: str = "mixed"):
+        self.category = category
+        self.roster = players if isinstance(players, Roster) else Roster.from_players(players)
+        self.players: List[PlayerView] = self.roster.views()
+        self.players_by_id: Dict[str, PlayerView] = {p.id: p for p in self.players}
+        # 種目ごとのソートは初めて参照されたときに行う
+        self.events: Mapping[Tuple[str, int], List[PlayerView]] = group_and_sort_all_events(self.roster, category)
+
+    @classmethod
+    def from_csv(cls, csv_path: str, category: str = "mixed") -> "EntryIndex":
+        """
+        CSVファイルからインデックスを構築する（キャッシュは使わない）。
+        """
+        return cls(load_roster(csv_path), category)
+
+    def get_players(self, event: Tuple[str, int]) -> List[PlayerView]:
+        """
+        指定イベントの選手をタイム順（早い順）で返す。
+        """
+        return self.events.get(event, [])
+
+    def get_player_ids(self, event: Tuple[str, int]) -> List[str]:
+        """
+        指定イベントの選手IDをタイム順（早い順）で返す。
+        """
+        return [player.id for player in self.get_players(event)]
+
+    def get_player_data(self, player_ids: List[Optional[str]]) -> Dict[Optional[str], Tuple]:
+        """
+        IDリストに対応する (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年) を返す。
+        該当する選手がいないID（空のID、名簿の複数の行にあるIDを含む）には (None, None, None, None) を返す。
+        学年は従来の pd.read_csv と同じく、列全体が数字の場合は数値で返す（組表のセルに数値で書き込むため）。
+        組表1枚分のIDを名簿の整数ID表でまとめて引き、各列も配列演算でまとめて取り出す。
+        """
+        roster = self.roster
+        rows = roster.find_rows(player_ids)
+        found = rows >= 0
+        hits = rows[found]
+        values = iter(zip(
+            roster.names[hits].tolist(),
+            roster.huriganas[hits].tolist(),
+            roster.teams.take(hits).tolist(),
+            roster.grades.take(hits, typed=True).tolist(),
+        ))
+        missing = (None, None, None, None)
+        return {
+            player_id: next(values) if ok else missing
+            for player_id, ok in zip(player_ids, found.tolist())
+        }
+
+def load_entry_index(csv_path: str, category: str = "mixed", use_cache: bool = True) -> EntryIndex:
+    """
+    結合CSVのインデックスを取得する。CSVの更新時刻とサイズが変わらない限り、
+    同じプロセス内では構築済みのインデックスを再利用する。
+
+    引数:
+        - csv_path: 読み込み対象のCSVファイルのパス
+        - category: 集計するカテゴリ ("male", "female", "mixed")
+        - use_cache: Falseの場合はキャッシュを使わずに構築する
+
+    戻り値:
+        - EntryIndex
+
+    例外:
+        - FileNotFoundError: CSVファイルが存在しない場合
+        - ValueError: カテゴリが正しくない場合
+    """
+    try:
+        if not use_cache:
+            return EntryIndex.from_csv(csv_path, category)
+        stat = os.stat(csv_path)
+        key = (os.path.abspath(csv_path), stat.st_mtime, stat.st_size, category)
+        index = _INDEX_CACHE.get(key)
+        if index is None:
+            index = EntryIndex.from_csv(csv_path, category)
+            # 同じCSVの古いインデックスは破棄する
+            for old_key in [k for k in _INDEX_CACHE if k[0] == key[0] and k[3] == category]:
+                del _INDEX_CACHE[old_key]
+            _INDEX_CACHE[key] = index
+            logger.info(f"エントリーインデックスを構築しました: {csv_path} ({len(index.players)}名)")
+        return index
+    except FileNotFoundError:
+        raise
+    except ValueError:
+        raise
+    except Exception as e:
+        logger.error(f"load_entry_indexで予期しないエラー: {e}", exc_info=True)
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"load_entry_indexで予期しないエラー: {e}\n{traceback.format_exc()}")
+        raise
+
+
+def clear_entry_index_cache() -> None:
+    """
+    キャッシュ済みのインデックスをすべて破棄する。
+    """
+    _INDEX_CACHE.clear()
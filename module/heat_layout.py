@@ -0,0 +1,225 @@
+# heat_layout.py
+# 役割: テンプレートの距離別シートから、組ブロックの位置を (行, 列) の整数表として求める。
+#       各組ブロックは A列などのコース番号 "1." ～ "6." の右隣の列に選手を書き込む構成で、
+#       コース番号のセルを目印に組ブロックを見つけ、列の左から・同じ列は上から順に組番号を振る。
+#       書き込み側はセル番地の文字列を作ったり解析したりせず、この表の整数で直接セルを指定する。
+# 変数:
+#   - rows: 組 × コース のセル行番号（1始まり）
+#   - cols: 組ごとの氏名の列番号（1始まり）
+#   - FIELD_OFFSETS: 氏名の列からの各項目（氏名・フリガナ・学校名・学年）の列のずれ
+#   - label_rows / label_cols: 組ブロックの見出し（"1組" など）のセル（見出しがない組は -1）
+#   - page: 1シートに入りきらない組を続きのシートに書き込むときのシート番号（0 が最初のシート）
+
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, get_column_letter
+from openpyxl.worksheet.worksheet import Worksheet
+
+# 氏名の列からのずれ（氏名, ﾌﾘｶﾞﾅ, 学校名, 学年）
+FIELD_OFFSETS: Tuple[int, ...] = (0, 1, 2, 3)
+
+# 組ブロックのコース数（テンプレートは6コース）
+DEFAULT_LANES = 6
+
+
+@dataclass(frozen=True)
+class HeatLayout:
+    """
+    1シート分の組ブロックの配置。rows[組, コース-1] と cols[組] で選手を書き込むセルを表す。
+    """
+    sheet_name: str
+    rows: np.ndarray
+    cols: np.ndarray
+    label_rows: Optional[np.ndarray] = None
+    label_cols: Optional[np.ndarray] = None
+
+    @property
+    def n_heats(self) -> int:
+        return len(self.cols)
+
+    @property
+    def lane_count(self) -> int:
+        return self.rows.shape[1]
+
+    @property
+    def capacity(self) -> int:
+        """
+        シート1枚に書き込める人数。
+        """
+        return self.rows.size
+
+    @classmethod
+    def from_coordinates(cls, sheet_name: str, cells: Sequence[Sequence[str]]) -> "HeatLayout":
+        """
+        組ごと・コース順のセル番地のリスト（従来の cells 引数）から配置を作る。
+        各組の氏名の列は同じで、コース数は全組で同じである必要がある。
+        """
+        rows, cols = [], []
+        for heat_cells in cells:
+            parsed = [coordinate_from_string(cell) for cell in heat_cells]
+            rows.append([row for _, row in parsed])
+            cols.append(column_index_from_string(parsed[0][0]))
+        return cls(sheet_name, np.array(rows, dtype=np.int64).reshape(len(rows), -1), np.array(cols, dtype=np.int64))
+
+    def cells(self, heats: np.ndarray, lanes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        組番号（0始まり）とコース番号（1始まり）の配列から、氏名を書き込むセルの (行, 列) の配列を返す。
+        """
+        return self.rows[heats, lanes - 1], self.cols[heats]
+
+    def page_count(self, n_heats: int) -> int:
+        """
+        n_heats 組を書き込むのに必要なシート数（1以上）を返す。
+        """
+        return max(1, -(-n_heats // self.n_heats))
+
+    def paginate(self, heats: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        通しの組番号（0始まり）を、(シート番号, シート内の組番号) の配列に分ける。
+        """
+        return np.divmod(np.asarray(heats, dtype=np.int64), self.n_heats)
+
+    def label_cells(self, first_heat: int) -> Dict[Tuple[int, int], str]:
+        """
+        続きのシートの組見出し（通しの組番号で first_heat + 1 組から）を {(行, 列): 見出し} で返す。
+        """
+        if self.label_rows is None:
+            return {}
+        return {
+            (row, col): f"{first_heat + k + 1}組"
+            for k, (row, col) in enumerate(zip(self.label_rows.tolist(), self.label_cols.tolist()))
+            if row > 0
+        }
+
+    def relabel(self, ws: Worksheet, first_heat: int) -> None:
+        """
+        続きのシートの組見出しを通しの組番号（first_heat + 1 組から）に書き換える。
+        """
+        for (row, col), label in self.label_cells(first_heat).items():
+            ws.cell(row=row, column=col, value=label)
+
+    def page_cells(self, heats: np.ndarray, lanes: np.ndarray, fields: Sequence[Sequence]) -> List[Dict[Tuple[int, int], object]]:
+        """
+        選手を組ブロックに書き込んだときのセル値を、シートごとの {(行, 列): 値} で返す。
+        1シートの組数を超える分は続きのシートに入れ、続きのシートには組見出しの書き換えも含める。
+        値が None の項目は含めない。
+
+        引数:
+            - heats: 選手ごとの通しの組番号（0始まり）
+            - lanes: 選手ごとのコース番号（1始まり）
+            - fields: 選手ごとの (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年) など（先頭から FIELD_OFFSETS の順）
+
+        戻り値:
+            - シートごとのセル値のリスト（長さはシート数）
+        """
+        heats = np.asarray(heats, dtype=np.int64)
+        lanes = np.asarray(lanes, dtype=np.int64)
+        n_pages = self.page_count(int(heats.max()) + 1 if len(heats) else 0)
+        pages: List[Dict[Tuple[int, int], object]] = [{} for _ in range(n_pages)]
+        for page in range(1, n_pages):
+            pages[page].update(self.label_cells(page * self.n_heats))
+
+        page_index, page_heats = self.paginate(heats)
+        rows, cols = self.cells(page_heats, lanes)
+        for page, row, col, values in zip(page_index.tolist(), rows.tolist(), cols.tolist(), fields):
+            cells = pages[page]
+            for offset, value in zip(FIELD_OFFSETS, values):
+                if value is not None:
+                    cells[(row, col + offset)] = value
+        return pages
+
+    def coordinates(self) -> List[List[str]]:
+        """
+        従来の cells 引数と同じ、組ごと・コース順のセル番地（"B4" など）のリストを返す。
+        """
+        letters = [get_column_letter(int(col)) for col in self.cols]
+        return [[f"{letter}{int(row)}" for row in heat_rows] for letter, heat_rows in zip(letters, self.rows)]
+
+
+def _lane_marker(value) -> Optional[int]:
+    """
+    "1." のようなコース番号のセル値からコース番号を返す（全角数字も可）。コース番号でなければ None。
+    """
+    if not isinstance(value, str):
+        return None
+    text = unicodedata.normalize("NFKC", value).strip()
+    if len(text) < 2 or not text.endswith(".") or not text[:-1].isdigit():
+        return None
+    return int(text[:-1])
+
+
+def compile_heat_layout(cells: Iterable[Tuple[int, int, object]], sheet_name: str, lanes: int = DEFAULT_LANES) -> HeatLayout:
+    """
+    シートのセル値から組ブロックの配置を求める。
+    コース番号 "1." のセルから下に "2." ～ "{lanes}." が並んでいる所を1つの組ブロックとする。
+
+    引数:
+        - cells: (行, 列, 値) の並び
+        - sheet_name: シート名（エラー表示用）
+        - lanes: 1組のコース数
+
+    戻り値:
+        - HeatLayout
+
+    例外:
+        - ValueError: 組ブロックが1つも見つからない場合
+    """
+    markers: Dict[Tuple[int, int], int] = {}
+    labels = set()
+    for row, col, value in cells:
+        lane = _lane_marker(value)
+        if lane is not None:
+            markers[(row, col)] = lane
+        elif isinstance(value, str) and "組" in value:
+            labels.add((row, col))
+
+    anchors = sorted(
+        ((row, col) for (row, col), lane in markers.items()
+         if lane == 1 and all(markers.get((row + k, col)) == k + 1 for k in range(1, lanes))),
+        key=lambda cell: (cell[1], cell[0]),
+    )
+    if not anchors:
+        raise ValueError(f"シート '{sheet_name}' に組ブロック（コース番号 1. ～ {lanes}.）が見つかりません。")
+
+    anchor_rows = np.array([row for row, _ in anchors], dtype=np.int64)
+    rows = anchor_rows[:, None] + np.arange(lanes, dtype=np.int64)
+    cols = np.array([col + 1 for _, col in anchors], dtype=np.int64)
+    # 組見出しはコース番号 "1." の1つ上のセル
+    has_label = np.array([(row - 1, col) in labels for row, col in anchors], dtype=bool)
+    label_rows = np.where(has_label, anchor_rows - 1, -1)
+    label_cols = np.where(has_label, cols - 1, -1)
+    for array in (rows, cols, label_rows, label_cols):
+        array.setflags(write=False)
+    return HeatLayout(sheet_name, rows, cols, label_rows, label_cols)
+
+
+def layout_from_worksheet(ws: Worksheet, lanes: int = DEFAULT_LANES) -> HeatLayout:
+    """
+    openpyxl のシートから組ブロックの配置を求める。
+    """
+    return compile_heat_layout(
+        ((row, col, cell.value) for (row, col), cell in ws._cells.items()), ws.title, lanes
+    )
+
+
+def write_heat_cells(ws: Worksheet, rows: Sequence[int], cols: Sequence[int], fields: Sequence[Sequence]) -> int:
+    """
+    選手ごとの値を、氏名の列と FIELD_OFFSETS のずれの列に書き込む。値が None の項目は書き込まない。
+
+    引数:
+        - ws: 書き込み先のシート
+        - rows, cols: 選手ごとの氏名のセルの行・列番号
+        - fields: 選手ごとの (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年) など（先頭から FIELD_OFFSETS の順）
+
+    戻り値:
+        - 書き込んだ選手数
+    """
+    count = 0
+    for row, col, values in zip(rows, cols, fields):
+        for offset, value in zip(FIELD_OFFSETS, values):
+            if value is not None:
+                ws.cell(row=row, column=col + offset, value=value)
+        count += 1
+    return count
@@ -0,0 +1,422 @@
+# instrumentation.py
+# 役割: パイプラインの工程・種目・ファイル入出力ごとの処理時間を計測し、実行ごとのレポート（JSON）を出力する。
+#       span（with 文）と instrumented（デコレーター）で区間を囲むと、経過時間・CPU時間・処理件数・
+#       ピークメモリ（RSS）を記録する。記録中の実行がない場合は何もしない（計測のための負荷はほぼない）。
+#       PIPELINE_PROFILE を指定すると、実行全体を cProfile / pyinstrument でプロファイルする。
+# 変数:
+#   - RUN_REPORT_FILE: 出力先フォルダに書き出すレポートのファイル名（環境変数 RUN_REPORT=0 で出力しない）
+#   - PROFILE_MODES: プロファイラーの種類（環境変数 PIPELINE_PROFILE、省略時はプロファイルしない）
+#   - KIND_STAGE / KIND_EVENT / KIND_IO: 区間の種類（工程・種目・ファイル入出力）
+#   - _ACTIVE: 記録中の RunRecorder（プロセスごとに1つ。ワーカープロセスの区間は capture_spans で集めて親へ渡す）
+
+import os
+import sys
+import json
+import time
+import logging
+import threading
+import functools
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+RUN_REPORT_FILE = "run_report.json"
+RUN_REPORT_VERSION = 1
+
+PROFILE_CPROFILE = "cprofile"
+PROFILE_PYINSTRUMENT = "pyinstrument"
+PROFILE_MODES = (PROFILE_CPROFILE, PROFILE_PYINSTRUMENT)
+
+KIND_STAGE = "stage"
+KIND_EVENT = "event"
+KIND_IO = "io"
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    このプロセスのこれまでのピークメモリ（RSS、MiB）を返す。取得できない環境では None。
+    """
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux はKiB、macOS はバイト単位
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    if sys.platform == "win32":
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            class ProcessMemoryCounters(ctypes.Structure):
+                _fields_ = [
+                    ("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD),
+                    ("PeakWorkingSetSize", ctypes.c_size_t), ("WorkingSetSize", ctypes.c_size_t),
+                    ("QuotaPeakPagedPoolUsage", ctypes.c_size_t), ("QuotaPagedPoolUsage", ctypes.c_size_t),
+                    ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t), ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+                    ("PagefileUsage", ctypes.c_size_t), ("PeakPagefileUsage", ctypes.c_size_t),
+                ]
+
+            counters = ProcessMemoryCounters()
+            counters.cb = ctypes.sizeof(counters)
+            process = ctypes.windll.kernel32.GetCurrentProcess()
+            if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+                return counters.PeakWorkingSetSize / (1024 * 1024)
+        except Exception:
+            return None
+    return None
+
+
+@dataclass
+class Span:
+    """
+    計測した区間1つ分。
+
+    属性:
+        - name: 区間の名前（工程名・種目名・関数名）
+        - kind: 区間の種類（KIND_STAGE / KIND_EVENT / KIND_IO）
+        - started: 開始時刻（エポック秒。ワーカープロセスの区間も同じ時計で並べられる）
+        - wall: 経過時間（秒）
+        - cpu: 区間を実行したスレッドのCPU時間（秒）
+        - rows: 処理した件数（行数・選手数など、不明な場合は None）
+        - peak_rss_mb: 区間の終了時点でのプロセスのピークメモリ（MiB）
+        - pid: 区間を実行したプロセスID
+        - parent: 外側の区間の名前
+        - error: 区間内で例外が発生した場合はその型名
+        - attrs: その他の情報（ファイル名・書き出し方式など）
+    """
+    name: str
+    kind: str
+    started: float
+    wall: float = 0.0
+    cpu: float = 0.0
+    rows: Optional[int] = None
+    peak_rss_mb: Optional[float] = None
+    pid: int = 0
+    parent: Optional[str] = None
+    error: Optional[str] = None
+    attrs: Dict[str, Any] = field(default_factory=dict)
+
+
+class SpanHandle:
+    """
+    span の with 文の中で、処理件数や付加情報を後から設定するためのもの。
+    """
+
+    __slots__ = ("rows", "attrs")
+
+    def __init__(self, rows: Optional[int] = None, attrs: Optional[Dict[str, Any]] = None):
+        self.rows = rows
+        self.attrs = attrs if attrs is not None else {}
+
+    def add_rows(self, count: int) -> None:
+        self.rows = (self.rows or 0) + int(count)
+
+    def set(self, **attrs: Any) -> None:
+        self.attrs.update(attrs)
+
+
+class RunRecorder:
+    """
+    1回の実行で計測した区間を集め、レポートにまとめる。複数スレッドから記録してもよい。
+    """
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self.started = time.time()
+        self._perf_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _stack(self) -> List[str]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def record(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def extend(self, spans: List[Span]) -> None:
+        with self._lock:
+            self.spans.extend(spans)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        区間の種類ごとの件数・経過時間・CPU時間・処理件数の合計を返す。
+        """
+        totals: Dict[str, Dict[str, float]] = {}
+        for span in self.spans:
+            total = totals.setdefault(span.kind, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "rows": 0})
+            total["count"] += 1
+            total["wall_s"] += span.wall
+            total["cpu_s"] += span.cpu
+            total["rows"] += span.rows or 0
+        return totals
+
+    def report(self, status: str = "ok", **meta: Any) -> Dict[str, Any]:
+        """
+        レポートの内容（JSONに書き出せる辞書）を返す。区間は開始時刻の順に並べる。
+        """
+        spans = []
+        for span in sorted(self.spans, key=lambda s: s.started):
+            data = asdict(span)
+            data["start_s"] = round(data.pop("started") - self.started, 6)
+            spans.append(data)
+        return {
+            "version": RUN_REPORT_VERSION,
+            "status": status,
+            "started_at": datetime.fromtimestamp(self.started).isoformat(timespec="seconds"),
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "wall_s": time.perf_counter() - self._perf_started,
+            "cpu_s": time.process_time() - self._cpu_started,
+            "peak_rss_mb": peak_rss_mb(),
+            "meta": meta,
+            "summary": self.summary(),
+            "spans": spans,
+        }
+
+    def write_report(self, path: str, status: str = "ok", **meta: Any) -> str:
+        """
+        レポートをJSONで保存する。
+
+        例外:
+            - PermissionError: 保存先に書き込む権限がない場合
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.report(status, **meta), f, ensure_ascii=False, indent=2, default=str)
+        return path
+
+
+_ACTIVE: Optional[RunRecorder] = None
+
+
+def active_recorder() -> Optional[RunRecorder]:
+    return _ACTIVE
+
+
+def _activate(recorder: Optional[RunRecorder]) -> Optional[RunRecorder]:
+    global _ACTIVE
+    previous, _ACTIVE = _ACTIVE, recorder
+    return previous
+
+
+@contextmanager
+def span(name: str, kind: str = KIND_STAGE, rows: Optional[int] = None, **attrs: Any) -> Iterator[SpanHandle]:
+    """
+    with 文で囲んだ区間を計測する。件数が後からわかる場合は handle.rows / handle.add_rows で設定する。
+
+    例:
+        with span("merge_csv_files", KIND_IO) as handle:
+            df = ...
+            handle.rows = len(df)
+    """
+    recorder = _ACTIVE
+    handle = SpanHandle(rows, attrs)
+    if recorder is None:
+        yield handle
+        return
+    stack = recorder._stack()
+    parent = stack[-1] if stack else None
+    stack.append(name)
+    started = time.time()
+    perf_started = time.perf_counter()
+    cpu_started = time.thread_time()
+    error = None
+    try:
+        yield handle
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        stack.pop()
+        recorder.record(Span(
+            name=name, kind=kind, started=started,
+            wall=time.perf_counter() - perf_started, cpu=time.thread_time() - cpu_started,
+            rows=handle.rows, peak_rss_mb=peak_rss_mb(), pid=os.getpid(),
+            parent=parent, error=error, attrs=handle.attrs,
+        ))
+
+
+def instrumented(name: Optional[str] = None, kind: str = KIND_IO, rows: Optional[Callable[[Any], Optional[int]]] = None):
+    """
+    関数の呼び出しを span で囲むデコレーター。
+
+    引数:
+        - name: 区間の名前（省略時は関数名）
+        - kind: 区間の種類
+        - rows: 戻り値から処理件数を求める関数（例: len）
+    """
+
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _ACTIVE is None:
+                return func(*args, **kwargs)
+            with span(span_name, kind) as handle:
+                result = func(*args, **kwargs)
+                if rows is not None and result is not None:
+                    handle.rows = rows(result)
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def capture_spans() -> Iterator[List[Span]]:
+    """
+    with 文の中で計測した区間をリストに集める（ワーカープロセスで計測し、結果と一緒に親プロセスへ返すため）。
+    集めた区間は record_spans で記録中の実行に加える。
+    """
+    spans: List[Span] = []
+    recorder = RunRecorder()
+    previous = _activate(recorder)
+    try:
+        yield spans
+    finally:
+        _activate(previous)
+        spans.extend(recorder.spans)
+
+
+def record_spans(spans: List[Span]) -> None:
+    """
+    capture_spans で集めた区間を記録中の実行に加える（記録中でなければ何もしない）。
+    外側の区間がない区間は、呼び出し時点で実行中の区間の内側として記録する。
+    """
+    recorder = _ACTIVE
+    if recorder is None or not spans:
+        return
+    stack = recorder._stack()
+    if stack:
+        for captured in spans:
+            if captured.parent is None:
+                captured.parent = stack[-1]
+    recorder.extend(spans)
+
+
+def resolve_profile_mode(mode: Optional[str] = None) -> Optional[str]:
+    """
+    プロファイラーの種類を決める。引数 → 環境変数 PIPELINE_PROFILE の順で優先し、空なら None（プロファイルしない）。
+
+    例外:
+        - ValueError: 対応していない種類が指定された場合
+    """
+    mode = (mode if mode is not None else os.getenv("PIPELINE_PROFILE", "")).strip().lower()
+    if not mode or mode in ("0", "off", "none"):
+        return None
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"プロファイラーの指定が不正です: {mode}（{' / '.join(PROFILE_MODES)}）")
+    return mode
+
+
+class _Profiler:
+    """
+    実行全体のプロファイル（呼び出したスレッドのみ）。pyinstrument がない場合は cProfile を使う。
+    """
+
+    def __init__(self, mode: str):
+        if mode == PROFILE_PYINSTRUMENT:
+            try:
+                import pyinstrument  # noqa: F401
+            except ImportError:
+                logger.warning("pyinstrument がインストールされていないため cProfile でプロファイルします")
+                mode = PROFILE_CPROFILE
+        self.mode = mode
+        if mode == PROFILE_PYINSTRUMENT:
+            from pyinstrument import Profiler
+
+            self._profiler = Profiler()
+        else:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+
+    def start(self) -> None:
+        if self.mode == PROFILE_PYINSTRUMENT:
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self, output_dir: Optional[str]) -> Optional[str]:
+        """
+        プロファイルを止めて output_dir に保存し、保存先のパスを返す（output_dir が None なら保存しない）。
+        cProfile は run_profile.prof（pstats 形式）と、累積時間の上位を並べた run_profile.txt を保存する。
+        """
+        if self.mode == PROFILE_PYINSTRUMENT:
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        if not output_dir:
+            return None
+        os.makedirs(output_dir, exist_ok=True)
+        if self.mode == PROFILE_PYINSTRUMENT:
+            path = os.path.join(output_dir, "run_profile.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self._profiler.output_html())
+            return path
+        import io
+        import pstats
+
+        path = os.path.join(output_dir, "run_profile.prof")
+        self._profiler.dump_stats(path)
+        text = io.StringIO()
+        pstats.Stats(self._profiler, stream=text).sort_stats("cumulative").print_stats(40)
+        with open(os.path.join(output_dir, "run_profile.txt"), "w", encoding="utf-8") as f:
+            f.write(text.getvalue())
+        return path
+
+
+@contextmanager
+def run_recording(report_dir: Optional[str], profile: Optional[str] = None, **meta: Any) -> Iterator[RunRecorder]:
+    """
+    with 文の中の実行を記録し、終了時に report_dir へ run_report.json を書き出す
+    （環境変数 RUN_REPORT=0 の場合、または report_dir が None の場合は書き出さない）。
+    中止・エラーで終わった場合も、それまでの区間をレポートに残す。
+
+    引数:
+        - report_dir: レポートとプロファイルの保存先フォルダ（通常は競技プログラムの出力先）
+        - profile: プロファイラーの種類（省略時は環境変数 PIPELINE_PROFILE）
+        - meta: レポートに記録する実行条件（モード・ワーカー数など）
+    """
+    from module.progress import PipelineCancelled
+
+    profile_mode = resolve_profile_mode(profile)
+    profiler = _Profiler(profile_mode) if profile_mode else None
+    recorder = RunRecorder()
+    previous = _activate(recorder)
+    status = "ok"
+    if profiler:
+        profiler.start()
+    try:
+        yield recorder
+    except PipelineCancelled:
+        status = "cancelled"
+        raise
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        _activate(previous)
+        try:
+            if profiler:
+                profile_path = profiler.stop(report_dir)
+                meta["profile"] = profile_path
+                logger.info(f"プロファイル（{profiler.mode}）を保存しました: {profile_path}")
+            if report_dir and os.getenv("RUN_REPORT", "1") != "0":
+                path = recorder.write_report(os.path.join(report_dir, RUN_REPORT_FILE), status, **meta)
+                logger.info(f"実行レポートを保存しました: {path}")
+        except Exception as e:
+            # 計測結果の保存に失敗しても処理結果には影響させない
+            logger.warning(f"実行レポートを保存できませんでした: {report_dir} - {e}")
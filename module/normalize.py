@@ -0,0 +1,97 @@
+# normalize.py
+# 役割: 氏名・フリガナ・学校名などの文字列の正規化（全角スペース → 半角、全角カタカナ → 半角）を一か所にまとめる。
+#       同じ学校名やフリガナは名簿・結合・Excel書き出しの各工程で何千回も現れるため、
+#       正規化の結果を上限付きの LRU キャッシュに保持し、sys.intern で同じ文字列は1つのオブジェクトを共有する。
+# 変数:
+#   - NORMALIZE_CACHE_SIZE: 正規化の種類ごとに保持する文字列の最大件数（環境変数で変更可）
+#   - CacheStats: キャッシュのヒット数・ミス数・保持件数（実行結果のまとめに表示する）
+
+import os
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+
+NORMALIZE_CACHE_SIZE = int(os.getenv("NORMALIZE_CACHE_SIZE", "65536"))
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """
+    正規化キャッシュの利用状況（全種類の合計）。
+    """
+    hits: int
+    misses: int
+    size: int
+    maxsize: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __str__(self) -> str:
+        return f"ヒット率 {self.hit_rate:.1%}（ヒット {self.hits}件 / ミス {self.misses}件、保持 {self.size}件 / 上限 {self.maxsize}件）"
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _intern(text: str) -> str:
+    return sys.intern(text)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_space(text: str) -> str:
+    return sys.intern(text.replace("\u3000", " "))
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def _normalize_kana(text: str) -> str:
+    import jaconv
+
+    text = text.replace("\u3000", " ")  # 全角スペースを半角スペースに変換
+    return sys.intern(jaconv.z2h(text, kana=True, digit=False, ascii=False))  # 全角カタカナを半角に変換
+
+
+_CACHES = (_intern, _normalize_space, _normalize_kana)
+
+
+def intern_text(text):
+    """
+    文字列を正規化せずに共有する（同じ値の文字列は同じオブジェクトを返す）。文字列以外はそのまま返す。
+    """
+    return _intern(text) if type(text) is str else text
+
+
+def normalize_space(text):
+    """
+    全角スペースを半角スペースに変換する（フリガナの区切りなど）。文字列以外はそのまま返す。
+    """
+    return _normalize_space(text) if type(text) is str else text
+
+
+def normalize_kana(text):
+    """
+    全角スペースを半角スペースに、全角カタカナを半角カタカナに変換する（数字・英字は変換しない）。
+    文字列以外はそのまま返す。
+    """
+    return _normalize_kana(text) if type(text) is str else text
+
+
+def cache_stats() -> CacheStats:
+    """
+    正規化キャッシュのヒット数・ミス数・保持件数の合計を返す（プロセスごとに集計される）。
+    """
+    infos = [cache.cache_info() for cache in _CACHES]
+    return CacheStats(
+        hits=sum(info.hits for info in infos),
+        misses=sum(info.misses for info in infos),
+        size=sum(info.currsize for info in infos),
+        maxsize=sum(info.maxsize for info in infos),
+    )
+
+
+def clear_cache() -> None:
+    """
+    正規化キャッシュと集計を消去する。
+    """
+    for cache in _CACHES:
+        cache.cache_clear()
@@ -0,0 +1,94 @@
+# parallel.py
+# 役割: 互いに独立したイベント単位の処理を、プロセスプールで並列に実行する。
+# 変数:
+#   - workers: 並列実行するプロセス数（1以下なら直列実行）
+#   - jobs: 実行する処理の引数のリスト
+#   - HEAT_SHEET_WORKERS: ワーカー数を指定する環境変数（"auto" または 0 でCPU数）
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Optional, Sequence, Tuple, TypeVar, Union
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+J = TypeVar("J")
+R = TypeVar("R")
+
+
+def resolve_worker_count(workers: Optional[Union[int, str]] = None) -> int:
+    """
+    ワーカー数を決定する。引数 → 環境変数 HEAT_SHEET_WORKERS → 1（直列）の順で優先する。
+    "auto" または 0 を指定した場合はCPU数を使う。
+
+    引数:
+        - workers: ワーカー数（int または "auto"）
+
+    戻り値:
+        - 1以上のワーカー数
+
+    例外:
+        - ValueError: 数値として解釈できない値が指定された場合
+    """
+    if workers is None:
+        workers = os.getenv("HEAT_SHEET_WORKERS", "1")
+    if isinstance(workers, str):
+        workers = workers.strip().lower()
+        if workers == "auto":
+            workers = 0
+        else:
+            try:
+                workers = int(workers)
+            except ValueError:
+                raise ValueError(f"ワーカー数の指定が不正です: {workers}")
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+def run_jobs(
+    func: Callable[[J], R],
+    jobs: Sequence[J],
+    workers: int = 1,
+    initializer: Optional[Callable[..., None]] = None,
+    initargs: Iterable = (),
+) -> Iterator[Tuple[J, Optional[R], Optional[BaseException]]]:
+    """
+    jobs の各要素に func を適用し、完了した順に (job, 結果, 例外) を返すジェネレータ。
+    ワーカー数が1以下、またはジョブが1件以下の場合は同じプロセスで順番に実行する。
+    func と jobs はプロセス間で受け渡すため pickle 可能である必要がある。
+
+    引数:
+        - func: 各ジョブに適用する関数（モジュールのトップレベルに定義されたもの）
+        - jobs: ジョブのリスト
+        - workers: ワーカー数
+        - initializer: 各ワーカープロセスの起動時に1回だけ呼ぶ関数
+        - initargs: initializer の引数
+
+    戻り値:
+        - (job, 結果, 例外) のイテレータ。成功時は例外がNone、失敗時は結果がNone
+          （途中で close した場合、並列実行中の未着手のジョブは実行しない）
+    """
+    if workers <= 1 or len(jobs) <= 1:
+        for job in jobs:
+            try:
+                yield job, func(job), None
+            except Exception as e:
+                yield job, None, e
+        return
+
+    max_workers = min(workers, len(jobs))
+    logger.info(f"{len(jobs)}件の処理を {max_workers} プロセスで並列実行します")
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=initializer, initargs=tuple(initargs))
+    try:
+        futures = {executor.submit(func, job): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                yield job, future.result(), None
+            except Exception as e:
+                yield job, None, e
+    finally:
+        # 呼び出し側が途中で打ち切った場合（中止の要求など）は、未着手のジョブを取り消して実行中のものだけ待つ
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -5,44 +5,148 @@ import os
 import traceback
 from module.send_message import send_slack_message
 from collections import defaultdict
+from collections.abc import Mapping
 from module.player_data import get_possible_events, COMMON_EVENTS
-from module.calc_time import parse_time_str
+from module.calc_time import parse_times_centis
+import numpy as np
+from module.roster import Roster, EVENT_COLUMNS, SEX_MALE, SEX_FEMALE
+
+def sort_rows_by_event(roster: Roster, stroke: str, distance: int, rows=None) -> np.ndarray:
+    """
+    名簿の中で指定種目にエントリーしている行を、タイム順（早い順）に並べた行番号の配列を返す。
+    同タイムは元の行順を保つ（sorted と同じ安定ソート）。
+
+    引数:
+        - roster: 名簿
+        - stroke, distance: 種目
+        - rows: 対象とする行番号の配列（省略時は全行）
+
+    戻り値:
+        - 行番号の配列（int64）
+    """
+    col = EVENT_COLUMNS.get((stroke, distance))
+    if rows is None:
+        rows = np.arange(len(roster))
+    if col is None:
+        return np.zeros(0, dtype=np.int64)
+    times = roster.centiseconds[rows, col]
+    entered = ~np.isnan(times)
+    rows, times = np.asarray(rows)[entered], times[entered]
+    return rows[np.argsort(times, kind="stable")]
+
 
 def sort_players_by_event(players, stroke: str, distance: int):
     try:
-        def key_func(player):
-            time_str = player.times.get((stroke, distance), "0")
-            return parse_time_str(time_str)
-        valid_players = [p for p in players if p.times.get((stroke, distance), "0") != "0"]
-        sorted_list = sorted(valid_players, key=key_func)
-        return sorted_list
+        if isinstance(players, Roster):
+            return players.views(sort_rows_by_event(players, stroke, distance))
+        # 記録をまとめて数値化し、エントリーのある選手だけを安定ソートする
+        centis = parse_times_centis([p.times.get((stroke, distance), "0") for p in players])
+        entered = np.flatnonzero(~np.isnan(centis))
+        order = entered[np.argsort(centis[entered], kind="stable")]
+        return [players[i] for i in order]
     except Exception as e:
         logging.error(f"sort_players_by_eventでエラー: {e}", exc_info=True)
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"sort_players_by_eventでエラー: {e}\n{traceback.format_exc()}")
         raise
 
 
+def select_category(players, gender: str):
+    """
+    カテゴリ（男子・女子・混合）に該当する選手と、対象となる種目一覧を返す。
+
+    引数:
+        - players: 選手データのリスト
+        - gender: 'male', 'female', 'mixed' のいずれか
+
+    戻り値:
+        - (対象選手のリスト, 泳法 -> [距離一覧] の辞書)
+          players に Roster を渡した場合は、対象選手は行番号の配列になる
+    """
+    if isinstance(players, Roster):
+        rows = np.arange(len(players))
+        if gender.lower() == "male":
+            return rows[players.sex_codes == SEX_MALE], get_possible_events("male")
+        if gender.lower() == "female":
+            return rows[players.sex_codes == SEX_FEMALE], get_possible_events("female")
+        _, events = select_category([], gender)
+        return rows, events
+
+    if gender.lower() == "male":
+        target_players = [p for p in players if p.sex.lower() == "男"]
+        events = get_possible_events("male")
+    elif gender.lower() == "female":
+        target_players = [p for p in players if p.sex.lower() == "女"]
+        events = get_possible_events("female")
+    elif gender.lower() == "mixed":
+        target_players = players
+        mixed_events = dict(COMMON_EVENTS)
+        mixed_events["fr"] = [50, 100, 200, 400, 800, 1500]
+        events = mixed_events
+    else:
+        raise ValueError(f"Invalid gender: {gender}")
+    return target_players, events
+
+
+class LazyEventMap(Mapping):
+    """
+    (泳法, 距離) -> タイム順の選手リスト を返す読み取り専用のマッピング。
+    各種目のソートは初めて参照されたときに1回だけ行い、結果を保持する。
+    Roster を渡した場合は Roster.version が変わった時点で保持した結果を破棄する。
+    """
+
+    def __init__(self, players, gender: str):
+        self._players = players
+        self._targets, events = select_category(players, gender)
+        self._keys = [(stroke, dist) for stroke, distances in events.items() for dist in distances]
+        self._key_set = set(self._keys)
+        self._sorted = {}
+        self._version = players.version if isinstance(players, Roster) else None
+
+    def _sort(self, stroke: str, distance: int):
+        if isinstance(self._players, Roster):
+            return self._players.views(sort_rows_by_event(self._players, stroke, distance, self._targets))
+        return sort_players_by_event(self._targets, stroke, distance)
+
+    def __getitem__(self, event):
+        if event not in self._key_set:
+            raise KeyError(event)
+        if self._version is not None and self._version != self._players.version:
+            self._sorted.clear()
+            self._version = self._players.version
+        if event not in self._sorted:
+            self._sorted[event] = self._sort(*event)
+        return self._sorted[event]
+
+    def __iter__(self):
+        return iter(self._keys)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, event) -> bool:
+        return event in self._key_set
+
+    def __repr__(self) -> str:
+        return f"LazyEventMap({len(self._keys)}種目, ソート済み {len(self._sorted)}種目)"
+
+
 def group_and_sort_all_events(players, gender: str):
+    """
+    カテゴリの全種目について、タイム順の選手リストを参照できるマッピングを返す。
+    ソートは種目ごとに初めて参照されたときに行う。
+
+    引数:
+        - players: 選手データのリスト、または Roster
+        - gender: 'male', 'female', 'mixed' のいずれか
+
+    戻り値:
+        - LazyEventMap（(泳法, 距離) -> タイム順の選手リスト）
+
+    例外:
+        - ValueError: カテゴリが正しくない場合
+    """
     try:
-        if gender.lower() == "male":
-            target_players = [p for p in players if p.sex.lower() == "男"]
-            events = get_possible_events("male")
-        elif gender.lower() == "female":
-            target_players = [p for p in players if p.sex.lower() == "女"]
-            events = get_possible_events("female")
-        elif gender.lower() == "mixed":
-            target_players = players
-            mixed_events = dict(COMMON_EVENTS)
-            mixed_events["fr"] = [50, 100, 200, 400, 800, 1500]
-            events = mixed_events
-        else:
-            raise ValueError(f"Invalid gender: {gender}")
-        result = {}
-        for stroke, distances in events.items():
-            for dist in distances:
-                sorted_players = sort_players_by_event(target_players, stroke, dist)
-                result[(stroke, dist)] = sorted_players
-        return result
+        return LazyEventMap(players, gender)
     except Exception as e:
         logging.error(f"group_and_sort_all_eventsでエラー: {e}", exc_info=True)
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"group_and_sort_all_eventsでエラー: {e}\n{traceback.format_exc()}")
@@ -10,16 +10,17 @@ import traceback
 from module.send_message import send_slack_message
 from module.player_data import PlayerData
 from module.event_utils import EVENT_NAMES, parse_event_name
+from module.normalize import intern_text, normalize_space
 
 def create_player_from_row(row: list[str]) -> PlayerData:
     try:
         player = PlayerData(
             id=row[-1],
             name=row[1],
-            hurigana=row[2].replace("\u3000", " "),
-            team=row[3],
-            grade=row[4],
-            sex=row[5]
+            hurigana=normalize_space(row[2]),
+            team=intern_text(row[3]),
+            grade=intern_text(row[4]),
+            sex=intern_text(row[5])
         )
         for col_idx, ev_name in enumerate(EVENT_NAMES, start=6):
             if col_idx >= len(row):
@@ -0,0 +1,187 @@
+# progress.py
+# 役割: パイプライン（Excel→CSV変換・結合・種目別Excel書き込み・選手情報補完）の進捗を
+#       工程・ファイル・種目の件数と経過時間として通知する。GUI 等はコールバックで ProgressEvent を受け取る。
+#       Qt には依存しない（GUI 側の橋渡しは GUI/utils/progress_bridge.py）。
+# 変数:
+#   - STAGE_WEIGHTS: 工程名 -> 全体の進捗に占める重み
+#   - STAGE_LABELS: 工程名 -> 表示名
+#   - ProgressCallback: ProgressEvent を受け取るコールバック
+#   - cancel_event: 中止の要求（threading.Event）。各工程はファイル・種目の区切りで checkpoint を呼んで確認する
+
+import time
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+STAGE_EXCEL_TO_CSV = "excel_to_csv"
+STAGE_MERGE = "merge"
+STAGE_WRITE = "write"
+STAGE_FILL = "fill"
+
+# 合成データでの実測の比率をもとにした、全体の進捗に占める各工程の重み
+STAGE_WEIGHTS: Dict[str, float] = {
+    STAGE_EXCEL_TO_CSV: 0.3,
+    STAGE_MERGE: 0.1,
+    STAGE_WRITE: 0.5,
+    STAGE_FILL: 0.1,
+}
+
+STAGE_LABELS: Dict[str, str] = {
+    STAGE_EXCEL_TO_CSV: "エントリーシートの変換",
+    STAGE_MERGE: "データの結合",
+    STAGE_WRITE: "競技プログラムの書き込み",
+    STAGE_FILL: "選手情報の補完",
+}
+
+
+@dataclass(frozen=True)
+class ProgressEvent:
+    """
+    進捗の通知1回分。
+
+    属性:
+        - stage: 工程名（STAGE_WEIGHTS のキー）
+        - done / total: 工程内で完了した件数と全件数（ファイル数・種目数）
+        - item: 直前に完了したファイル名・種目名（工程の開始・終了時は None）
+        - fraction: 全体の進捗（0.0～1.0）
+        - elapsed: 処理開始からの経過秒数
+        - stage_elapsed: 工程開始からの経過秒数
+        - eta: 残り時間の見込み（秒、見積もれない場合は None）
+        - finished: 工程の終了時の通知ならTrue
+    """
+    stage: str
+    done: int
+    total: int
+    item: Optional[str]
+    fraction: float
+    elapsed: float
+    stage_elapsed: float
+    eta: Optional[float]
+    finished: bool = False
+
+    @property
+    def label(self) -> str:
+        return STAGE_LABELS.get(self.stage, self.stage)
+
+
+ProgressCallback = Callable[[ProgressEvent], None]
+
+
+class PipelineCancelled(BaseException):
+    """
+    中止の要求を受けて処理を打ち切ったことを表す。
+    各工程の `except Exception` で握りつぶされずに呼び出し元まで届くよう、BaseException を継承する。
+    """
+
+    def __init__(self, message: str = "処理が中止されました"):
+        super().__init__(message)
+
+
+class ProgressReporter:
+    """
+    工程ごとの件数から全体の進捗と残り時間を計算し、コールバックへ通知する。
+    工程は start_stage → advance（1件ごと）→ finish_stage の順に呼ぶ。複数スレッドから呼んでもよい。
+    cancel_event を指定した場合、checkpoint でその要求を確認して処理を打ち切る。
+    """
+
+    def __init__(self, callback: Optional[ProgressCallback] = None, stages: Optional[Sequence[str]] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        stages = list(stages or STAGE_WEIGHTS)
+        total_weight = sum(STAGE_WEIGHTS.get(stage, 0.0) for stage in stages) or 1.0
+        self.weights: Dict[str, float] = {stage: STAGE_WEIGHTS.get(stage, 0.0) / total_weight for stage in stages}
+        self.timings: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._completed_weight = 0.0
+        self._stage: Optional[str] = None
+        self._stage_started = self._started
+        self._done = 0
+        self._total = 0
+
+    def _emit(self, item: Optional[str] = None, finished: bool = False) -> None:
+        now = time.perf_counter()
+        weight = self.weights.get(self._stage, 0.0)
+        within = self._done / self._total if self._total else (1.0 if finished else 0.0)
+        fraction = min(1.0, self._completed_weight + weight * within)
+        elapsed = now - self._started
+        eta = elapsed * (1.0 - fraction) / fraction if fraction > 0 else None
+        event = ProgressEvent(self._stage, self._done, self._total, item, fraction, elapsed, now - self._stage_started, eta, finished)
+        if self.callback is not None:
+            try:
+                self.callback(event)
+            except Exception as e:
+                # 表示側の不具合で処理を止めない
+                logger.warning(f"進捗の通知に失敗しました: {e}")
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event is not None and self.cancel_event.is_set()
+
+    def checkpoint(self) -> None:
+        """
+        中止が要求されていれば PipelineCancelled を送出する（ファイル・種目の区切りで呼ぶ）。
+
+        例外:
+            - PipelineCancelled: 中止が要求されている場合
+        """
+        if self.cancelled:
+            logger.warning(f"中止の要求により処理を打ち切ります（{STAGE_LABELS.get(self._stage, self._stage)}）")
+            raise PipelineCancelled()
+
+    def start_stage(self, stage: str, total: int) -> None:
+        """
+        工程を開始する（total はその工程で処理するファイル数・種目数）。
+        """
+        with self._lock:
+            self._stage = stage
+            self._stage_started = time.perf_counter()
+            self._done = 0
+            self._total = max(0, int(total))
+            self._emit()
+
+    def set_total(self, total: int) -> None:
+        """
+        工程の件数を後から確定・変更する。
+        """
+        with self._lock:
+            self._total = max(0, int(total))
+            self._emit()
+
+    def advance(self, item: Optional[str] = None, count: int = 1) -> None:
+        """
+        工程内の1件（ファイル・種目）が完了したことを通知する。
+        """
+        with self._lock:
+            self._done = min(self._done + count, self._total) if self._total else self._done + count
+            self._emit(item)
+
+    def finish_stage(self) -> None:
+        """
+        工程を終了し、経過時間を記録する。
+        """
+        with self._lock:
+            if self._stage is None:
+                return
+            self._done = self._total
+            self._emit(finished=True)
+            elapsed = time.perf_counter() - self._stage_started
+            self.timings[self._stage] = elapsed
+            self._completed_weight += self.weights.get(self._stage, 0.0)
+            logger.info(f"{STAGE_LABELS.get(self._stage, self._stage)}: {self._total}件 {elapsed:.2f}秒")
+            self._stage = None
+
+
+def as_reporter(progress: Union[ProgressReporter, ProgressCallback, None], stages: Optional[Sequence[str]] = None,
+                cancel_event: Optional[threading.Event] = None) -> ProgressReporter:
+    """
+    引数の progress を ProgressReporter にそろえる（None なら通知しない、関数ならコールバックとして使う）。
+    各工程の main 関数はこれを使い、呼び出し元から渡された ProgressReporter があればそのまま共有する。
+    """
+    if isinstance(progress, ProgressReporter):
+        return progress
+    return ProgressReporter(progress, stages, cancel_event)
@@ -0,0 +1,457 @@
+# roster.py
+# 役割: 結合CSVの選手データを列指向（NumPy配列）で保持する。
+#       選手ごとの PlayerData（全種目分の times 辞書）を作らず、タイムは構築時に1回だけ
+#       解析して 選手数 × 種目数 の float32 行列（センチ秒、未エントリーは NaN）にまとめて持つ。
+#       既存の呼び出し側には PlayerData 互換の PlayerView を返す。
+# 変数:
+#   - ROSTER_EVENTS: 行列の列順に対応する (泳法, 距離) のリスト
+#   - ids: 選手ID（int64、整数として解釈できないIDは -1）
+#   - MAX_ID_TABLE_SIZE: 整数ID -> 行番号 の配列表を作る最大サイズ（これを超える場合は辞書で引く）
+#   - centiseconds: 選手数 × 種目数 のタイム（センチ秒）行列
+#   - records: (行, 列) -> CSVに書かれていたタイム文字列（エントリーがある所だけ）
+#   - version: 内容を変更するたびに増えるカウンタ
+
+import os
+import re
+import sys
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from module.calc_time import parse_times_centis
+from module.event_utils import EVENT_NAMES, parse_event_name
+from module.normalize import intern_text, normalize_space
+from module.player_data import COMMON_EVENTS, FREESTYLE_EVENTS, get_possible_events
+from module.send_message import send_slack_message
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 男女いずれかで実施される全種目（混合カテゴリの種目と同じ並び）
+ROSTER_EVENTS: List[Tuple[str, int]] = [
+    (stroke, dist) for stroke, distances in COMMON_EVENTS.items() for dist in distances
+] + [("fr", dist) for dist in sorted(set(FREESTYLE_EVENTS["male"]) | set(FREESTYLE_EVENTS["female"]))]
+EVENT_COLUMNS: Dict[Tuple[str, int], int] = {event: col for col, event in enumerate(ROSTER_EVENTS)}
+
+# CSVの種目列（7列目以降）→ 行列の列番号
+_CSV_EVENT_COLUMNS: List[int] = [EVENT_COLUMNS[parse_event_name(name)] for name in EVENT_NAMES]
+
+# 性別コード（select_category と同じく "男" / "女" で判定する）
+SEX_OTHER, SEX_MALE, SEX_FEMALE = 0, 1, 2
+_SEX_CODES = {"男": SEX_MALE, "女": SEX_FEMALE}
+
+# 整数ID -> 行番号 の配列表は「最大ID + 1」要素になるため、IDがまばらな場合は作らない
+MAX_ID_TABLE_SIZE = 1_000_000
+
+# 10進の正規表記（"0" 以外は先頭が "0" でない）で int64 に収まる桁数
+_MAX_ID_DIGITS = 18
+
+
+def _warn_duplicate_ids(duplicates: Iterable) -> None:
+    """
+    複数の行にある選手IDを警告する（該当なしとして扱うため、組表には書き込まれない）。
+    """
+    labels = sorted(str(v) for v in duplicates)
+    if labels:
+        message = f"同じ選手IDが複数の行にあるため、該当なしとして扱います: {', '.join(labels)}"
+        logger.warning(message)
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), message)
+
+
+_INT_RE = re.compile(r"[+-]?\d+")
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+def _infer_column_values(labels: Sequence[str]) -> List:
+    """
+    列の値（文字列）を、列全体が整数なら int、小数を含む数値なら float に変換する（空欄は None）。
+    数値として読めない値が1つでもあれば、列の値を文字列のまま返す。
+    """
+    values = [label.strip() for label in labels]
+    filled = [value for value in values if value]
+    if not filled:
+        return list(labels)
+    if all(_INT_RE.fullmatch(value) for value in filled):
+        return [int(value) if value else None for value in values]
+    if all(_FLOAT_RE.fullmatch(value) for value in filled):
+        return [float(value) if value else None for value in values]
+    return list(labels)
+
+
+class _Categorical:
+    """
+    値の種類が少ない文字列列（学校名・学年・性別）を、整数コードと値の一覧で保持する。
+    """
+
+    def __init__(self, values: Iterable[str]):
+        self.labels: List[str] = []
+        lookup: Dict[str, int] = {}
+        codes = []
+        for value in values:
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(self.labels)
+                self.labels.append(sys.intern(value))
+            codes.append(code)
+        self.codes = np.asarray(codes, dtype=np.int32)
+
+    def __getitem__(self, row: int) -> str:
+        return self.labels[self.codes[row]]
+
+    def take(self, rows: np.ndarray, typed: bool = False) -> np.ndarray:
+        """
+        指定した行の値をまとめて返す（object配列）。
+        typed がTrueの場合は typed_labels の値（数値の列は数値）を返す。
+        """
+        labels = self.typed_labels() if typed else self.labels
+        return np.array(labels, dtype=object)[self.codes[rows]] if len(rows) else np.empty(0, dtype=object)
+
+    def typed_labels(self) -> List:
+        """
+        pd.read_csv の列の型の推定と同じく、空欄以外の値がすべて整数（または小数）として読める列は
+        数値にした値の一覧を返す（空欄は None）。それ以外の列は文字列のまま返す。初回だけ作成する。
+        """
+        typed = self.__dict__.get("_typed")
+        if typed is None:
+            typed = self._typed = _infer_column_values(self.labels)
+        return typed
+
+    @property
+    def nbytes(self) -> int:
+        return self.codes.nbytes + sum(sys.getsizeof(label) for label in self.labels)
+
+
+class PlayerView:
+    """
+    Roster の1行を PlayerData と同じ属性名で参照するための軽量なビュー。
+    値は Roster 側に1つだけ持つため、ビューを作り直しても内容は共有される。
+    """
+
+    __slots__ = ("roster", "row")
+
+    def __init__(self, roster: "Roster", row: int):
+        self.roster = roster
+        self.row = row
+
+    @property
+    def id(self) -> str:
+        return self.roster.id_label(self.row)
+
+    @property
+    def name(self) -> str:
+        return self.roster.names[self.row]
+
+    @property
+    def hurigana(self) -> str:
+        # 名簿はCSVのままのフリガナを持ち、PlayerData と同じく全角スペースを半角にして返す
+        return normalize_space(self.roster.huriganas[self.row])
+
+    @property
+    def team(self) -> str:
+        return self.roster.teams[self.row]
+
+    @property
+    def grade(self) -> str:
+        return self.roster.grades[self.row]
+
+    @property
+    def sex(self) -> str:
+        return self.roster.sexes[self.row]
+
+    @property
+    def times(self) -> Dict[Tuple[str, int], str]:
+        """
+        PlayerData.times と同じく、性別で実施される全種目の (泳法, 距離) -> 記録 を返す。
+        エントリーのない種目は "0" になる。参照のたびに作成するため、書き換えは set_time を使う。
+        """
+        roster = self.roster
+        return {
+            (stroke, dist): roster.record(self.row, (stroke, dist))
+            for stroke, distances in get_possible_events(self.sex.lower()).items()
+            for dist in distances
+        }
+
+    def set_time(self, stroke: str, distance: int, record: str) -> None:
+        """
+        PlayerData.set_time と同じく、選手の種目にタイムを登録する。
+        """
+        if (stroke, distance) not in self.times:
+            raise ValueError(f"この選手の種目に存在しない (泳法: {stroke}, 距離: {distance}) です。")
+        self.roster.set_time(self.row, (stroke, distance), record)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, PlayerView) and self.roster is other.roster and self.row == other.row
+
+    def __hash__(self) -> int:
+        return hash((id(self.roster), self.row))
+
+    def __repr__(self) -> str:
+        return f"PlayerView(id={self.id!r}, name={self.name!r}, team={self.team!r}, grade={self.grade!r}, sex={self.sex!r})"
+
+
+class Roster:
+    """
+    全選手の情報を列ごとの配列で保持する名簿。
+    タイムは float32 のセンチ秒（整数値なので誤差なく比較できる）で持つため、
+    種目ごとの絞り込みと並べ替えを配列演算で行える。
+    """
+
+    def __init__(
+        self,
+        id_labels: Sequence[str],
+        names: Sequence[str],
+        huriganas: Sequence[str],
+        teams: Sequence[str],
+        grades: Sequence[str],
+        sexes: Sequence[str],
+        records: Dict[Tuple[int, int], str],
+    ):
+        count = len(id_labels)
+        self.names = np.array([sys.intern(v) for v in names], dtype=object)
+        self.huriganas = np.array([sys.intern(v) for v in huriganas], dtype=object)
+        self.teams = _Categorical(teams)
+        self.grades = _Categorical(grades)
+        self.sexes = _Categorical(sexes)
+        self.sex_codes = np.array([_SEX_CODES.get(label.lower(), SEX_OTHER) for label in self.sexes.labels], dtype=np.int8)[self.sexes.codes] \
+            if count else np.zeros(0, dtype=np.int8)
+
+        # 整数IDとして往復できる場合は元の文字列を持たない
+        self.ids = np.full(count, -1, dtype=np.int64)
+        labels_needed = False
+        for row, label in enumerate(id_labels):
+            try:
+                value = int(label)
+            except (TypeError, ValueError):
+                labels_needed = True
+                continue
+            self.ids[row] = value
+            if str(value) != label:
+                labels_needed = True
+        self._id_labels = np.array([sys.intern(str(v)) for v in id_labels], dtype=object) if labels_needed else None
+        self._row_by_id: Optional[Dict[str, int]] = None
+        self._row_by_int_id: Optional[np.ndarray] = None
+
+        # タイムはまとめて1回だけ解析する（解釈できない記録があれば ValueError）
+        self.centiseconds = np.full((count, len(ROSTER_EVENTS)), np.nan, dtype=np.float32)
+        cells = list(records)
+        if cells:
+            centis = parse_times_centis(records.values())
+            rows, cols = np.array(cells, dtype=np.int64).T
+            self.centiseconds[rows, cols] = centis
+            entered = ~np.isnan(centis)
+            self.records = {cell: sys.intern(records[cell]) for cell, ok in zip(cells, entered) if ok}
+        else:
+            self.records = {}
+        self.version = 0
+
+    # --- 構築 ---
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Sequence[str]]) -> "Roster":
+        """
+        結合CSVのデータ行（ヘッダーを除く）から名簿を作成する。
+        列の解釈は create_player_from_row と同じ（IDは最終列、7列目以降が EVENT_NAMES の順の種目）。
+        列数が足りない行は警告を出して読み飛ばす。
+
+        引数:
+            - rows: CSVのデータ行
+
+        戻り値:
+            - Roster
+
+        例外:
+            - ValueError: タイムを解釈できない場合
+        """
+        columns: Tuple[List[str], ...] = ([], [], [], [], [], [])
+        records: Dict[Tuple[int, int], str] = {}
+        for row in rows:
+            try:
+                values = (row[-1], row[1], row[2], intern_text(row[3]), intern_text(row[4]), intern_text(row[5]))
+            except IndexError:
+                logger.warning(f"列数が足りない行を読み飛ばしました: {row}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"列数が足りない行を読み飛ばしました: {row}")
+                continue
+            index = len(columns[0])
+            for column, value in zip(columns, values):
+                column.append(value)
+            for col_idx, event_col in enumerate(_CSV_EVENT_COLUMNS, start=6):
+                if col_idx >= len(row):
+                    break
+                record = row[col_idx].strip()
+                if record:
+                    records[(index, event_col)] = record
+        return cls(*columns, records=records)
+
+    @classmethod
+    def from_players(cls, players: Iterable) -> "Roster":
+        """
+        PlayerData（または互換オブジェクト）のリストから名簿を作成する。
+        """
+        columns: Tuple[List[str], ...] = ([], [], [], [], [], [])
+        records: Dict[Tuple[int, int], str] = {}
+        for index, player in enumerate(players):
+            for column, value in zip(columns, (player.id, player.name, player.hurigana, player.team, player.grade, player.sex)):
+                column.append(value)
+            for event, record in player.times.items():
+                if record != "0" and event in EVENT_COLUMNS:
+                    records[(index, EVENT_COLUMNS[event])] = record
+        return cls(*columns, records=records)
+
+    def __getstate__(self) -> dict:
+        # ID -> 行番号 の辞書と配列表は必要になったときに作り直せるため保存しない
+        state = self.__dict__.copy()
+        state["_row_by_id"] = None
+        state["_row_by_int_id"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        state.setdefault("_row_by_int_id", None)
+        self.__dict__.update(state)
+
+    # --- 参照 ---
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def id_label(self, row: int) -> str:
+        """
+        行の選手IDを CSV に書かれていた文字列のまま返す。
+        """
+        if self._id_labels is not None:
+            return self._id_labels[row]
+        return str(self.ids[row])
+
+    def find(self, player_id: Optional[str]) -> Optional[int]:
+        """
+        選手IDから行番号を返す。該当する選手がいない場合は None を返す。
+        空のIDと、同じIDが複数の行にある場合は、どの選手か決められないため該当なしとする。
+        """
+        if self._row_by_id is None:
+            rows: Dict[str, int] = {}
+            duplicates = set()
+            for row in range(len(self)):
+                label = self.id_label(row)
+                if not label:
+                    continue  # 空のIDは警告せずに該当なしとする
+                if label in rows:
+                    duplicates.add(label)
+                rows[label] = row
+            for label in duplicates:
+                del rows[label]
+            _warn_duplicate_ids(duplicates)
+            self._row_by_id = rows
+        return self._row_by_id.get(player_id)
+
+    def _int_id_table(self) -> Optional[np.ndarray]:
+        """
+        整数ID -> 行番号 の配列表（該当なしは -1）を返す。初回だけ作成する。
+        IDがすべて0以上の整数で、最大IDが MAX_ID_TABLE_SIZE 未満の場合だけ作り、それ以外は None を返す。
+        """
+        if self._row_by_int_id is None:
+            count = len(self)
+            if self._id_labels is not None or count == 0 or self.ids.min() < 0 or self.ids.max() >= MAX_ID_TABLE_SIZE:
+                return None
+            table = np.full(int(self.ids.max()) + 1, -1, dtype=np.int64)
+            # 同じIDが複数ある場合は find と同じく該当なし（-1）のままにする
+            unique_ids, first_rows, counts = np.unique(self.ids, return_index=True, return_counts=True)
+            unique = counts == 1
+            table[unique_ids[unique]] = first_rows[unique]
+            _warn_duplicate_ids(unique_ids[~unique].tolist())
+            self._row_by_int_id = table
+        return self._row_by_int_id
+
+    def find_rows(self, player_ids: Sequence[Optional[str]]) -> np.ndarray:
+        """
+        選手IDのリストから行番号をまとめて返す。該当する選手がいないIDは -1 になる。
+        IDの照合は find と同じく文字列として行う（"007" と "7" は別のID、文字列以外・空のID・重複したIDは該当なし）。
+
+        引数:
+            - player_ids: 選手IDのリスト（組表1枚分など）
+
+        戻り値:
+            - 行番号の int64 配列（player_ids と同じ並び）
+        """
+        rows = np.full(len(player_ids), -1, dtype=np.int64)
+        table = self._int_id_table() if len(player_ids) else None
+        if table is None:
+            for i, player_id in enumerate(player_ids):
+                row = self.find(player_id) if isinstance(player_id, str) else None
+                if row is not None:
+                    rows[i] = row
+            return rows
+
+        # 文字コードの行列にして、ASCII数字だけの正規表記（先頭0なし）のIDを一度に整数へ変換する
+        keys = np.array([v if isinstance(v, str) else "" for v in player_ids], dtype=str)
+        width = keys.dtype.itemsize // 4
+        codes = keys.view(np.uint32).reshape(len(keys), width)
+        is_digit = (codes >= 48) & (codes <= 57)
+        padding = codes == 0
+        lengths = np.where(padding.any(axis=1), padding.argmax(axis=1), width)
+        n_digits = np.count_nonzero(is_digit, axis=1)
+        valid = (n_digits == lengths) & (lengths > 0) & (lengths <= _MAX_ID_DIGITS) & ((codes[:, 0] != 48) | (lengths == 1))
+        if not valid.any():
+            return rows
+        # 桁ごとに上の桁から積み上げて整数にする
+        digits = codes[valid, :min(width, _MAX_ID_DIGITS)].astype(np.int64) - 48
+        values = np.zeros(len(digits), dtype=np.int64)
+        for col in range(digits.shape[1]):
+            in_label = digits[:, col] >= 0
+            values[in_label] = values[in_label] * 10 + digits[in_label, col]
+        in_range = values < len(table)
+        found = np.flatnonzero(valid)[in_range]
+        rows[found] = table[values[in_range]]
+        return rows
+
+    def record(self, row: int, event: Tuple[str, int]) -> str:
+        """
+        行の指定種目のタイム文字列を返す。エントリーがない場合は "0" を返す。
+        """
+        col = EVENT_COLUMNS.get(event)
+        if col is None:
+            return "0"
+        return self.records.get((row, col), "0")
+
+    def view(self, row: int) -> PlayerView:
+        return PlayerView(self, row)
+
+    def views(self, rows: Optional[Iterable[int]] = None) -> List[PlayerView]:
+        """
+        指定した行（省略時は全行）の PlayerView を順番どおりに返す。
+        """
+        if rows is None:
+            rows = range(len(self))
+        return [PlayerView(self, int(row)) for row in rows]
+
+    # --- 更新 ---
+
+    def set_time(self, row: int, event: Tuple[str, int], record: str) -> None:
+        """
+        行の指定種目のタイムを登録する（"0" を渡すとエントリーを取り消す）。
+
+        例外:
+            - ValueError: 種目が存在しない場合、またはタイムを解釈できない場合
+        """
+        col = EVENT_COLUMNS.get(event)
+        if col is None:
+            raise ValueError(f"存在しない種目です: {event}")
+        centis = parse_times_centis([record])[0]
+        self.centiseconds[row, col] = centis
+        if np.isnan(centis):
+            self.records.pop((row, col), None)
+        else:
+            self.records[(row, col)] = sys.intern(record.strip())
+        self.version += 1
+
+    # --- 集計 ---
+
+    def nbytes(self) -> int:
+        """
+        配列と文字列が占めるおおよそのバイト数を返す（文字列は重複を除いて数える）。
+        """
+        strings = {id(v): sys.getsizeof(v) for column in (self.names, self.huriganas) for v in column}
+        strings.update({id(v): sys.getsizeof(v) for v in self.records.values()})
+        total = self.ids.nbytes + self.centiseconds.nbytes + self.sex_codes.nbytes + sum(strings.values())
+        total += self.names.nbytes + self.huriganas.nbytes + sys.getsizeof(self.records)
+        total += self.teams.nbytes + self.grades.nbytes + self.sexes.nbytes
+        if self._id_labels is not None:
+            total += self._id_labels.nbytes + sum(sys.getsizeof(v) for v in self._id_labels)
+        return total
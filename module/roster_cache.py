@@ -0,0 +1,178 @@
+# roster_cache.py
+# 役割: 結合CSV（merged_output.csv）から作成した名簿（Roster）をバイナリ（pickle）で
+#       CSVの隣に保存し、CSVが変わっていなければテキストを解析せずに読み込めるようにする。
+# 変数:
+#   - csv_path: 結合CSVのパス
+#   - cache_path: 名簿キャッシュのパス（merged_output.csv → merged_output.roster.pkl）
+#   - ROSTER_CACHE_VERSION: キャッシュ形式の版（Roster の構造を変えたら上げる）
+#   - _HOT_ROSTERS: 結合CSVの絶対パス -> (CSVの内容のSHA-256, 名簿)。同じプロセス内（GUIの常駐サービスなど）で
+#                   名簿をメモリに保持し、同じ内容のCSVが書き直されても解析・読み込みをし直さない
+
+import os
+import pickle
+import hashlib
+import logging
+import traceback
+from typing import Dict, Optional, Tuple
+from module.csv_utils import iter_csv_rows
+from module.roster import Roster
+from module.instrumentation import KIND_IO, instrumented
+from module.send_message import send_slack_message
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+ROSTER_CACHE_SUFFIX = ".roster.pkl"
+ROSTER_CACHE_VERSION = 2
+
+_HOT_ROSTERS: Dict[str, Tuple[str, Roster]] = {}
+
+
+def roster_cache_path(csv_path: str) -> str:
+    """
+    結合CSVに対応する名簿キャッシュのパスを返す。
+    """
+    return os.path.splitext(csv_path)[0] + ROSTER_CACHE_SUFFIX
+
+
+def csv_digest(csv_path: str) -> str:
+    """
+    結合CSVの内容のSHA-256を返す。
+
+    例外:
+        - FileNotFoundError: 結合CSVが存在しない場合
+    """
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remember_roster(roster: Roster, csv_path: str, digest: Optional[str] = None) -> None:
+    """
+    名簿をメモリに保持する（結合CSVごとに最新の1件だけ）。
+    """
+    _HOT_ROSTERS[os.path.abspath(csv_path)] = (digest or csv_digest(csv_path), roster)
+
+
+def hot_roster(csv_path: str, digest: Optional[str] = None) -> Optional[Roster]:
+    """
+    メモリに保持している名簿のうち、結合CSVと内容が同じものを返す（なければ None）。
+    """
+    cached = _HOT_ROSTERS.get(os.path.abspath(csv_path))
+    if cached is None:
+        return None
+    try:
+        digest = digest or csv_digest(csv_path)
+    except FileNotFoundError:
+        return None
+    return cached[1] if cached[0] == digest else None
+
+
+def clear_hot_rosters() -> None:
+    """
+    メモリに保持している名簿を破棄する。
+    """
+    _HOT_ROSTERS.clear()
+
+
+def save_roster_cache(roster: Roster, csv_path: str) -> str:
+    """
+    名簿を結合CSVの隣にキャッシュとして保存する。作成元のCSVの更新時刻とサイズも記録する。
+
+    引数:
+        - roster: 保存する名簿
+        - csv_path: 名簿の作成元の結合CSVのパス
+
+    戻り値:
+        - 保存したキャッシュのパス
+
+    例外:
+        - FileNotFoundError: 結合CSVが存在しない場合
+        - PermissionError: キャッシュを書き込む権限がない場合
+    """
+    stat = os.stat(csv_path)
+    cache_path = roster_cache_path(csv_path)
+    payload = {
+        "version": ROSTER_CACHE_VERSION,
+        "csv_mtime_ns": stat.st_mtime_ns,
+        "csv_size": stat.st_size,
+        "roster": roster,
+    }
+    # 書き込み途中のファイルを読まれないよう、一時ファイルに書いてから置き換える
+    tmp_path = f"{cache_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_roster_cache(csv_path: str) -> Optional[Roster]:
+    """
+    結合CSVに対応する名簿キャッシュを読み込む。同じ内容のCSVの名簿をメモリに保持していればそれを返す。
+    キャッシュがない、形式の版が違う、またはCSVがキャッシュ作成後に変更されている場合は None を返す。
+    キャッシュは自分で作成したファイルだけを対象とする（pickle のため、信頼できないファイルは置かないこと）。
+
+    引数:
+        - csv_path: 結合CSVのパス
+
+    戻り値:
+        - 名簿、使えるキャッシュがない場合は None
+    """
+    roster = hot_roster(csv_path)
+    if roster is not None:
+        logger.info(f"メモリ上の名簿を再利用します: {csv_path} ({len(roster)}名)")
+        return roster
+    cache_path = roster_cache_path(csv_path)
+    try:
+        stat = os.stat(csv_path)
+        if os.stat(cache_path).st_mtime_ns < stat.st_mtime_ns:
+            return None
+        with open(cache_path, "rb") as f:
+            payload = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # 壊れたキャッシュはCSVから作り直せるため、警告だけ出して使わない
+        logger.warning(f"名簿キャッシュを読み込めませんでした: {cache_path} - {e}")
+        return None
+
+    if (
+        not isinstance(payload, dict)
+        or payload.get("version") != ROSTER_CACHE_VERSION
+        or payload.get("csv_mtime_ns") != stat.st_mtime_ns
+        or payload.get("csv_size") != stat.st_size
+    ):
+        return None
+    logger.info(f"名簿キャッシュを読み込みました: {cache_path} ({len(payload['roster'])}名)")
+    remember_roster(payload["roster"], csv_path)
+    return payload["roster"]
+
+
+@instrumented(kind=KIND_IO)
+def write_roster_cache(csv_path: str) -> Optional[str]:
+    """
+    結合CSVを読み込んで名簿を作成し、キャッシュとして保存する。
+    前回と同じ内容のCSVであれば、メモリに保持している名簿を解析し直さずに使う。
+    キャッシュは高速化のためのものなので、作成に失敗しても例外は送出しない。
+
+    引数:
+        - csv_path: 結合CSVのパス
+
+    戻り値:
+        - 保存したキャッシュのパス、失敗した場合は None
+    """
+    try:
+        digest = csv_digest(csv_path)
+        roster = hot_roster(csv_path, digest)
+        if roster is None:
+            roster = Roster.from_rows(iter_csv_rows(csv_path, skip_header=True))
+        cache_path = save_roster_cache(roster, csv_path)
+        remember_roster(roster, csv_path, digest)
+        logger.info(f"名簿キャッシュを保存しました: {cache_path} ({len(roster)}名)")
+        return cache_path
+    except Exception as e:
+        logger.warning(f"名簿キャッシュを保存できませんでした: {csv_path} - {e}")
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"名簿キャッシュを保存できませんでした: {csv_path} - {e}\n{traceback.format_exc()}")
+        return None
@@ -0,0 +1,166 @@
+# seeding.py
+# 役割: 種目の出場者（タイムの早い順）を組とコースに割り当てる（組分け・コース配置）。
+#       割り当ては出場者数だけで決まるため、出場者ごとのループを使わず配列演算でまとめて計算する。
+# 変数:
+#   - LANE_ORDERS: コース数ごとの、組内で速い順に割り当てるコース番号（センターアウト）
+#   - heats: 出場者（早い順の順位）ごとの組番号（0始まり、0 がシートの先頭 = 最も遅い組）
+#   - lanes: 出場者ごとのコース番号（1始まり）
+#   - circle_heats: サークルシーディングを行う最終組からの組数（0 で行わない）
+#   - CIRCLE_SEED_HEATS: circle_heats の既定値を指定する環境変数
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+import numpy as np
+
+# 組内で速い順に割り当てるコース番号（最速が中央、以降は中央から外側へ）
+LANE_ORDERS: Dict[int, Tuple[int, ...]] = {
+    6: (4, 3, 5, 2, 6, 1),
+    8: (4, 5, 3, 6, 2, 7, 1, 8),
+    10: (5, 6, 4, 7, 3, 8, 2, 9, 1, 10),
+}
+DEFAULT_LANES = 6
+
+
+def lane_order(lanes: int = DEFAULT_LANES) -> Tuple[int, ...]:
+    """
+    組内で速い順に割り当てるコース番号を返す。
+
+    例外:
+        - ValueError: 対応していないコース数の場合
+    """
+    try:
+        return LANE_ORDERS[lanes]
+    except KeyError:
+        raise ValueError(f"対応していないコース数です: {lanes}（{', '.join(map(str, LANE_ORDERS))} のいずれか）") from None
+
+
+def resolve_circle_heats(circle_heats: Optional[Union[int, str]] = None) -> int:
+    """
+    サークルシーディングを行う組数を決定する。引数 → 環境変数 CIRCLE_SEED_HEATS → 0（行わない）の順で優先する。
+
+    例外:
+        - ValueError: 0以上の整数として解釈できない値が指定された場合
+    """
+    if circle_heats is None:
+        circle_heats = os.getenv("CIRCLE_SEED_HEATS", "0")
+    try:
+        value = int(circle_heats)
+    except (TypeError, ValueError):
+        raise ValueError(f"サークルシーディングの組数の指定が不正です: {circle_heats}") from None
+    if value < 0:
+        raise ValueError(f"サークルシーディングの組数の指定が不正です: {circle_heats}")
+    return value
+
+
+@dataclass(frozen=True)
+class HeatAssignment:
+    """
+    1種目分の組・コースの割り当て。heats と lanes は出場者の順位（0 が最速）で引く。
+    """
+    heats: np.ndarray
+    lanes: np.ndarray
+    n_heats: int
+    lane_count: int
+
+    def grid(self) -> np.ndarray:
+        """
+        組 × コース の表（値は出場者の順位、空きコースは -1）を返す。
+        行は組（シートの上から）、列はコース1～lane_count の順。
+        """
+        table = np.full((self.n_heats, self.lane_count), -1, dtype=np.int64)
+        table[self.heats, self.lanes - 1] = np.arange(len(self.heats))
+        return table
+
+    def heat_sizes(self) -> np.ndarray:
+        """
+        組ごとの人数を返す。
+        """
+        return np.bincount(self.heats, minlength=self.n_heats)
+
+
+@lru_cache(maxsize=1024)
+def _seed(n_entries: int, lanes: int, circle_heats: int) -> HeatAssignment:
+    order = np.asarray(lane_order(lanes), dtype=np.int64)
+    n_heats = -(-n_entries // lanes)
+    rank = np.arange(n_entries, dtype=np.int64)
+
+    # 遅い順に並べ、端数の組をシートの先頭（最初の組）に置いて、最終組を必ず満員にする
+    offset = (lanes - n_entries % lanes) % lanes
+    slow_index = n_entries - 1 - rank
+    heats = (slow_index + offset) // lanes
+    # 組内の速い順の位置（0 が組内で最速）
+    positions = (heats + 1) * lanes - offset - 1 - slow_index
+
+    # サークルシーディング: 最終組から circle_heats 組（満員の組のみ）に上位選手を順番に振り分ける
+    full_heats = n_heats - (1 if offset else 0)
+    circle = min(circle_heats, full_heats)
+    if circle > 1:
+        top = rank[: circle * lanes]
+        heats[: circle * lanes] = n_heats - 1 - top % circle
+        positions[: circle * lanes] = top // circle
+
+    heats.setflags(write=False)
+    seeded_lanes = order[positions]
+    seeded_lanes.setflags(write=False)
+    return HeatAssignment(heats, seeded_lanes, n_heats, lanes)
+
+
+def seed_heats(n_entries: int, lanes: int = DEFAULT_LANES, circle_heats: int = 0) -> HeatAssignment:
+    """
+    タイムの早い順に並んだ出場者を組とコースに割り当てる。
+    最終組（最も速い組）は必ず満員にし、端数は最初の組に入れる。
+    組内では LANE_ORDERS の順（最速が中央）にコースを割り当てる。
+    割り当ては人数だけで決まるため、同じ条件の結果は再利用する（配列は読み取り専用）。
+
+    引数:
+        - n_entries: 出場者数
+        - lanes: コース数（6, 8, 10）
+        - circle_heats: 最終組から何組をサークルシーディングするか（0 または 1 で行わない）
+
+    戻り値:
+        - HeatAssignment
+
+    例外:
+        - ValueError: 対応していないコース数の場合、または人数・組数が負の場合
+    """
+    lane_order(lanes)
+    if n_entries < 0 or circle_heats < 0:
+        raise ValueError(f"出場者数と組数は0以上を指定してください: n_entries={n_entries}, circle_heats={circle_heats}")
+    return _seed(int(n_entries), int(lanes), int(circle_heats))
+
+
+def seed_events(entry_counts: Dict, lanes: int = DEFAULT_LANES, circle_heats: int = 0) -> Dict:
+    """
+    全種目の割り当てをまとめて計算する。
+
+    引数:
+        - entry_counts: 種目 -> 出場者数 の辞書
+
+    戻り値:
+        - 種目 -> HeatAssignment の辞書
+    """
+    return {event: seed_heats(count, lanes, circle_heats) for event, count in entry_counts.items()}
+
+
+def arrange_heats(entries: Sequence, lanes: int = DEFAULT_LANES, circle_heats: int = 0, empty="") -> List[List]:
+    """
+    早い順の出場者リストを、組ごと・コース1～lanes の順のリストに並べ替える。
+    空きコースには empty を入れる。
+
+    引数:
+        - entries: 出場者（IDなど）のリスト（早い順）
+        - lanes: コース数
+        - circle_heats: サークルシーディングを行う組数
+        - empty: 空きコースに入れる値
+
+    戻り値:
+        - 組ごとのリスト（シートの上の組から）
+    """
+    table = seed_heats(len(entries), lanes, circle_heats).grid()
+    values = np.empty(len(entries) + 1, dtype=object)
+    values[:-1] = list(entries)
+    values[-1] = empty
+    # 空きコース（-1）は末尾の empty を指す
+    return values[table].tolist()
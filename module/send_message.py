@@ -1,33 +1,297 @@
-import requests
 import logging
 import os
+import queue
+import threading
+import time
+import atexit
 import traceback
+import multiprocessing.util
+from collections import OrderedDict
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from module.config import load_config
+
+if TYPE_CHECKING:
+    import requests
 
 # 環境変数の取得（グローバル変数として管理）
+load_config()
 SLACK_TOKEN = os.getenv("SLACK_TOKEN")
 SLACK_CHANNEL = os.getenv("SLACK_CHANNEL")
+SLACK_API_URL = os.getenv("SLACK_API_URL", "https://slack.com/api/chat.postMessage")
+
+# 通知の送信設定
+#   SLACK_ASYNC          : 0 にすると呼び出し元で同期的に送信する
+#   SLACK_QUEUE_SIZE     : 送信待ちにできる通知の上限（超えた分は件数だけ数えて破棄）
+#   SLACK_TIMEOUT        : 1回のHTTPリクエストのタイムアウト（秒）
+#   SLACK_BATCH_INTERVAL : 最初の通知からこの秒数の間に届いた通知を1通のダイジェストにまとめる
+#   SLACK_MIN_INTERVAL   : 投稿と投稿の最小間隔（秒）
+#   SLACK_FLUSH_TIMEOUT  : 終了時に送信待ちの通知を送り切るまで待つ最大秒数
+SLACK_ASYNC = os.getenv("SLACK_ASYNC", "1") != "0"
+SLACK_QUEUE_SIZE = int(os.getenv("SLACK_QUEUE_SIZE", "1000"))
+SLACK_TIMEOUT = float(os.getenv("SLACK_TIMEOUT", "5"))
+SLACK_BATCH_INTERVAL = float(os.getenv("SLACK_BATCH_INTERVAL", "2"))
+SLACK_MIN_INTERVAL = float(os.getenv("SLACK_MIN_INTERVAL", "1"))
+SLACK_FLUSH_TIMEOUT = float(os.getenv("SLACK_FLUSH_TIMEOUT", "5"))
+
+# Slackの1投稿に載せる本文の上限（超える場合は分割して投稿する）
+MAX_MESSAGE_CHARS = 3500
 
 # ロギング設定（デバッグ時に役立つ）
 logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
 
+_SESSION: Optional["requests.Session"] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> "requests.Session":
+    """
+    プロセス内で共有するHTTPセッションを返す（接続を使い回すため）。
+    requests は読み込みに時間がかかるため、初めて送信するときに読み込む。
+    """
+    import requests
+
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            _SESSION = requests.Session()
+        return _SESSION
+
+
 def send_slack_notification(webhook_url, message):
     """
     Slack通知を送信する関数。
-    
+
     :param webhook_url: SlackのWebhook URL
     :param message: 送信するメッセージ内容
     """
     try:
         payload = {"text": message}
-        response = requests.post(webhook_url, json=payload)
+        response = get_session().post(webhook_url, json=payload, timeout=SLACK_TIMEOUT)
         response.raise_for_status()
     except Exception as e:
         logging.error(f"Slack通知エラー: {str(e)}", exc_info=True)
         raise
 
+
+def build_digest(messages: List[Tuple[str, str]], dropped: int = 0) -> List[str]:
+    """
+    送信待ちの通知をまとめ、投稿する本文のリストを作成する。
+    同じ (システム名, 本文) の通知は1行にまとめて件数を付ける。
+
+    引数:
+        - messages: (システム名, 本文) のリスト（届いた順）
+        - dropped: キューがあふれて破棄した通知の件数
+
+    戻り値:
+        - 投稿する本文のリスト（1件あたり MAX_MESSAGE_CHARS 文字以内）
+    """
+    counts: "OrderedDict[Tuple[str, str], int]" = OrderedDict()
+    for key in messages:
+        counts[key] = counts.get(key, 0) + 1
+
+    lines = []
+    for (system_name, text), count in counts.items():
+        suffix = f" (×{count})" if count > 1 else ""
+        lines.append(f"[{system_name}] {text}{suffix}")
+    if dropped:
+        lines.append(f"（送信待ちがあふれたため {dropped}件の通知を省略しました）")
+    if len(counts) > 1 or dropped:
+        lines.insert(0, f"{len(messages)}件の通知をまとめて送信します")
+
+    chunks: List[str] = []
+    current = ""
+    for line in lines:
+        line = line[:MAX_MESSAGE_CHARS]
+        if current and len(current) + 1 + len(line) > MAX_MESSAGE_CHARS:
+            chunks.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+class SlackNotifier:
+    """
+    Slack通知をバックグラウンドのスレッドから送信する。
+    呼び出し元は上限付きのキューに積むだけで待たされず、スレッド側で
+    一定時間内の通知を1通のダイジェストにまとめ、投稿間隔を空けて送信する。
+    """
+
+    def __init__(
+        self,
+        token: Optional[str],
+        channel: Optional[str],
+        api_url: str = SLACK_API_URL,
+        max_queue: int = SLACK_QUEUE_SIZE,
+        timeout: float = SLACK_TIMEOUT,
+        batch_interval: float = SLACK_BATCH_INTERVAL,
+        min_interval: float = SLACK_MIN_INTERVAL,
+    ):
+        self.token = token
+        self.channel = channel
+        self.api_url = api_url
+        self.timeout = timeout
+        self.batch_interval = batch_interval
+        self.min_interval = min_interval
+        self._queue: "queue.Queue[Tuple[str, str]]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending = 0
+        self._dropped = 0
+        self._flush_requested = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_post = 0.0
+        self.posted = 0
+
+    def submit(self, system_name: str, text: str) -> bool:
+        """
+        通知を送信待ちに追加する（待たずに戻る）。
+
+        戻り値:
+            - 追加できた場合はTrue、キューがあふれて破棄した場合はFalse
+        """
+        self._ensure_thread()
+        with self._lock:
+            try:
+                self._queue.put_nowait((system_name, text))
+            except queue.Full:
+                self._dropped += 1
+                return False
+            self._pending += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        送信待ちの通知をすぐに送信し、送り終わるまで待つ。
+
+        戻り値:
+            - timeout 以内にすべて送り終えた場合はTrue
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._idle:
+            if self._pending > 0:
+                self._flush_requested.set()
+            while self._pending > 0:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="slack-notifier", daemon=True)
+                self._thread.start()
+
+    def _collect(self) -> List[Tuple[str, str]]:
+        """
+        最初の通知を待ち、その後 batch_interval の間（flush 要求があればすぐ）に届いた通知を集める。
+        """
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_interval
+        while True:
+            remaining = deadline - time.monotonic()
+            if self._flush_requested.is_set() or remaining <= 0:
+                # 待ち時間が終わったら、その時点で積まれている分だけ取り出す
+                try:
+                    while True:
+                        batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    return batch
+            try:
+                # flush 要求にすぐ応じられるよう、短い間隔で待つ
+                batch.append(self._queue.get(timeout=min(remaining, 0.05)))
+            except queue.Empty:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            with self._lock:
+                dropped, self._dropped = self._dropped, 0
+            try:
+                for text in build_digest(batch, dropped):
+                    self._post(text)
+            except Exception as e:
+                logging.error(f"Slack 通知スレッドで予期しないエラー: {e}", exc_info=True)
+            finally:
+                with self._idle:
+                    self._pending -= len(batch)
+                    if self._pending <= 0:
+                        self._flush_requested.clear()
+                        self._idle.notify_all()
+
+    def _post(self, text: str) -> None:
+        """
+        1通を投稿する。前回の投稿から min_interval 秒空け、429 の場合は Retry-After だけ待って1回だけ再送する。
+        """
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json; charset=utf-8"
+        }
+        data = {"channel": self.channel, "text": text}
+        import requests
+
+        for attempt in range(2):
+            wait = self._last_post + self.min_interval - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            self._last_post = time.monotonic()
+            try:
+                response = get_session().post(self.api_url, headers=headers, json=data, timeout=self.timeout)
+            except requests.exceptions.RequestException as e:
+                logging.error(f"Slack 通知失敗: {e}")
+                return
+            if response.status_code == 429 and attempt == 0:
+                time.sleep(float(response.headers.get("Retry-After", "1")))
+                continue
+            self.posted += 1
+            return
+
+
+_NOTIFIER: Optional[SlackNotifier] = None
+
+
+def get_notifier() -> SlackNotifier:
+    """
+    プロセス内で共有する通知スレッドを返す。
+    """
+    global _NOTIFIER
+    if _NOTIFIER is None:
+        _NOTIFIER = SlackNotifier(SLACK_TOKEN, SLACK_CHANNEL)
+        # multiprocessing のワーカープロセスは atexit を実行せずに終了するため、終了処理にも登録する
+        multiprocessing.util.Finalize(_NOTIFIER, _NOTIFIER.flush, args=(SLACK_FLUSH_TIMEOUT,), exitpriority=100)
+    return _NOTIFIER
+
+
+def _reset_after_fork() -> None:
+    # fork した子プロセスには親のスレッドが引き継がれないため、通知スレッドとセッションを作り直す
+    global _NOTIFIER, _SESSION
+    _NOTIFIER = None
+    _SESSION = None
+
+
+def flush_slack_messages(timeout: Optional[float] = SLACK_FLUSH_TIMEOUT) -> bool:
+    """
+    送信待ちの通知を送り切る（終了時に自動で呼ばれる）。
+    """
+    if _NOTIFIER is None:
+        return True
+    return _NOTIFIER.flush(timeout)
+
+
+atexit.register(flush_slack_messages)
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
 def send_slack_message(system_name: str, text: str):
     """
     Slackにメッセージを送信する関数。
+    既定では送信待ちに積むだけで待たずに戻り、送信はバックグラウンドで行う。
     :param system_name: 通知元のシステム名
     :param text: 送信するメッセージ内容
     """
@@ -36,27 +300,16 @@ def send_slack_message(system_name: str, text: str):
             logging.warning("Slack トークンまたはチャンネルが未設定")
             return
 
-        # システム名を先頭に付加する
-        full_text = f"[{system_name}] {text}"
+        if SLACK_ASYNC:
+            get_notifier().submit(system_name, text)
+            return
 
-        url = "https://slack.com/api/chat.postMessage"
-        headers = {
-            "Authorization": f"Bearer {SLACK_TOKEN}",
-            "Content-Type": "application/json; charset=utf-8"
-        }
-        data = {"channel": SLACK_CHANNEL, "text": full_text}
-
-        try:
-            response = requests.post(url, headers=headers, json=data)
-            # response.raise_for_status()
-            # logging.info(f"Slack 通知成功: {response.text}")
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Slack 通知失敗: {e}", exc_info=True)
-            # ここで例外を再送出しない（通知失敗は致命的でないため）
+        # 同期送信（SLACK_ASYNC=0）。システム名を先頭に付加し、通知失敗は致命的でないため例外は送出しない
+        get_notifier()._post(f"[{system_name}] {text}")
     except Exception as e:
         logging.error(f"send_slack_message関数内で予期しないエラー: {e}", exc_info=True)
         logging.error(traceback.format_exc())
 
 if __name__ == "__main__":
     # 環境変数からトークンとチャンネルを取得
-    send_slack_message("TestSystem", "テストメッセージ")
\ No newline at end of file
+    send_slack_message("TestSystem", "テストメッセージ")
@@ -0,0 +1,299 @@
+# template_cache.py
+# 役割: テンプレートExcel（template.xlsx）を1回だけ読み込み、距離別シートを
+#       書式・結合セル・列幅・入力規則・改ページを保ったまま新しいワークブックへ高速に複製する。
+# 変数:
+#   - template_path: テンプレートファイルのパス
+#   - snapshots: シート名 -> 複製用に前処理したシート情報
+#   - layouts: シート名 -> 組ブロックの配置（初めて参照したときに求める）
+#   - _TEMPLATE_CACHE: テンプレートの絶対パス -> (更新時刻, TemplateCache)
+
+import os
+import logging
+from copy import copy, deepcopy
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import openpyxl
+from openpyxl.cell.cell import Cell, MergedCell
+from openpyxl.utils.indexed_list import IndexedList
+from openpyxl.workbook.workbook import Workbook
+from openpyxl.worksheet.worksheet import Worksheet
+from module.heat_layout import HeatLayout, compile_heat_layout
+from module.xlsx_writer import WRITER_FAST, WRITER_OPENPYXL, resolve_writer, save_heat_workbook
+from module.instrumentation import KIND_IO, span
+
+# ロガーの設定
+logger = logging.getLogger(__name__)
+
+# 新しいワークブックへ引き継ぐスタイル表（セルの StyleArray はこれらの添字を参照する）
+_INDEXED_STYLE_TABLES = [
+    "_fonts", "_alignments", "_borders", "_fills",
+    "_number_formats", "_protections", "_cell_styles",
+]
+
+_TEMPLATE_CACHE: Dict[str, Tuple[float, "TemplateCache"]] = {}
+
+
+class SheetSnapshot:
+    """
+    テンプレートの1シート分の内容（値・スタイル・寸法・印刷設定・入力規則・改ページ・条件付き書式）を保持し、
+    同じスタイル表を持つワークブックのシートへ書き写す。
+    """
+
+    def __init__(self, worksheet: Worksheet):
+        self.title = worksheet.title
+        # (行, 列, 値, データ型, StyleArray)
+        self.cells: List[Tuple[int, int, object, str, object]] = []
+        self.merged_styles: List[Tuple[int, int, object]] = []
+        for (row, col), cell in worksheet._cells.items():
+            if isinstance(cell, MergedCell):
+                self.merged_styles.append((row, col, cell._style))
+            else:
+                self.cells.append((row, col, cell._value, cell.data_type, cell._style))
+        self.merged_ranges = [rng.coord for rng in worksheet.merged_cells.ranges]
+        self.row_dimensions = dict(worksheet.row_dimensions.items())
+        self.column_dimensions = dict(worksheet.column_dimensions.items())
+        self.sheet_format = worksheet.sheet_format
+        self.sheet_properties = worksheet.sheet_properties
+        self.page_margins = worksheet.page_margins
+        self.page_setup = worksheet.page_setup
+        self.print_options = worksheet.print_options
+        self.views = worksheet.views
+        self.print_area = worksheet._print_area
+        self.print_rows = worksheet.print_title_rows
+        self.print_cols = worksheet.print_title_cols
+        # 学年のドロップダウン（入力規則）と手動の改ページ
+        self.data_validations = list(worksheet.data_validations.dataValidation)
+        self.col_breaks = worksheet.col_breaks
+        self.row_breaks = worksheet.row_breaks
+        self.conditional_formatting = worksheet.conditional_formatting
+
+    def apply(self, target: Worksheet) -> Worksheet:
+        """
+        保持しているシート内容を target に書き写す。
+        target のワークブックは TemplateCache.new_workbook で作成されている必要がある。
+        """
+        cells = target._cells
+        for row, col, value, data_type, style in self.cells:
+            cell = Cell(target, row=row, column=col, style_array=copy(style))
+            cell._value = value
+            cell.data_type = data_type
+            cells[(row, col)] = cell
+        for coord in self.merged_ranges:
+            target.merge_cells(coord)
+        for row, col, style in self.merged_styles:
+            merged = cells.get((row, col))
+            if merged is not None:
+                merged._style = copy(style)
+
+        # 寸法のスタイルは parent（シート）のワークブックのスタイル表から解決される
+        for key, dim in self.row_dimensions.items():
+            new_dim = copy(dim)
+            new_dim.parent = target
+            target.row_dimensions[key] = new_dim
+        for key, dim in self.column_dimensions.items():
+            new_dim = copy(dim)
+            new_dim.parent = target
+            target.column_dimensions[key] = new_dim
+
+        target.sheet_format = copy(self.sheet_format)
+        target.sheet_properties = copy(self.sheet_properties)
+        target.page_margins = copy(self.page_margins)
+        target.page_setup = copy(self.page_setup)
+        target.print_options = copy(self.print_options)
+        target.views = copy(self.views)
+        target._print_area = copy(self.print_area)
+        if self.print_rows:
+            target.print_title_rows = self.print_rows
+        if self.print_cols:
+            target.print_title_cols = self.print_cols
+        # 入力規則・条件付き書式は範囲（sqref）を持つため、シートごとに別のオブジェクトにする
+        for validation in self.data_validations:
+            target.add_data_validation(deepcopy(validation))
+        target.col_breaks = deepcopy(self.col_breaks)
+        target.row_breaks = deepcopy(self.row_breaks)
+        target.conditional_formatting = deepcopy(self.conditional_formatting)
+        return target
+
+
+class TemplateCache:
+    """
+    テンプレートExcelを1回だけ解析し、各シートの書式付き複製を提供するキャッシュ。
+    """
+
+    def __init__(self, template_path: str):
+        self.template_path = template_path
+        with span("load_template", KIND_IO, file=os.path.basename(template_path)):
+            self.workbook = openpyxl.load_workbook(template_path)
+        self.snapshots: Dict[str, SheetSnapshot] = {
+            ws.title: SheetSnapshot(ws) for ws in self.workbook.worksheets
+        }
+        self.layouts: Dict[str, HeatLayout] = {}
+        logger.info(f"テンプレートを読み込みました: {template_path} (シート: {', '.join(self.snapshots)})")
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self.snapshots)
+
+    def layout(self, sheet_name: str) -> HeatLayout:
+        """
+        テンプレートの指定シートの組ブロックの配置を返す（シートごとに1回だけ求める）。
+
+        例外:
+            - ValueError: シート名がテンプレートに存在しない場合、または組ブロックが見つからない場合
+        """
+        layout = self.layouts.get(sheet_name)
+        if layout is None:
+            snapshot = self.snapshots.get(sheet_name)
+            if snapshot is None:
+                raise ValueError(f"シート名 '{sheet_name}' が見つかりません。")
+            layout = compile_heat_layout(((row, col, value) for row, col, value, _, _ in snapshot.cells), sheet_name)
+            self.layouts[sheet_name] = layout
+        return layout
+
+    def _new_empty_workbook(self) -> Workbook:
+        """
+        テンプレートと同じスタイル表・テーマを持つ空のワークブックを作成する。
+        """
+        wb = openpyxl.Workbook()
+        wb.remove(wb.active)
+        for name in _INDEXED_STYLE_TABLES:
+            setattr(wb, name, IndexedList(getattr(self.workbook, name)))
+        wb._named_styles = copy(self.workbook._named_styles)
+        wb._differential_styles = copy(self.workbook._differential_styles)
+        wb._table_styles = copy(self.workbook._table_styles)
+        wb._colors = self.workbook._colors
+        wb.loaded_theme = self.workbook.loaded_theme
+        return wb
+
+    def add_sheet(self, wb: Workbook, sheet_name: str, title: str = None) -> Worksheet:
+        """
+        new_workbook で作成したワークブックに、テンプレートシートの複製を追加する。
+
+        引数:
+            - wb: new_workbook で作成したワークブック
+            - sheet_name: 複製するテンプレートのシート名
+            - title: 追加するシートの名前（省略時はsheet_name）
+
+        戻り値:
+            - 追加したシート
+
+        例外:
+            - ValueError: シート名がテンプレートに存在しない場合
+        """
+        snapshot = self.snapshots.get(sheet_name)
+        if snapshot is None:
+            raise ValueError(f"シート名 '{sheet_name}' が見つかりません。")
+        return snapshot.apply(wb.create_sheet(title=title or sheet_name))
+
+    def write_heats(
+        self,
+        wb: Workbook,
+        ws: Worksheet,
+        sheet_name: str,
+        heats: np.ndarray,
+        lanes: np.ndarray,
+        fields: Sequence[Sequence],
+        layout: Optional[HeatLayout] = None,
+    ) -> List[Worksheet]:
+        """
+        選手を組ブロックに書き込む。1シートの組数を超える分は、テンプレートシートの複製を
+        ワークブックに追加して続きの組として書き込む（続きのシートの組見出しは通しの組番号にする）。
+
+        引数:
+            - wb, ws: new_workbook で作成したワークブックと最初のシート
+            - sheet_name: テンプレートのシート名
+            - heats: 選手ごとの通しの組番号（0始まり）
+            - lanes: 選手ごとのコース番号（1始まり）
+            - fields: 選手ごとの (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年) など
+            - layout: 組ブロックの配置（省略時はテンプレートのシートから求める）
+
+        戻り値:
+            - 書き込んだシートのリスト（最初のシートを含む）
+        """
+        layout = layout or self.layout(sheet_name)
+        return self._write_pages(wb, ws, sheet_name, layout.page_cells(heats, lanes, fields))
+
+    def _write_pages(self, wb: Workbook, ws: Worksheet, sheet_name: str, pages: List[Dict[Tuple[int, int], object]]) -> List[Worksheet]:
+        """
+        HeatLayout.page_cells で求めたシートごとのセル値を書き込む（2枚目以降のシートは追加する）。
+        """
+        sheets = [ws] + [self.add_sheet(wb, sheet_name, f"{ws.title}_{page + 1}") for page in range(1, len(pages))]
+        for sheet, cells in zip(sheets, pages):
+            for (row, col), value in cells.items():
+                sheet.cell(row=row, column=col, value=value)
+        return sheets
+
+    def save_heats(
+        self,
+        sheet_name: str,
+        heats: np.ndarray,
+        lanes: np.ndarray,
+        fields: Sequence[Sequence],
+        output_path: str,
+        layout: Optional[HeatLayout] = None,
+        writer: Optional[str] = None,
+    ) -> str:
+        """
+        選手を組ブロックに書き込んだワークブックを作成して保存する（write_heats と同じ内容）。
+        書き出し方式が fast の場合はシートのXMLへ直接値を差し込んで保存し、
+        差し込めない値がある場合は openpyxl での保存に切り替える。
+
+        引数:
+            - sheet_name: テンプレートのシート名
+            - heats, lanes, fields: write_heats と同じ
+            - output_path: 保存先のパス
+            - layout: 組ブロックの配置（省略時はテンプレートのシートから求める）
+            - writer: 書き出し方式（openpyxl / fast、省略時は環境変数 HEAT_SHEET_WRITER）
+
+        戻り値:
+            - 実際に使った書き出し方式
+        """
+        layout = layout or self.layout(sheet_name)
+        pages = layout.page_cells(heats, lanes, fields)
+        with span("save_heats", KIND_IO, rows=len(fields), file=os.path.basename(output_path)) as handle:
+            if resolve_writer(writer) == WRITER_FAST:
+                if save_heat_workbook(self, sheet_name, pages, output_path):
+                    handle.set(writer=WRITER_FAST)
+                    return WRITER_FAST
+                logger.info(f"{output_path}: 高速パスで書き出せない値があるため openpyxl で保存します")
+            wb, ws = self.new_workbook(sheet_name)
+            self._write_pages(wb, ws, sheet_name, pages)
+            wb.save(output_path)
+            handle.set(writer=WRITER_OPENPYXL)
+            return WRITER_OPENPYXL
+
+    def new_workbook(self, sheet_name: str) -> Tuple[Workbook, Worksheet]:
+        """
+        テンプレートの指定シートだけを含む新しいワークブックを作成する。
+
+        引数:
+            - sheet_name: 複製するテンプレートのシート名（例: "50m"）
+
+        戻り値:
+            - (ワークブック, 複製したシート)
+
+        例外:
+            - ValueError: シート名がテンプレートに存在しない場合
+        """
+        if sheet_name not in self.snapshots:
+            raise ValueError(f"シート名 '{sheet_name}' が見つかりません。")
+        wb = self._new_empty_workbook()
+        return wb, self.add_sheet(wb, sheet_name)
+
+
+def get_template_cache(template_path: str) -> TemplateCache:
+    """
+    テンプレートのキャッシュを取得する。ファイルが更新されていなければ
+    同じプロセス内では解析済みのキャッシュを再利用する。
+
+    例外:
+        - FileNotFoundError: テンプレートファイルが存在しない場合
+        - PermissionError: テンプレートファイルを読み取る権限がない場合
+    """
+    key = os.path.abspath(template_path)
+    mtime = os.stat(template_path).st_mtime
+    cached = _TEMPLATE_CACHE.get(key)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, TemplateCache(template_path))
+        _TEMPLATE_CACHE[key] = cached
+    return cached[1]
@@ -0,0 +1,235 @@
+# xlsx_writer.py
+# 役割: 組表のExcelを openpyxl のオブジェクトモデルを作らずに直接書き出す（高速パス）。
+#       テンプレートのシート（と続きのシート）だけを含む空のワークブックを openpyxl で1回だけ保存して
+#       雛形（スケルトン）とし、種目ごとにはシートのXML（SpreadsheetML）へ計算済みのセル値を差し込んで
+#       ZIP に書き出す。セルの書式や列幅・印刷設定は雛形のものをそのまま使うため、openpyxl で保存した
+#       ファイルと同じ内容になる。差し込めない値がある場合は呼び出し側で openpyxl の保存に切り替える。
+# 変数:
+#   - HEAT_SHEET_WRITER: 書き出し方式を指定する環境変数（openpyxl / fast）
+#   - pages: シートごとの {(行, 列): 値}（HeatLayout.page_cells で作成）
+#   - _SKELETONS: テンプレート -> {(シート名, シート数): WorkbookSkeleton}
+
+import io
+import os
+import re
+import math
+import numbers
+import zipfile
+import weakref
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+
+WRITER_OPENPYXL = "openpyxl"
+WRITER_FAST = "fast"
+
+_ROW_RE = re.compile(r'<row r="(\d+)"[^>]*?(?:/>|>.*?</row>)', re.S)
+_CELL_RE = re.compile(r'<c r="([A-Z]+)\d+"([^>]*?)(?:/>|>.*?</c>)', re.S)
+_STYLE_RE = re.compile(r'\ss="(\d+)"')
+_SPANS_RE = re.compile(r'\sspans="[^"]*"')
+_DIMENSION_RE = re.compile(r'<dimension ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"')
+_SHEET_RE = re.compile(r'<sheet [^>]*?r:id="([^"]+)"')
+_REL_RE = re.compile(r'<Relationship [^>]*?/>')
+_TIMESTAMP_RE = re.compile(r'(<dcterms:(?:created|modified) [^>]*>)[^<]*(</dcterms:(?:created|modified)>)')
+
+_SKELETONS: "weakref.WeakKeyDictionary[object, Dict[Tuple[str, int], WorkbookSkeleton]]" = weakref.WeakKeyDictionary()
+
+
+class UnsupportedCellValue(ValueError):
+    """
+    高速パスで書き出せない値（文字列・整数・有限の小数以外や、XMLに使えない文字を含む文字列）。
+    """
+
+
+def resolve_writer(writer: Optional[str] = None) -> str:
+    """
+    書き出し方式を決定する。引数 → 環境変数 HEAT_SHEET_WRITER → openpyxl の順で優先する。
+
+    例外:
+        - ValueError: openpyxl / fast 以外が指定された場合
+    """
+    writer = (writer or os.getenv("HEAT_SHEET_WRITER", WRITER_OPENPYXL)).strip().lower()
+    if writer not in (WRITER_OPENPYXL, WRITER_FAST):
+        raise ValueError(f"書き出し方式の指定が不正です: {writer}（{WRITER_OPENPYXL} または {WRITER_FAST}）")
+    return writer
+
+
+def _cell_xml(prefix: str, value) -> str:
+    """
+    openpyxl が書き出すのと同じ形式のセル要素を作る。prefix は '<c r="B4" s="5"' のような開始部分
+    （書式の s 属性は元のセルから引き継ぐ）。
+    """
+    if isinstance(value, str):
+        if ILLEGAL_CHARACTERS_RE.search(value):
+            raise UnsupportedCellValue(f"XMLに使えない文字を含む値です: {value!r}")
+        space = ' xml:space="preserve"' if value != value.strip() else ""
+        return f'{prefix} t="inlineStr"><is><t{space}>{escape(value)}</t></is></c>'
+    if isinstance(value, numbers.Integral) and not isinstance(value, bool):
+        return f'{prefix} t="n"><v>{int(value)}</v></c>'
+    if isinstance(value, numbers.Real) and not isinstance(value, bool) and math.isfinite(value):
+        return f'{prefix} t="n"><v>{repr(float(value))}</v></c>'
+    raise UnsupportedCellValue(f"高速パスで書き出せない値です: {value!r}")
+
+
+class SheetXml:
+    """
+    雛形のシートのXMLを行・セル単位に分けたもの。値を差し込むときは、値のない行は元のXMLをそのまま使い、
+    値のある行だけ列番号 -> セル要素 の表を組み立て直す。
+    """
+
+    def __init__(self, xml: str):
+        start = xml.find("<sheetData>")
+        end = xml.find("</sheetData>")
+        dimension = _DIMENSION_RE.search(xml)
+        if start < 0 or end < 0 or dimension is None or dimension.group(3) is None:
+            raise UnsupportedCellValue("シートの sheetData または使用範囲（dimension）を解釈できません")
+        start += len("<sheetData>")
+        self.xml = xml
+        self.head, self.tail = xml[:start], xml[end:]
+        self.min_col, self.min_row = column_index_from_string(dimension.group(1)), int(dimension.group(2))
+        self.max_col, self.max_row = column_index_from_string(dimension.group(3)), int(dimension.group(4))
+
+        # 行番号 -> (開始タグ, 元の行のXML, 列番号 -> (セル開始部分, 元のセルのXML))
+        self.rows: Dict[int, Tuple[str, str, Dict[int, Tuple[str, str]]]] = {}
+        for match in _ROW_RE.finditer(xml, start, end):
+            row = int(match.group(1))
+            row_xml = match.group(0)
+            if row_xml.endswith("/>"):
+                open_tag, body = row_xml[:-2].rstrip() + ">", ""
+            else:
+                head_end = row_xml.index(">") + 1
+                open_tag, body = row_xml[:head_end], row_xml[head_end:-len("</row>")]
+            cells = {}
+            for cell in _CELL_RE.finditer(body):
+                style = _STYLE_RE.search(cell.group(2))
+                prefix = f'<c r="{cell.group(1)}{row}"' + (f' s="{style.group(1)}"' if style else "")
+                cells[column_index_from_string(cell.group(1))] = (prefix, cell.group(0))
+            self.rows[row] = (_SPANS_RE.sub("", open_tag), row_xml, cells)
+
+    def patch(self, cells: Dict[Tuple[int, int], object]) -> str:
+        """
+        {(行, 列): 値} のセルを差し込んだXMLを返す（既存のセルは書式を残して値を置き換える）。
+
+        例外:
+            - UnsupportedCellValue: 差し込めない値がある場合、またはセルがシートの使用範囲（dimension）の外にある場合
+        """
+        if not cells:
+            return self.xml
+        by_row: Dict[int, Dict[int, object]] = {}
+        for (row, col), value in cells.items():
+            if not (self.min_row <= row <= self.max_row and self.min_col <= col <= self.max_col):
+                raise UnsupportedCellValue(f"セル ({row}, {col}) がシートの使用範囲の外にあります")
+            values = by_row.get(row)
+            if values is None:
+                values = by_row[row] = {}
+            values[col] = value
+
+        pieces = [self.head]
+        for row in sorted(self.rows.keys() | by_row.keys()):
+            open_tag, row_xml, existing = self.rows.get(row, (f'<row r="{row}">', "", {}))
+            values = by_row.get(row)
+            if values is None:
+                pieces.append(row_xml)
+                continue
+            pieces.append(open_tag)
+            for col in sorted(existing.keys() | values.keys()):
+                prefix, cell_xml = existing.get(col) or (f'<c r="{get_column_letter(col)}{row}"', "")
+                pieces.append(_cell_xml(prefix, values[col]) if col in values else cell_xml)
+            pieces.append("</row>")
+        pieces.append(self.tail)
+        return "".join(pieces)
+
+
+def patch_sheet_xml(xml: str, cells: Dict[Tuple[int, int], object]) -> str:
+    """
+    シートのXMLに {(行, 列): 値} のセルを差し込んだXMLを返す。
+
+    例外:
+        - UnsupportedCellValue: 差し込めない値がある場合、またはセルがシートの使用範囲（dimension）の外にある場合
+    """
+    return SheetXml(xml).patch(cells)
+
+
+class WorkbookSkeleton:
+    """
+    値を書き込む前のワークブック（ZIPの各パート）と、シートの順番に対応するワークシートのパート名。
+    """
+
+    def __init__(self, data: bytes):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.entries: List[Tuple[str, bytes]] = [(info.filename, archive.read(info)) for info in archive.infolist()]
+        parts = dict(self.entries)
+        workbook = parts["xl/workbook.xml"].decode("utf-8")
+        targets = {}
+        for rel in _REL_RE.findall(parts["xl/_rels/workbook.xml.rels"].decode("utf-8")):
+            rel_id = re.search(r'\sId="([^"]+)"', rel).group(1)
+            target = re.search(r'\sTarget="([^"]+)"', rel).group(1)
+            targets[rel_id] = target.lstrip("/") if target.startswith("/") else f"xl/{target}"
+        self.sheet_parts: List[str] = [targets[rel_id] for rel_id in _SHEET_RE.findall(workbook)]
+        self.sheets: Dict[str, SheetXml] = {part: SheetXml(parts[part].decode("utf-8")) for part in self.sheet_parts}
+
+    @classmethod
+    def from_template(cls, template, sheet_name: str, n_pages: int) -> "WorkbookSkeleton":
+        """
+        TemplateCache.new_workbook / add_sheet と同じ手順で作った空のワークブックを雛形にする。
+        """
+        wb, ws = template.new_workbook(sheet_name)
+        for page in range(1, n_pages):
+            template.add_sheet(wb, sheet_name, f"{ws.title}_{page + 1}")
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        return cls(buffer.getvalue())
+
+    def save(self, output_path: str, pages: List[Dict[Tuple[int, int], object]]) -> None:
+        """
+        シートごとのセル値を差し込んでワークブックを保存する。
+
+        例外:
+            - UnsupportedCellValue: 差し込めない値がある場合（ファイルは作成しない）
+        """
+        if len(pages) != len(self.sheet_parts):
+            raise ValueError(f"シート数が雛形と一致しません: {len(pages)} != {len(self.sheet_parts)}")
+        # 値の確認を兼ねて、書き始める前にすべてのシートのXMLを作る
+        sheets = {part: self.sheets[part].patch(cells).encode("utf-8") for part, cells in zip(self.sheet_parts, pages)}
+        now = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            for name, data in self.entries:
+                if name in sheets:
+                    data = sheets[name]
+                elif name == "docProps/core.xml":
+                    data = _TIMESTAMP_RE.sub(lambda m: f"{m.group(1)}{now}{m.group(2)}", data.decode("utf-8")).encode("utf-8")
+                archive.writestr(name, data)
+
+
+def get_skeleton(template, sheet_name: str, n_pages: int) -> WorkbookSkeleton:
+    """
+    テンプレートのシートとシート数に対応する雛形を返す（テンプレートごとに1回だけ作る）。
+    """
+    skeletons = _SKELETONS.setdefault(template, {})
+    key = (sheet_name, n_pages)
+    skeleton = skeletons.get(key)
+    if skeleton is None:
+        skeleton = skeletons[key] = WorkbookSkeleton.from_template(template, sheet_name, n_pages)
+    return skeleton
+
+
+def save_heat_workbook(template, sheet_name: str, pages: List[Dict[Tuple[int, int], object]], output_path: str) -> bool:
+    """
+    組表のワークブックを高速パスで保存する。
+
+    引数:
+        - template: TemplateCache
+        - sheet_name: テンプレートのシート名
+        - pages: シートごとの {(行, 列): 値}
+        - output_path: 保存先のパス
+
+    戻り値:
+        - 保存できた場合はTrue、高速パスで書き出せない値があった場合はFalse（呼び出し側で openpyxl で保存する）
+    """
+    try:
+        get_skeleton(template, sheet_name, len(pages)).save(output_path, pages)
+        return True
+    except UnsupportedCellValue:
+        return False
@@ -1,19 +1,32 @@
 # DataConvert.py
 # 役割: CSVデータを正規化し、文字のフォーマット変換やタイムデータの整形を行う。
+#       文字列の列だけを対象に、重複を除いた値ごとに1回だけ変換して元の行へ戻し、
+#       タイムの列は配列演算でまとめて整形する。ExcelToMergedCSV の後段（パイプラインの1工程）としても呼ばれる。
 # 変数:
 #   - df: CSVデータを格納するPandasのDataFrame
-#   - column_names: タイム変換を適用するカラム名のリスト
+#   - TIME_COLUMNS: タイム変換を適用するカラム名のリスト
+#   - input_csv / output_csv: 変換元の統合CSVと、変換後のCSV（統合CSV名_converted.csv）
 
 import pandas as pd
+import numpy as np
 import os
-import jaconv
 import logging
 import traceback
+from typing import Optional
+from module.config import load_config
+from module.normalize import normalize_kana
+from module.instrumentation import KIND_IO, instrumented
 from module.send_message import send_slack_message
 
+logger = logging.getLogger(__name__)
+
+TIME_COLUMNS = ["200IM", "200Ba", "200Br", "200Fly", "200Fr", "50Ba", "50Br", "50Fly", "50Fr",
+                "400IM", "400Fr", "100Ba", "100Br", "100Fly", "100Fr"]
+
 def normalize_text(text):
     """
     テキストを正規化する（全角スペースを半角に、全角カタカナを半角に変換）。
+    変換結果は module.normalize の共有キャッシュに保持する。
 
     引数:
         - text: 変換対象の文字列
@@ -21,10 +34,46 @@ def normalize_text(text):
     戻り値:
         - 正規化された文字列
     """
-    if isinstance(text, str):
-        text = text.replace("\u3000", " ")  # 全角スペースを半角スペースに変換
-        text = jaconv.z2h(text, kana=True, digit=False, ascii=False)  # 全角カタカナを半角に変換
-    return text
+    return normalize_kana(text)
+
+def normalize_column(series: pd.Series) -> pd.Series:
+    """
+    1列分の値を normalize_text で正規化する。
+    氏名・学校名などは同じ値が繰り返し現れるため、重複を除いた値ごとに1回だけ変換して元の行へ戻す。
+
+    引数:
+        - series: 変換対象の列
+
+    戻り値:
+        - 正規化した列（欠損値はそのまま）
+    """
+    codes, uniques = pd.factorize(series)
+    values = series.to_numpy(dtype=object, copy=True)
+    if len(uniques) == 0:
+        return pd.Series(values, index=series.index, name=series.name)
+    converted = np.array([normalize_text(value) for value in uniques], dtype=object)
+    present = codes >= 0
+    values[present] = converted[codes[present]]
+    return pd.Series(values, index=series.index, name=series.name)
+
+def normalize_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    DataFrameの文字列の列だけを正規化したコピーを返す（数値の列はそのまま）。
+    """
+    df = df.copy()
+    for position, dtype in enumerate(df.dtypes):
+        if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype):
+            df.isetitem(position, normalize_column(df.iloc[:, position]))
+    return df
+
+def _format_centis(centis: int) -> str:
+    """
+    百の位以上を分とした1/100単位の値（例: 22000 → 2分20秒00）を "2:20.00" / "58.12" 形式にする。
+    """
+    minutes, rest = divmod(centis, 10000)
+    if minutes > 0:
+        return f"{minutes}:{rest // 100:02d}.{rest % 100:02d}"
+    return f"{rest // 100}.{rest % 100:02d}"
 
 def convert_to_time_format(num):
     """
@@ -38,27 +87,86 @@ def convert_to_time_format(num):
     """
     if pd.isna(num):
         return num
-    minutes = int(num // 100)
-    seconds = num % 60
-    if minutes > 0:
-        return f"{minutes}:{seconds:05.2f}"
-    else:
-        return f"{seconds:.2f}"
+    return _format_centis(int(np.rint(num * 100)))
 
-if __name__ == "__main__":
+def convert_time_column(series: pd.Series) -> pd.Series:
+    """
+    1列分のタイム（220.0 → "2:20.00" のように百の位以上を分とする数値）をまとめて整形する。
+    分・秒・1/100秒は配列演算で求め、文字列への整形は重複を除いた値ごとに1回だけ行う。
+    数値として解釈できない値（"1:05.30" のように整形済みの文字列など）と欠損値はそのまま残す。
+
+    引数:
+        - series: 変換対象の列
+
+    戻り値:
+        - 整形した列
+    """
+    packed = pd.to_numeric(series, errors="coerce").to_numpy(dtype=float)
+    values = series.to_numpy(dtype=object, copy=True)
+    valid = np.isfinite(packed)
+    if valid.any():
+        centis, inverse = np.unique(np.rint(packed[valid] * 100).astype(np.int64), return_inverse=True)
+        labels = np.array([_format_centis(value) for value in centis.tolist()], dtype=object)
+        values[valid] = labels[inverse]
+    return pd.Series(values, index=series.index, name=series.name)
+
+def convert_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    文字列の正規化とタイムの整形を行ったDataFrameを返す（元のDataFrameは変更しない）。
+    """
+    df = normalize_frame(df)
+    for col in TIME_COLUMNS:
+        if col in df.columns:
+            df[col] = convert_time_column(df[col])
+    return df
+
+@instrumented(kind=KIND_IO, rows=len)
+def convert_csv(input_csv: str, output_csv: str, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    統合CSVを正規化・整形して保存する。
+
+    引数:
+        - input_csv: 統合CSVのパス
+        - output_csv: 変換後のCSVのパス
+        - df: 読み込み済みの統合CSVのDataFrame（指定した場合は input_csv を読み直さない）
+
+    戻り値:
+        - 変換後のDataFrame
+
+    例外:
+        - FileNotFoundError: 統合CSVが存在しない場合
+    """
+    if df is None:
+        df = pd.read_csv(input_csv, encoding="utf-8-sig")
+    converted = convert_frame(df)
+    converted.to_csv(output_csv, index=False, encoding="utf-8")
+    logger.info(f"CSVファイルの変換が完了しました: {output_csv}")
+    return converted
+
+def converted_csv_path(merged_csv: str) -> str:
+    """
+    統合CSVのパスから変換後のCSVのパス（例: merged_output_converted.csv）を返す。
+    """
+    stem, ext = os.path.splitext(merged_csv)
+    return f"{stem}_converted{ext or '.csv'}"
+
+def main(input_csv=None, output_csv=None) -> Optional[pd.DataFrame]:
+    """
+    統合CSV（省略時は INPUT_DATA_FILE / MERGED_CSV_DATA_FILE）を変換して保存する。
+
+    戻り値:
+        - 変換後のDataFrame、失敗した場合はNone
+    """
+    load_config()
+    input_folder = os.getenv("INPUT_DATA_FILE", "input_data_folder")
+    input_csv = input_csv or os.path.join(input_folder, os.getenv("MERGED_CSV_DATA_FILE", "merged_output.csv"))
+    output_csv = output_csv or converted_csv_path(input_csv)
     try:
-        input_folder = "input_data_folder"
-        input_csv = os.path.join(input_folder, "merged_output.csv")
-        output_csv = os.path.join(input_folder, "merged_output_converted.csv")
-        df = pd.read_csv(input_csv, encoding="utf-8")
-        df = df.applymap(normalize_text)
-        column_names = ["200IM", "200Ba", "200Br", "200Fly", "200Fr", "50Ba", "50Br", "50Fly", "50Fr", 
-                        "400IM", "400Fr", "100Ba", "100Br", "100Fly", "100Fr"]
-        for col in column_names:
-            if col in df.columns:
-                df[col] = df[col].apply(convert_to_time_format)
-        df.to_csv(output_csv, index=False, encoding="utf-8")
-        logging.info("CSVファイルの変換が完了しました。")
+        return convert_csv(input_csv, output_csv)
     except Exception as e:
-        logging.error(f"DataConvert.pyの__main__実行時にエラー: {e}", exc_info=True)
-        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"DataConvert.pyの__main__実行時にエラー: {e}\n{traceback.format_exc()}")
+        logger.error(f"DataConvertの変換処理でエラー: {e}", exc_info=True)
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"DataConvertの変換処理でエラー: {e}\n{traceback.format_exc()}")
+        return None
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,31 @@
 import os
+import json
+import hashlib
 import pandas as pd
-from typing import List, Optional, NoReturn
+from typing import Dict, List, Optional, NoReturn, Tuple
 import logging
-from dotenv import load_dotenv
+from module.config import load_config
 import traceback
 from module.send_message import send_slack_message
+from module.roster_cache import write_roster_cache
+from scripts.DataConvert import convert_csv, converted_csv_path
+from module.progress import STAGE_EXCEL_TO_CSV, STAGE_MERGE, ProgressReporter, as_reporter
+from module.instrumentation import KIND_IO, instrumented, span
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
+# エントリーシートの読み込み設定（シート名・読み飛ばす行）
+ENTRY_SHEET_NAME = "個人エントリー"
+ENTRY_SKIPROWS = [0, 1, 2, 3, 4, 5, 6, 8, 9, 10]
+# 読み込み設定を変えた場合は値を上げ、既存の変換結果を作り直させる
+ENTRY_LAYOUT_VERSION = 1
+# 変換済みファイルの管理情報（ハッシュ・更新時刻・レイアウト版）を保存するファイル名
+MANIFEST_FILENAME = ".entry_manifest.json"
+
+# 学校別CSVの読み込み結果のキャッシュ: パス -> ((更新時刻, サイズ), DataFrame)
+_FRAME_CACHE: Dict[str, Tuple[Tuple[float, int], pd.DataFrame]] = {}
+
 def delete_existing_csv(directory_path: str) -> List[str]:
     """
     指定フォルダ内のすべてのCSVファイルを削除する。
@@ -46,12 +63,13 @@ def delete_existing_csv(directory_path: str) -> List[str]:
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"delete_existing_csvで予期しないエラー: {e}\n{traceback.format_exc()}")
         return deleted_files
 
-def excel_to_csv(directory_path: str) -> List[str]:
+def excel_to_csv(directory_path: str, progress: Optional[ProgressReporter] = None) -> List[str]:
     """
     フォルダ内のすべてのExcelファイルをCSVに変換する（既存ファイルは上書き）。
     
     引数:
         directory_path: Excelファイルを検索するディレクトリのパス
+        progress: 進捗の通知先（Excelファイルごとに advance する）
         
     戻り値:
         変換に成功したCSVファイル名のリスト
@@ -62,26 +80,25 @@ def excel_to_csv(directory_path: str) -> List[str]:
     """
     converted_files = []
     try:
-        files = os.listdir(directory_path)
+        files = [f for f in os.listdir(directory_path) if f.endswith(".xlsx") or f.endswith(".xls")]
+        if progress:
+            progress.set_total(len(files))
         for filename in files:
-            if filename.endswith(".xlsx") or filename.endswith(".xls"):
-                excel_file_path = os.path.join(directory_path, filename)
-                try:
-                    df = pd.read_excel(
-                        excel_file_path, sheet_name="個人エントリー", engine="openpyxl",
-                        skiprows=[0, 1, 2, 3, 4, 5, 6, 8, 9, 10]
-                    )
-                    csv_filename = f"{os.path.splitext(filename)[0]}_個人エントリー.csv"
-                    csv_filepath = os.path.join(directory_path, csv_filename)
-                    df.to_csv(csv_filepath, index=False, encoding="utf-8-sig")
-                    converted_files.append(csv_filename)
-                    logger.info(f"Excelファイルを変換しました: {excel_file_path} -> {csv_filepath}")
-                except ValueError as e:
-                    logger.error(f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
-                    send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
-                except Exception as e:
-                    logger.error(f"Excelファイルの処理エラー: {excel_file_path} - {e}")
-                    send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルの処理エラー: {excel_file_path} - {e}\n{traceback.format_exc()}")
+            if progress:
+                progress.checkpoint()
+            excel_file_path = os.path.join(directory_path, filename)
+            try:
+                csv_filename = convert_entry_sheet(directory_path, filename)
+                converted_files.append(csv_filename)
+                logger.info(f"Excelファイルを変換しました: {excel_file_path} -> {csv_filename}")
+            except ValueError as e:
+                logger.error(f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
+            except Exception as e:
+                logger.error(f"Excelファイルの処理エラー: {excel_file_path} - {e}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルの処理エラー: {excel_file_path} - {e}\n{traceback.format_exc()}")
+            if progress:
+                progress.advance(filename)
         return converted_files
     except FileNotFoundError as e:
         logger.error(f"ディレクトリが存在しません: {directory_path} - {e}")
@@ -92,13 +109,176 @@ def excel_to_csv(directory_path: str) -> List[str]:
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"excel_to_csvで予期しないエラー: {e}\n{traceback.format_exc()}")
         return converted_files
 
-def merge_csv_files(directory_path: str, output_file: str) -> Optional[pd.DataFrame]:
+def convert_entry_sheet(directory_path: str, filename: str) -> str:
+    """
+    1つのExcelファイルの「個人エントリー」シートをCSVに変換する（既存ファイルは上書き）。
+
+    引数:
+        directory_path: Excelファイルがあるディレクトリのパス
+        filename: Excelファイル名
+
+    戻り値:
+        出力したCSVファイル名
+
+    例外:
+        ValueError: シートの読み込みに失敗した場合
+    """
+    excel_file_path = os.path.join(directory_path, filename)
+    with span("convert_entry_sheet", KIND_IO, file=filename) as handle:
+        df = pd.read_excel(
+            excel_file_path, sheet_name=ENTRY_SHEET_NAME, engine="openpyxl",
+            skiprows=ENTRY_SKIPROWS
+        )
+        csv_filename = f"{os.path.splitext(filename)[0]}_個人エントリー.csv"
+        df.to_csv(os.path.join(directory_path, csv_filename), index=False, encoding="utf-8-sig")
+        handle.rows = len(df)
+    return csv_filename
+
+def file_sha256(file_path: str) -> str:
+    """
+    ファイル内容のSHA-256ハッシュを返す。
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def load_manifest(directory_path: str) -> Dict[str, Dict]:
+    """
+    変換済みファイルの管理情報を読み込む。存在しない・壊れている場合は空の辞書を返す。
+    """
+    manifest_path = os.path.join(directory_path, MANIFEST_FILENAME)
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        return manifest.get("files", {})
+    except FileNotFoundError:
+        return {}
+    except (ValueError, AttributeError) as e:
+        logger.warning(f"管理情報ファイルを読み込めないため全件変換します: {manifest_path} - {e}")
+        return {}
+
+def save_manifest(directory_path: str, entries: Dict[str, Dict]) -> None:
+    """
+    変換済みファイルの管理情報を保存する。
+    """
+    manifest_path = os.path.join(directory_path, MANIFEST_FILENAME)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump({"files": entries}, f, ensure_ascii=False, indent=2)
+
+def excel_to_csv_incremental(directory_path: str, progress: Optional[ProgressReporter] = None) -> List[str]:
+    """
+    フォルダ内のExcelファイルのうち、新規または内容が変わったものだけをCSVに変換する。
+    ファイルのハッシュ・更新時刻・サイズ・レイアウト版を管理情報ファイルに記録し、
+    更新時刻とサイズが一致するファイルはハッシュ計算も省略する。
+    削除されたExcelファイルに対応するCSVは削除する。
+
+    引数:
+        directory_path: Excelファイルを検索するディレクトリのパス
+        progress: 進捗の通知先（Excelファイルごとに advance する）
+
+    戻り値:
+        現在のExcelファイルに対応するCSVファイル名のリスト（変換を省略したものを含む）
+    """
+    previous = load_manifest(directory_path)
+    entries: Dict[str, Dict] = {}
+    csv_files = []
+    converted = skipped = 0
+    try:
+        files = os.listdir(directory_path)
+    except FileNotFoundError as e:
+        logger.error(f"ディレクトリが存在しません: {directory_path} - {e}")
+        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"ディレクトリが存在しません: {directory_path} - {e}")
+        return csv_files
+
+    files = [f for f in files if f.endswith(".xlsx") or f.endswith(".xls")]
+    if progress:
+        progress.set_total(len(files))
+    for filename in files:
+        if progress:
+            progress.checkpoint()
+        try:
+            excel_file_path = os.path.join(directory_path, filename)
+            try:
+                stat = os.stat(excel_file_path)
+                entry = previous.get(filename)
+                csv_exists = entry is not None and os.path.exists(os.path.join(directory_path, entry.get("csv", "")))
+                if (csv_exists and entry.get("layout_version") == ENTRY_LAYOUT_VERSION
+                        and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size):
+                    entries[filename] = entry
+                    csv_files.append(entry["csv"])
+                    skipped += 1
+                    continue
+
+                sha256 = file_sha256(excel_file_path)
+                if csv_exists and entry.get("layout_version") == ENTRY_LAYOUT_VERSION and entry.get("sha256") == sha256:
+                    # 更新時刻だけが変わった（内容は同じ）場合は変換しない
+                    entry = dict(entry, mtime=stat.st_mtime, size=stat.st_size)
+                    skipped += 1
+                else:
+                    csv_filename = convert_entry_sheet(directory_path, filename)
+                    entry = {
+                        "sha256": sha256,
+                        "mtime": stat.st_mtime,
+                        "size": stat.st_size,
+                        "layout_version": ENTRY_LAYOUT_VERSION,
+                        "csv": csv_filename,
+                    }
+                    converted += 1
+                    logger.info(f"Excelファイルを変換しました: {excel_file_path} -> {csv_filename}")
+                entries[filename] = entry
+                csv_files.append(entry["csv"])
+            except ValueError as e:
+                logger.error(f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルのシート読み込みエラー: {excel_file_path} - {e}")
+            except Exception as e:
+                logger.error(f"Excelファイルの処理エラー: {excel_file_path} - {e}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excelファイルの処理エラー: {excel_file_path} - {e}\n{traceback.format_exc()}")
+        finally:
+            if progress:
+                progress.advance(filename)
+
+    # 削除された・変換に失敗したExcelファイルの古いCSVを削除する
+    for filename, entry in previous.items():
+        if filename in entries or entry.get("csv") in csv_files:
+            continue
+        stale_path = os.path.join(directory_path, entry.get("csv", ""))
+        if entry.get("csv") and os.path.exists(stale_path):
+            try:
+                os.remove(stale_path)
+                logger.info(f"対応するExcelがないCSVを削除しました: {stale_path}")
+            except PermissionError as e:
+                logger.error(f"ファイルの削除権限がありません: {stale_path} - {e}")
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"ファイルの削除権限がありません: {stale_path} - {e}")
+
+    save_manifest(directory_path, entries)
+    logger.info(f"Excel→CSV変換: 変換 {converted}件, 変換不要 {skipped}件")
+    return csv_files
+
+def read_school_csv(file_path: str) -> pd.DataFrame:
+    """
+    学校別CSVを読み込む。更新時刻とサイズが変わらない限り、同じプロセス内では
+    前回読み込んだDataFrameを再利用する（キャッシュと共有するため、戻り値を直接変更しないこと）。
+    """
+    stat = os.stat(file_path)
+    key = (stat.st_mtime, stat.st_size)
+    cached = _FRAME_CACHE.get(file_path)
+    if cached is not None and cached[0] == key:
+        return cached[1]
+    df = pd.read_csv(file_path, encoding="utf-8-sig")
+    _FRAME_CACHE[file_path] = (key, df)
+    return df
+
+@instrumented(kind=KIND_IO, rows=len)
+def merge_csv_files(directory_path: str, output_file: str, csv_filenames: Optional[List[str]] = None) -> Optional[pd.DataFrame]:
     """
     フォルダ内のCSVファイルを統合する。
     
     引数:
         directory_path: CSVファイルを検索するディレクトリのパス
         output_file: 結合したデータを保存する出力ファイルパス
+        csv_filenames: 結合対象のCSVファイル名（省略時はフォルダ内の出力ファイル以外のすべてのCSV）
         
     戻り値:
         結合したDataFrame、有効なデータがない場合はNone
@@ -108,20 +288,28 @@ def merge_csv_files(directory_path: str, output_file: str) -> Optional[pd.DataFr
         PermissionError: 出力ファイルの書き込み権限がない場合
     """
     try:
-        csv_files = [f for f in os.listdir(directory_path) if f.endswith(".csv")]
-        concatenated_df = pd.DataFrame()
+        # 統合CSVとその変換結果（DataConvert の出力）は結合対象にしない
+        output_paths = {os.path.abspath(output_file), os.path.abspath(converted_csv_path(output_file))}
+        csv_files = [
+            f for f in os.listdir(directory_path)
+            if f.endswith(".csv")
+            and os.path.abspath(os.path.join(directory_path, f)) not in output_paths
+            and (csv_filenames is None or f in csv_filenames)
+        ]
+        # 学校ごとのDataFrameを集め、最後に1回だけ結合する（ループ内で結合すると行数の2乗に比例する）
+        frames: List[pd.DataFrame] = []
         processed_files = 0
         
         for file in csv_files:
             file_path = os.path.join(directory_path, file)
             try:
-                df = pd.read_csv(file_path, encoding="utf-8-sig")
+                df = read_school_csv(file_path)
                 if "氏名" not in df.columns:
                     logger.warning(f"CSVファイルに氏名列がありません: {file_path}")
                     continue
                 df = df[df["氏名"].notna()]
                 if not df.empty:
-                    concatenated_df = pd.concat([concatenated_df, df], ignore_index=True)
+                    frames.append(df)
                     logger.info(f"CSVファイルから有効なデータを抽出: {file_path}")
                     processed_files += 1
                 else:
@@ -132,6 +320,7 @@ def merge_csv_files(directory_path: str, output_file: str) -> Optional[pd.DataFr
             except Exception as e:
                 logger.error(f"CSVファイル処理エラー: {file_path} - {e}")
                 send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイル処理エラー: {file_path} - {e}\n{traceback.format_exc()}")
+        concatenated_df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
         if not concatenated_df.empty:
             try:
                 # IDを追加
@@ -163,16 +352,22 @@ def merge_csv_files(directory_path: str, output_file: str) -> Optional[pd.DataFr
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"merge_csv_filesで予期しないエラー: {e}\n{traceback.format_exc()}")
         return None
 
-def main(input_folder=None, output_csv=None) -> NoReturn:
+def main(input_folder=None, output_csv=None, incremental=None, progress=None) -> NoReturn:
     """
     メイン処理:
-    1. フォルダ内の既存CSVを削除
-    2. ExcelファイルをCSVに変換
-    3. すべてのCSVを統合
+    1. 新規・変更されたExcelファイルだけをCSVに変換（変更のないものは前回のCSVを再利用）
+    2. すべてのCSVを統合
+    3. 統合CSVから名簿キャッシュ（merged_output.roster.pkl）を作成
+    4. 統合CSVの文字列を正規化し、タイムを整形したCSV（merged_output_converted.csv）を作成
+    incremental=False（または環境変数 FULL_RECONVERT=1）の場合は従来通り、
+    既存CSVをすべて削除してから全Excelファイルを変換する。
+    progress（ProgressReporter またはコールバック）を指定すると、Excelファイルごと・工程ごとに進捗を通知する。
     戻り値:
         なし
     """
-    load_dotenv()
+    load_config()
+    if incremental is None:
+        incremental = os.getenv("FULL_RECONVERT", "0") != "1"
     input_folder = input_folder or os.getenv("INPUT_DATA_FILE")
     output_csv = output_csv or os.path.join(input_folder, os.getenv("MERGED_CSV_DATA_FILE"))
     try:
@@ -181,9 +376,28 @@ def main(input_folder=None, output_csv=None) -> NoReturn:
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), "環境変数 INPUT_DATA_FILE が設定されていません")
             return
         os.makedirs(input_folder, exist_ok=True)
-        delete_existing_csv(input_folder)
-        excel_to_csv(input_folder)
-        merge_csv_files(input_folder, output_csv)
+        reporter = as_reporter(progress, [STAGE_EXCEL_TO_CSV, STAGE_MERGE])
+        reporter.start_stage(STAGE_EXCEL_TO_CSV, 0)
+        if incremental:
+            csv_filenames = excel_to_csv_incremental(input_folder, reporter)
+        else:
+            delete_existing_csv(input_folder)
+            csv_filenames = excel_to_csv(input_folder, reporter)
+            save_manifest(input_folder, {})
+        reporter.finish_stage()
+        reporter.checkpoint()
+        reporter.start_stage(STAGE_MERGE, 1)
+        merged_df = merge_csv_files(input_folder, output_csv, csv_filenames)
+        if merged_df is not None:
+            # 後続の処理がCSVを解析し直さずに済むよう、名簿のバイナリキャッシュも書き出す
+            write_roster_cache(output_csv)
+            # 読み込み済みの統合データを正規化・整形する（失敗しても後続の処理は続ける）
+            try:
+                convert_csv(output_csv, converted_csv_path(output_csv), merged_df)
+            except Exception as e:
+                logger.error(f"統合CSVの正規化・整形でエラー: {e}", exc_info=True)
+                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"統合CSVの正規化・整形でエラー: {e}\n{traceback.format_exc()}")
+        reporter.finish_stage()
         logger.info(f"すべての処理が完了しました: {input_folder}")
     except Exception as e:
         logger.error(f"ExcelToMergedCSVメイン処理で予期しないエラー: {e}", exc_info=True)
@@ -0,0 +1,751 @@
+# benchmark.py
+# 役割: 合成データを使って処理パイプラインの各段階の実行時間を計測する。
+# 変数:
+#   - n_players: 合成する選手数
+#   - event_counts: 計測するイベント数のリスト
+#   - work_dir: 合成データを書き出す一時フォルダ
+#
+# 実行例:
+#   python -m scripts.benchmark entry_index --players 3000
+
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+from typing import Callable, Dict, List
+from module.csv_utils import read_csv_data, write_csv_data
+from module.event_utils import EVENT_NAMES, parse_event_name
+from module.player_utils import create_player_from_row
+from module.player_sort_utils import group_and_sort_all_events
+from module.entry_index import load_entry_index
+from module.template_cache import TemplateCache
+from module.roster import Roster
+
+TEMPLATE_FILE = os.getenv("TEMPLATE_FILE", "template.xlsx")
+
+# 全種目（write_ID が処理する 5泳法 × 4距離 = 20イベント）
+ALL_EVENTS = [
+    (stroke, distance)
+    for stroke in ["im", "fly", "ba", "br", "fr"]
+    for distance in [50, 100, 200, 400]
+]
+
+
+def make_time_str(distance: int, rng: random.Random) -> str:
+    """
+    距離に応じたそれらしいエントリータイム文字列を生成する。
+    """
+    seconds = distance * rng.uniform(0.52, 0.75)
+    minutes = int(seconds // 60)
+    if minutes:
+        return f"{minutes}:{seconds - minutes * 60:05.2f}"
+    return f"{seconds:.2f}"
+
+
+def write_synthetic_roster(csv_path: str, n_players: int, seed: int = 0, entries_per_player: int = 3, numeric_grades: bool = False) -> str:
+    """
+    結合CSV（merged_output.csv）と同じ列構成の合成ロスターを書き出す。
+
+    引数:
+        - csv_path: 出力先のCSVパス
+        - n_players: 選手数
+        - seed: 乱数シード
+        - entries_per_player: 1人あたりのエントリー種目数
+        - numeric_grades: Trueの場合は学年を "高1" ではなく数字（1～3）で書く
+
+    戻り値:
+        - 書き出したCSVのパス
+    """
+    rng = random.Random(seed)
+    headers = ["No", "氏名", "ﾌﾘｶﾞﾅ", "学校名", "学年", "性別"] + EVENT_NAMES + ["種目数", "ID"]
+    rows = []
+    for i in range(n_players):
+        school = f"学校{i % 120:03d}"
+        events = rng.sample(range(len(EVENT_NAMES)), entries_per_player)
+        times = [""] * len(EVENT_NAMES)
+        for ev_idx in events:
+            _, distance = parse_event_name(EVENT_NAMES[ev_idx])
+            times[ev_idx] = make_time_str(distance, rng)
+        rows.append(
+            [i % 40 + 1, f"選手{i:05d}", f"ｾﾝｼｭ {i:05d}", school, i % 3 + 1 if numeric_grades else f"高{i % 3 + 1}", rng.choice(["男", "女"])]
+            + times
+            + [entries_per_player, i + 1]
+        )
+    write_csv_data(csv_path, rows, headers)
+    return csv_path
+
+
+def measure(func: Callable[[], object], repeat: int = 3) -> float:
+    """
+    関数を複数回実行し、最短の実行時間（秒）を返す。
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_entry_index(work_dir: str, n_players: int = 3000, event_counts: List[int] = None) -> Dict[int, Dict[str, float]]:
+    """
+    イベントごとにCSVを再解析する従来方式と、EntryIndexを一度だけ構築する方式を比較する。
+    従来方式は イベント数 × 選手数、インデックス方式は イベント数 に比例して増える。
+    """
+    event_counts = event_counts or [1, 5, 10, 20]
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+
+    def legacy(events):
+        # 旧 get_player_id と同じく、イベントごとに読み込み・生成・全種目ソートを行う
+        for event in events:
+            players = [create_player_from_row(row) for row in read_csv_data(csv_path)[1:]]
+            dict(group_and_sort_all_events(players, "mixed")).get(event, [])
+
+    def indexed(events):
+        index = load_entry_index(csv_path, "mixed", use_cache=False)
+        for event in events:
+            index.get_player_ids(event)
+
+    results = {}
+    print(f"entry_index: {n_players}名")
+    print(f"{'events':>8} {'legacy[s]':>12} {'index[s]':>12} {'speedup':>9}")
+    for count in event_counts:
+        events = ALL_EVENTS[:count]
+        t_legacy = measure(lambda: legacy(events), repeat=1)
+        t_index = measure(lambda: indexed(events))
+        results[count] = {"legacy": t_legacy, "index": t_index}
+        print(f"{count:>8} {t_legacy:>12.4f} {t_index:>12.4f} {t_legacy / t_index:>8.1f}x")
+    return results
+
+
+def bench_template(work_dir: str, sheet_name: str = "50m", n_events: int = 20) -> Dict[str, float]:
+    """
+    イベントごとにテンプレートを読み込み直してセル値だけを写す従来方式と、
+    TemplateCache で解析済みのシートを書式ごと複製する方式の1イベントあたりの時間を比較する。
+    """
+    import openpyxl
+
+    def legacy():
+        wb = openpyxl.load_workbook(TEMPLATE_FILE)
+        new_wb = openpyxl.Workbook()
+        new_wb.remove(new_wb.active)
+        ws_new = new_wb.create_sheet(title=sheet_name)
+        for row in wb[sheet_name].iter_rows():
+            for cell in row:
+                ws_new[cell.coordinate] = cell.value
+
+    start = time.perf_counter()
+    cache = TemplateCache(TEMPLATE_FILE)
+    t_parse = time.perf_counter() - start
+    t_legacy = measure(lambda: [legacy() for _ in range(n_events)], repeat=1) / n_events
+    t_clone = measure(lambda: [cache.new_workbook(sheet_name) for _ in range(n_events)], repeat=1) / n_events
+    print(f"template: {sheet_name} x {n_events}イベント")
+    print(f"  従来方式(読込+値コピー): {t_legacy * 1000:8.1f} ms/イベント")
+    print(f"  キャッシュ複製(書式込み): {t_clone * 1000:8.1f} ms/イベント (初回解析 {t_parse * 1000:.1f} ms)")
+    return {"legacy": t_legacy, "clone": t_clone, "parse": t_parse}
+
+
+def bench_parallel(work_dir: str, n_players: int = 3000, workers: int = 0) -> Dict[int, float]:
+    """
+    write_ID.main（選手情報まで書き込む完成版）を直列実行と並列実行で比較する。
+    """
+    from module.parallel import resolve_worker_count
+    from scripts.write_ID import main as write_id_main
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    results = {}
+    print(f"parallel: {n_players}名")
+    for count in sorted({1, resolve_worker_count(workers)}):
+        out_dir = os.path.join(work_dir, f"out_{count}")
+        elapsed = measure(lambda: write_id_main(out_dir, work_dir, csv_path, TEMPLATE_FILE, fill_player_data=True, workers=count), repeat=1)
+        results[count] = elapsed
+        print(f"  workers={count:>2}: {elapsed:8.2f} s")
+    return results
+
+
+def write_synthetic_schools(directory_path: str, n_schools: int, swimmers_per_school: int = 30, seed: int = 0) -> List[str]:
+    """
+    Excel→CSV変換後と同じ列構成の学校別CSV（*_個人エントリー.csv）を書き出す。
+
+    戻り値:
+        - 書き出したCSVファイル名のリスト
+    """
+    rng = random.Random(seed)
+    headers = ["No", "氏名", "ﾌﾘｶﾞﾅ", "学校名", "学年", "性別"] + EVENT_NAMES + ["種目数"]
+    os.makedirs(directory_path, exist_ok=True)
+    filenames = []
+    for school in range(n_schools):
+        rows = []
+        for i in range(swimmers_per_school):
+            times = [""] * len(EVENT_NAMES)
+            for ev_idx in rng.sample(range(len(EVENT_NAMES)), 3):
+                times[ev_idx] = make_time_str(parse_event_name(EVENT_NAMES[ev_idx])[1], rng)
+            rows.append([i + 1, f"選手{school:03d}{i:03d}", f"ｾﾝｼｭ {school:03d}{i:03d}", f"学校{school:03d}",
+                         f"高{i % 3 + 1}", rng.choice(["男", "女"])] + times + [3])
+        filename = f"school{school:03d}_個人エントリー.csv"
+        write_csv_data(os.path.join(directory_path, filename), rows, headers)
+        filenames.append(filename)
+    return filenames
+
+
+def bench_merge(work_dir: str, school_counts: List[int] = None) -> Dict[int, Dict[str, float]]:
+    """
+    ループ内で pd.concat を繰り返す従来方式と、最後に1回だけ結合する merge_csv_files を比較する。
+    """
+    import pandas as pd
+    from scripts.ExcelToMergedCSV import merge_csv_files
+
+    school_counts = school_counts or [50, 100, 200]
+    results = {}
+    print("merge: 1校あたり30名")
+    print(f"{'schools':>8} {'legacy[s]':>12} {'merge[s]':>12} {'speedup':>9}")
+    for count in school_counts:
+        directory_path = os.path.join(work_dir, f"schools_{count}")
+        filenames = write_synthetic_schools(directory_path, count)
+        output_file = os.path.join(work_dir, f"merged_{count}.csv")
+
+        def legacy():
+            concatenated_df = pd.DataFrame()
+            for filename in filenames:
+                df = pd.read_csv(os.path.join(directory_path, filename), encoding="utf-8-sig")
+                df = df[df["氏名"].notna()]
+                concatenated_df = pd.concat([concatenated_df, df], ignore_index=True)
+            concatenated_df["ID"] = range(1, len(concatenated_df) + 1)
+
+        t_legacy = measure(legacy, repeat=1)
+        t_merge = measure(lambda: merge_csv_files(directory_path, output_file, filenames))
+        results[count] = {"legacy": t_legacy, "merge": t_merge}
+        print(f"{count:>8} {t_legacy:>12.4f} {t_merge:>12.4f} {t_legacy / t_merge:>8.1f}x")
+    return results
+
+
+def bench_roster(work_dir: str, n_players: int = 3000) -> Dict[str, float]:
+    """
+    PlayerData のリストと列指向の Roster について、保持に必要なメモリと全種目ソートの時間を比較する。
+    """
+    import tracemalloc
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    rows = read_csv_data(csv_path)[1:]
+
+    def allocated(build):
+        tracemalloc.start()
+        obj = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return obj, size
+
+    players, players_bytes = allocated(lambda: [create_player_from_row(row) for row in rows])
+    roster, roster_bytes = allocated(lambda: Roster.from_rows(rows))
+    t_legacy = measure(lambda: dict(group_and_sort_all_events(players, "mixed")))
+    t_roster = measure(lambda: dict(group_and_sort_all_events(roster, "mixed")))
+    print(f"roster: {n_players}名")
+    print(f"  PlayerData: {players_bytes / 1024:8.0f} KiB  全種目ソート {t_legacy * 1000:7.1f} ms")
+    print(f"  Roster    : {roster_bytes / 1024:8.0f} KiB  全種目ソート {t_roster * 1000:7.1f} ms"
+          f"  ({players_bytes / roster_bytes:.1f}x 小さい)")
+    return {"players_bytes": players_bytes, "roster_bytes": roster_bytes, "legacy": t_legacy, "roster": t_roster}
+
+
+def bench_times(work_dir: str, n_players: int = 3000) -> Dict[str, float]:
+    """
+    ソートキーの中で毎回 parse_time_str を呼ぶ従来方式と、構築時に1回だけ
+    センチ秒へ変換して数値の argsort だけを行う方式を比較する（男子・女子・混合の3カテゴリ分）。
+    """
+    from module.calc_time import parse_time_str, parse_times_centis
+    from module.player_sort_utils import select_category, sort_rows_by_event
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    rows = read_csv_data(csv_path)[1:]
+    players = [create_player_from_row(row) for row in rows]
+    records = [record for p in players for record in p.times.values() if record != "0"]
+    roster = Roster.from_rows(rows)
+    categories = ["male", "female", "mixed"]
+
+    def legacy_sort():
+        for category in categories:
+            target, events = select_category(players, category)
+            for stroke, distances in events.items():
+                for dist in distances:
+                    valid = [p for p in target if p.times.get((stroke, dist), "0") != "0"]
+                    sorted(valid, key=lambda p: parse_time_str(p.times[(stroke, dist)]))
+
+    def numeric_sort():
+        for category in categories:
+            target, events = select_category(roster, category)
+            for stroke, distances in events.items():
+                for dist in distances:
+                    sort_rows_by_event(roster, stroke, dist, target)
+
+    t_parse_old = measure(lambda: [parse_time_str(r) for r in records])
+    t_parse_new = measure(lambda: parse_times_centis(records))
+    t_sort_old = measure(legacy_sort)
+    t_sort_new = measure(numeric_sort)
+    print(f"times: {n_players}名 / {len(records)}記録")
+    print(f"  解析  parse_time_str: {t_parse_old * 1000:7.1f} ms   parse_times_centis: {t_parse_new * 1000:7.1f} ms")
+    print(f"  ソート 文字列キー   : {t_sort_old * 1000:7.1f} ms   数値 argsort      : {t_sort_new * 1000:7.1f} ms")
+    return {"parse_old": t_parse_old, "parse_new": t_parse_new, "sort_old": t_sort_old, "sort_new": t_sort_new}
+
+
+def bench_lazy(work_dir: str, n_players: int = 3000) -> Dict[str, float]:
+    """
+    1種目だけを参照する場合について、全種目をソートする方式と参照時にソートする方式を比較する。
+    """
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    roster = Roster.from_rows(read_csv_data(csv_path)[1:])
+    event = ("fr", 50)
+    t_eager = measure(lambda: dict(group_and_sort_all_events(roster, "mixed"))[event])
+    t_lazy = measure(lambda: group_and_sort_all_events(roster, "mixed")[event])
+    print(f"lazy: {n_players}名 / 1種目の参照")
+    print(f"  全種目ソート: {t_eager * 1000:7.2f} ms   参照時ソート: {t_lazy * 1000:7.2f} ms")
+    return {"eager": t_eager, "lazy": t_lazy}
+
+
+def bench_slack(work_dir: str, n_messages: int = 40, latency: float = 0.05) -> Dict[str, float]:
+    """
+    通知のたびに同期で requests.post する従来方式と、SlackNotifier に積むだけの方式について、
+    呼び出し元が待たされる時間と実際の投稿数を比較する（ローカルの疑似Slackを使う）。
+    """
+    import requests
+    from module.send_message import SlackNotifier
+    from scripts.fake_slack import FakeSlackServer
+
+    messages = [("AquaProgrammer", f"選手ID '{i % 5}' に対応する選手が見つかりません") for i in range(n_messages)]
+    with FakeSlackServer(latency) as server:
+        def legacy():
+            for system_name, text in messages:
+                requests.post(server.url, json={"channel": "#bench", "text": f"[{system_name}] {text}"})
+
+        t_legacy = measure(legacy, repeat=1)
+        legacy_posts = len(server.received)
+
+        notifier = SlackNotifier("token", "#bench", api_url=server.url, batch_interval=0.2, min_interval=0.05)
+        start = time.perf_counter()
+        for system_name, text in messages:
+            notifier.submit(system_name, text)
+        t_submit = time.perf_counter() - start
+        notifier.flush(10)
+        t_flush = time.perf_counter() - start
+        async_posts = len(server.received) - legacy_posts
+
+    print(f"slack: {n_messages}件の通知 / 応答遅延 {latency * 1000:.0f} ms")
+    print(f"  同期送信    : 呼び出し元 {t_legacy * 1000:8.1f} ms  投稿 {legacy_posts}件")
+    print(f"  非同期送信  : 呼び出し元 {t_submit * 1000:8.1f} ms  投稿 {async_posts}件（送り切るまで {t_flush * 1000:.0f} ms）")
+    return {"legacy": t_legacy, "submit": t_submit, "flush": t_flush, "legacy_posts": legacy_posts, "async_posts": async_posts}
+
+
+def bench_encoding(work_dir: str, n_players: int = 3000) -> Dict[str, float]:
+    """
+    cp932 で保存された大きなCSVについて、エンコーディングごとに開き直して解析し直す従来方式と、
+    1回だけ読み込んで判定結果をキャッシュする read_csv_data を比較する。
+    """
+    import csv
+    from module import csv_utils
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players * 5)
+    cp932_path = os.path.join(work_dir, "cp932.csv")
+    with open(csv_path, encoding="utf-8") as src, open(cp932_path, "w", encoding="cp932", newline="") as dst:
+        # 末尾近くの行にだけ shift-jis では表せない丸数字を含め、従来方式では
+        # shift-jis でほぼ全体を解析してから cp932 でやり直すことになる状況を作る
+        text = src.read()
+        tail = len(text) - len(text) // 100
+        dst.write(text[:tail] + text[tail:].replace("学校", "①学校"))
+
+    def legacy():
+        for encoding in ["utf-8", "utf-8-sig", "shift-jis", "cp932", "euc-jp"]:
+            try:
+                with open(cp932_path, mode="r", encoding=encoding) as file:
+                    return [row for row in csv.reader(file)]
+            except UnicodeDecodeError:
+                continue
+
+    def cold():
+        csv_utils._ENCODING_CACHE.clear()
+        return read_csv_data(cp932_path)
+
+    assert legacy() == cold() == list(csv_utils.iter_csv_rows(cp932_path))
+    t_legacy = measure(legacy)
+    t_cold = measure(cold)
+    t_cached = measure(lambda: read_csv_data(cp932_path))
+    print(f"encoding: cp932 / {n_players * 5}行")
+    print(f"  従来方式: {t_legacy * 1000:7.1f} ms   1回読み込み: {t_cold * 1000:7.1f} ms   判定キャッシュあり: {t_cached * 1000:7.1f} ms")
+    return {"legacy": t_legacy, "cold": t_cold, "cached": t_cached}
+
+
+def bench_stream(work_dir: str, n_players: int = 30000) -> Dict[str, float]:
+    """
+    大きなロスター（通年集計など）について、read_csv_data で全行を読み込んでから名簿を作る方式と、
+    iter_csv_rows で1行ずつ名簿を作る方式のピークメモリと時間を比較する。
+    """
+    import tracemalloc
+    from module.csv_utils import iter_csv_rows
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+
+    def peak(func):
+        tracemalloc.start()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return size, elapsed
+
+    list_peak, t_list = peak(lambda: Roster.from_rows(read_csv_data(csv_path)[1:]))
+    stream_peak, t_stream = peak(lambda: Roster.from_rows(iter_csv_rows(csv_path, skip_header=True)))
+    projected_peak, t_projected = peak(lambda: sum(1 for _ in iter_csv_rows(csv_path, columns=["ID", "氏名", "50Fr"])))
+    print(f"stream: {n_players}行")
+    print(f"  全行読み込み→名簿: ピーク {list_peak / 2**20:6.1f} MiB  {t_list * 1000:7.1f} ms")
+    print(f"  1行ずつ→名簿    : ピーク {stream_peak / 2**20:6.1f} MiB  {t_stream * 1000:7.1f} ms")
+    print(f"  3列だけ走査     : ピーク {projected_peak / 2**20:6.1f} MiB  {t_projected * 1000:7.1f} ms")
+    return {"list_peak": list_peak, "stream_peak": stream_peak, "projected_peak": projected_peak}
+
+
+def bench_cache(work_dir: str, n_players: int = 10000) -> Dict[str, float]:
+    """
+    結合CSVからの名簿の読み込みについて、テキストを解析する方式と名簿キャッシュを読む方式を比較する。
+    """
+    from module.entry_index import load_roster
+    from module.roster_cache import load_roster_cache, roster_cache_path, write_roster_cache
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    t_players = measure(lambda: [create_player_from_row(row) for row in read_csv_data(csv_path)[1:]], repeat=1)
+    t_csv = measure(lambda: load_roster(csv_path), repeat=1)
+    write_roster_cache(csv_path)
+    t_cache = measure(lambda: load_roster_cache(csv_path))
+    size = os.path.getsize(roster_cache_path(csv_path))
+    print(f"cache: {n_players}名（キャッシュ {size / 1024:.0f} KiB）")
+    print(f"  CSV→PlayerData: {t_players * 1000:8.1f} ms   CSV→Roster: {t_csv * 1000:8.1f} ms   キャッシュ→Roster: {t_cache * 1000:8.1f} ms")
+    return {"players": t_players, "csv": t_csv, "cache": t_cache}
+
+
+def bench_lookup(work_dir: str, n_players: int = 3000) -> Dict[str, float]:
+    """
+    fill_name の ID -> 選手情報 の取得（EntryIndex.get_player_data）について、1種目（組表1枚）あたりの時間を比較する。
+    従来方式は呼び出しのたびに pandas で CSV を読み iterrows で辞書を作り、
+    辞書方式は ID -> PlayerView の辞書を1件ずつ引き、一括方式は整数ID表でまとめて引く。
+    """
+    import pandas as pd
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    index = load_entry_index(csv_path)
+    event_ids = [index.get_player_ids(event) for event in ALL_EVENTS]
+    event_ids = [ids for ids in event_ids if ids]
+
+    def legacy(player_ids):
+        df = pd.read_csv(csv_path)
+        df["ID"] = df["ID"].astype(str)
+        id_to_data = {
+            row["ID"]: (row["氏名"], row["ﾌﾘｶﾞﾅ"], row["学校名"], row["学年"])
+            for _, row in df.iterrows()
+        }
+        return {id_: id_to_data.get(id_, (None, None, None, None)) for id_ in player_ids}
+
+    def by_dict(player_ids):
+        result = {}
+        for player_id in player_ids:
+            player = index.players_by_id.get(player_id)
+            result[player_id] = (None, None, None, None) if player is None else (player.name, player.hurigana, player.team, player.grade)
+        return result
+
+    for ids in event_ids:
+        assert by_dict(ids) == index.get_player_data(ids)
+    t_legacy = measure(lambda: legacy(event_ids[0]), repeat=1)
+    t_dict = measure(lambda: [by_dict(ids) for ids in event_ids]) / len(event_ids)
+    t_bulk = measure(lambda: [index.get_player_data(ids) for ids in event_ids]) / len(event_ids)
+    average = sum(len(ids) for ids in event_ids) / len(event_ids)
+    print(f"lookup: {n_players}名 / {len(event_ids)}種目（1種目あたり平均 {average:.0f}名）")
+    print(f"  1種目あたり  従来方式: {t_legacy * 1000:8.2f} ms   辞書: {t_dict * 1000:8.3f} ms   一括: {t_bulk * 1000:8.3f} ms")
+    return {"legacy": t_legacy, "dict": t_dict, "bulk": t_bulk}
+
+
+def bench_seeding(work_dir: str, n_entries: int = 10000) -> Dict[str, float]:
+    """
+    組分け・コース配置について、従来の1人ずつ処理する方式（write_ID の partition_names / assign_group）と
+    module.seeding の配列演算による方式を比較する（割り当ての性質は test/test_seeding.py で確認する）。
+    """
+    from module.seeding import _seed, arrange_heats
+
+    names = [f"{i + 1}" for i in range(n_entries)]
+
+    def legacy():
+        rev = names[::-1]
+        r = len(rev) % 6
+        groups = ([rev[:r]] if r else []) + [rev[i:i + 6] for i in range(r, len(rev), 6)]
+        assigned = []
+        for group in groups:
+            row = [""] * 6
+            for i, name in enumerate(group[::-1]):
+                row[[4, 3, 5, 2, 6, 1][i] - 1] = name
+            assigned.append(row)
+        return assigned
+
+    def vectorised():
+        _seed.cache_clear()
+        return arrange_heats(names)
+
+    assert legacy() == vectorised()
+    t_legacy = measure(legacy)
+    t_vector = measure(vectorised)
+    t_circle = measure(lambda: (_seed.cache_clear(), arrange_heats(names, circle_heats=3)))
+    t_cached = measure(lambda: arrange_heats(names))
+    print(f"seeding: {n_entries}名")
+    print(f"  従来方式: {t_legacy * 1000:7.2f} ms   配列演算: {t_vector * 1000:7.2f} ms   サークル3組: {t_circle * 1000:7.2f} ms   割り当て再利用: {t_cached * 1000:7.2f} ms")
+    return {"legacy": t_legacy, "vectorised": t_vector, "circle": t_circle, "cached": t_cached}
+
+
+def bench_layout(work_dir: str, n_entries: int = 360) -> Dict[str, float]:
+    """
+    50mシート1枚分の書き込みについて、セル番地の文字列を作って解析する従来方式と、
+    テンプレートから求めた組ブロックの配置（整数の行・列番号）で書き込む方式を比較する。
+    """
+    from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+    from module.heat_layout import write_heat_cells
+    from module.seeding import arrange_heats, seed_heats
+
+    template = TemplateCache(TEMPLATE_FILE)
+    t_compile = measure(lambda: (template.layouts.clear(), template.layout("50m")))
+    layout = template.layout("50m")
+    n_entries = min(n_entries, layout.capacity)
+    fields = [(f"選手{i:05d}", f"ｾﾝｼｭ {i:05d}", f"学校{i % 120:03d}", "高1") for i in range(n_entries)]
+    prefixes = ["B", "I", "P", "W", "AD", "AK", "AR", "AY", "BF", "BM"]
+
+    def legacy():
+        _, ws = template.new_workbook("50m")
+        cells = [[f"{prefix}{4 + i * 10 + j}" for j in range(6)] for prefix in prefixes for i in range(6)]
+        for cell_group, group in zip(cells, arrange_heats(list(range(n_entries)), empty=None)):
+            for cell, rank in zip(cell_group, group):
+                if rank is None:
+                    continue
+                col_letter, row = coordinate_from_string(cell)
+                col = column_index_from_string(col_letter)
+                for offset, value in enumerate(fields[rank]):
+                    ws.cell(row=row, column=col + offset, value=value)
+        return ws
+
+    def compiled():
+        _, ws = template.new_workbook("50m")
+        assignment = seed_heats(n_entries)
+        rows, cols = layout.cells(assignment.heats, assignment.lanes)
+        write_heat_cells(ws, rows.tolist(), cols.tolist(), fields)
+        return ws
+
+    def values(ws):
+        return {key: cell.value for key, cell in ws._cells.items()}
+
+    assert values(legacy()) == values(compiled())
+    t_copy = measure(lambda: template.new_workbook("50m"))
+    t_legacy = measure(legacy) - t_copy
+    t_compiled = measure(compiled) - t_copy
+    print(f"layout: 50m / {n_entries}名（{layout.n_heats}組ブロック）")
+    print(f"  配置の解析: {t_compile * 1000:6.2f} ms   書き込み 従来方式: {t_legacy * 1000:6.2f} ms   整数の行・列: {t_compiled * 1000:6.2f} ms")
+    return {"compile": t_compile, "legacy": t_legacy, "compiled": t_compiled}
+
+
+def bench_pagination(work_dir: str, entry_counts: List[int] = None) -> Dict[str, float]:
+    """
+    50m（60組 / シート）の種目について、出場者数を増やしながら組分けと書き込み（保存を除く）の時間を計測し、
+    1シートに入りきらない組が続きのシートに漏れなく書き込まれること、時間が人数にほぼ比例することを確認する。
+    """
+    from module.seeding import seed_heats
+
+    entry_counts = entry_counts or [400, 800, 1600, 3200]
+    template = TemplateCache(TEMPLATE_FILE)
+    layout = template.layout("50m")
+    results = {}
+    print(f"pagination: 50m（1シート {layout.n_heats}組 / {layout.capacity}名）")
+    for n_entries in entry_counts:
+        fields = [(f"選手{i:05d}", f"ｾﾝｼｭ {i:05d}", f"学校{i % 120:03d}", "高1") for i in range(n_entries)]
+
+        def write():
+            wb, ws = template.new_workbook("50m")
+            assignment = seed_heats(n_entries)
+            return template.write_heats(wb, ws, "50m", assignment.heats, assignment.lanes, fields, layout)
+
+        sheets = write()
+        written = sum(1 for ws in sheets for cell in ws._cells.values() if isinstance(cell.value, str) and cell.value.startswith("選手"))
+        assert written == n_entries
+        elapsed = measure(write)
+        results[n_entries] = elapsed
+        print(f"  {n_entries:5d}名: {len(sheets)}シート  {elapsed * 1000:7.1f} ms  （1名あたり {elapsed / n_entries * 1e6:5.1f} µs）")
+    return results
+
+
+def _workbook_contents(path: str) -> Dict:
+    """
+    Excelで開いたときに見える内容（シート名・セル値と書式・結合セル・行の高さ・列幅・印刷範囲）をまとめる。
+    """
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path)
+    return {
+        ws.title: (
+            {(cell.row, cell.column): (cell.value, cell.style_id) for row in ws.iter_rows() for cell in row},
+            sorted(str(merged) for merged in ws.merged_cells.ranges),
+            {row: dim.height for row, dim in ws.row_dimensions.items()},
+            {col: dim.width for col, dim in ws.column_dimensions.items()},
+            ws.print_area,
+        )
+        for ws in wb.worksheets
+    }
+
+
+def bench_xlsx(work_dir: str, entry_counts: List[int] = None) -> Dict[str, float]:
+    """
+    組表の保存を openpyxl と高速パス（module.xlsx_writer）で比較する。
+    計測前に、両方の出力を openpyxl で読み直して内容が一致することと、シートのXMLが（作成日時を除いて）
+    同じバイト列になることを確認し、保存時間とメモリ使用量を計測する。
+    期待値のExcelとの比較は test/test_xlsx_writer.py で行う。
+    """
+    import tracemalloc
+    import zipfile
+    from module.seeding import seed_heats
+    from module.xlsx_writer import WRITER_FAST, WRITER_OPENPYXL
+
+    entry_counts = entry_counts or [60, 360, 1200]
+    template = TemplateCache(TEMPLATE_FILE)
+    results = {}
+    for sheet_name in template.sheetnames:
+        for n_entries in entry_counts:
+            fields = [(f"選手{i:05d} <&>", f"ｾﾝｼｭ {i:05d}", f"学校{i % 120:03d}", i % 3 + 1) for i in range(n_entries)]
+            assignment = seed_heats(n_entries)
+            paths = {writer: os.path.join(work_dir, f"{sheet_name}_{n_entries}_{writer}.xlsx") for writer in (WRITER_OPENPYXL, WRITER_FAST)}
+            times, peaks = {}, {}
+            for writer, path in paths.items():
+                save = lambda: template.save_heats(sheet_name, assignment.heats, assignment.lanes, fields, path, writer=writer)
+                assert save() == writer
+                times[writer] = measure(save)
+                tracemalloc.start()
+                save()
+                peaks[writer] = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+            assert _workbook_contents(paths[WRITER_OPENPYXL]) == _workbook_contents(paths[WRITER_FAST])
+            with zipfile.ZipFile(paths[WRITER_OPENPYXL]) as expected, zipfile.ZipFile(paths[WRITER_FAST]) as actual:
+                assert expected.namelist() == actual.namelist()
+                for name in expected.namelist():
+                    if name != "docProps/core.xml":
+                        assert expected.read(name) == actual.read(name), name
+
+            speedup = times[WRITER_OPENPYXL] / times[WRITER_FAST]
+            results[f"{sheet_name}_{n_entries}"] = speedup
+            print(
+                f"xlsx: {sheet_name:>4} {n_entries:5d}名  openpyxl {times[WRITER_OPENPYXL] * 1000:7.1f} ms / {peaks[WRITER_OPENPYXL] / 1e6:5.1f} MB"
+                f"  fast {times[WRITER_FAST] * 1000:6.1f} ms / {peaks[WRITER_FAST] / 1e6:5.1f} MB  ({speedup:.1f}倍)"
+            )
+    return results
+
+
+def bench_normalize(work_dir: str, n_players: int) -> Dict[str, float]:
+    """
+    文字列の正規化（module.normalize）を、従来の1件ずつの変換（str.replace / jaconv.z2h）と比較する。
+    結果が従来と一致すること、同じ値の文字列が1つのオブジェクトを共有することを確認し、
+    名簿の構築を2回行ったときのキャッシュのヒット率を表示する。
+    """
+    import jaconv
+    from module.normalize import cache_stats, clear_cache, normalize_kana, normalize_space
+
+    csv_path = write_synthetic_roster(os.path.join(work_dir, "merged_output.csv"), n_players)
+    rows = read_csv_data(csv_path)[1:]
+    texts = [f"{row[3]}\u3000ヨミ{i % 50}" for i, row in enumerate(rows)] + [row[2] + "\u3000" for row in rows]
+
+    def legacy():
+        return [jaconv.z2h(text.replace("\u3000", " "), kana=True, digit=False, ascii=False) for text in texts]
+
+    clear_cache()
+    expected = legacy()
+    assert [normalize_kana(text) for text in texts] == expected
+    assert [normalize_space(text) for text in texts] == [text.replace("\u3000", " ") for text in texts]
+    assert normalize_kana("".join(["学校", "001"])) is normalize_kana("学校001")
+
+    t_legacy = measure(legacy)
+    t_cached = measure(lambda: [normalize_kana(text) for text in texts])
+    clear_cache()
+    Roster.from_rows(rows)
+    Roster.from_rows(rows)
+    stats = cache_stats()
+    print(f"normalize: {len(texts)}件  従来 {t_legacy * 1000:.1f} ms  キャッシュ {t_cached * 1000:.1f} ms  ({t_legacy / t_cached:.1f}倍)")
+    print(f"normalize: 名簿2回構築後の{stats}")
+    return {"legacy": t_legacy, "cached": t_cached, "hit_rate": stats.hit_rate}
+
+
+def bench_startup() -> Dict[str, float]:
+    """
+    GUIの起動時の import 時間を計測する（予算の確認は python -m scripts.startup_budget で行う）。
+    """
+    from scripts.startup_budget import check_startup, profile_startup
+
+    targets, profile = profile_startup()
+    if profile.error:
+        print(f"startup: 計測できません: {profile.error}")
+        return {}
+    print(f"startup: {', '.join(targets)}")
+    print(f"  読み込み時間 {profile.total_ms:7.1f} ms（{len(profile.modules)}モジュール）")
+    for problem in check_startup(profile):
+        print(f"  NG: {problem}")
+    return {"total_ms": profile.total_ms, "modules": len(profile.modules)}
+
+
+def bench_instrumentation(n_spans: int = 20000) -> Dict[str, float]:
+    """
+    span 1回あたりの計測の負荷を、記録中でない場合と記録中の場合で比較する。
+    """
+    from module.instrumentation import KIND_IO, capture_spans, span
+
+    def run():
+        for _ in range(n_spans):
+            with span("bench", KIND_IO, rows=1):
+                pass
+
+    t_inactive = measure(run)
+    with capture_spans():
+        t_active = measure(run, repeat=1)
+    print(f"instrumentation: {n_spans}区間")
+    print(f"  記録なし: {t_inactive / n_spans * 1e6:6.2f} us/区間")
+    print(f"  記録中  : {t_active / n_spans * 1e6:6.2f} us/区間")
+    return {"inactive": t_inactive / n_spans, "active": t_active / n_spans}
+
+
+BENCHMARKS = {
+    "entry_index": lambda args, work_dir: bench_entry_index(work_dir, args.players),
+    "template": lambda args, work_dir: bench_template(work_dir),
+    "parallel": lambda args, work_dir: bench_parallel(work_dir, args.players, args.workers),
+    "merge": lambda args, work_dir: bench_merge(work_dir),
+    "roster": lambda args, work_dir: bench_roster(work_dir, args.players),
+    "times": lambda args, work_dir: bench_times(work_dir, args.players),
+    "lazy": lambda args, work_dir: bench_lazy(work_dir, args.players),
+    "slack": lambda args, work_dir: bench_slack(work_dir),
+    "encoding": lambda args, work_dir: bench_encoding(work_dir, args.players),
+    "stream": lambda args, work_dir: bench_stream(work_dir, args.players * 10),
+    "cache": lambda args, work_dir: bench_cache(work_dir),
+    "lookup": lambda args, work_dir: bench_lookup(work_dir, args.players),
+    "seeding": lambda args, work_dir: bench_seeding(work_dir),
+    "layout": lambda args, work_dir: bench_layout(work_dir),
+    "pagination": lambda args, work_dir: bench_pagination(work_dir),
+    "xlsx": lambda args, work_dir: bench_xlsx(work_dir),
+    "normalize": lambda args, work_dir: bench_normalize(work_dir, args.players),
+    "startup": lambda args, work_dir: bench_startup(),
+    "instrumentation": lambda args, work_dir: bench_instrumentation(),
+}
+
+
+def main() -> None:
+    """
+    コマンドライン引数で指定したベンチマークを実行する。
+    """
+    parser = argparse.ArgumentParser(description="処理パイプラインのベンチマーク")
+    parser.add_argument("names", nargs="*", default=list(BENCHMARKS), help=f"実行するベンチマーク: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--players", type=int, default=3000, help="合成する選手数")
+    parser.add_argument("--workers", default="auto", help="parallel で比較するワーカー数（auto でCPU数）")
+    args = parser.parse_args()
+
+    # ベンチマーク中の INFO ログは計測結果を読みにくくするため抑制する
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for name in args.names:
+            BENCHMARKS[name](args, work_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# fake_slack.py
+# 役割: Slack の chat.postMessage の代わりに使うローカルのHTTPサーバー（テストとベンチマーク用）。
+#       受け取った本文と時刻を記録し、指定した応答（429 と Retry-After など）を順に返せる。
+# 変数:
+#   - latency: 各リクエストに応答するまでの秒数
+#   - received: 受け取った本文（text）のリスト（届いた順）
+#   - received_at: 本文を受け取った時刻（time.monotonic）のリスト
+#   - responses: 次のリクエストから順に返す (ステータスコード, ヘッダー) のリスト（空なら 200）
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+
+
+class FakeSlackServer:
+    """
+    chat.postMessage の代わりに使うローカルのHTTPサーバー。
+    各リクエストに latency 秒かけて応答し、受け取った本文を記録する。
+    with 文で起動・停止する。
+    """
+
+    def __init__(self, latency: float = 0.05, responses: Optional[List[Tuple[int, Dict[str, str]]]] = None):
+        self.latency = latency
+        self.received: List[str] = []
+        self.received_at: List[float] = []
+        self.responses: List[Tuple[int, Dict[str, str]]] = list(responses or [])
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                time.sleep(server.latency)
+                with server._lock:
+                    server.received.append(json.loads(body).get("text", ""))
+                    server.received_at.append(time.monotonic())
+                    status, headers = server.responses.pop(0) if server.responses else (200, {})
+                payload = b'{"ok": true}' if status == 200 else b'{"ok": false, "error": "ratelimited"}'
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/api/chat.postMessage"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeSlackServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
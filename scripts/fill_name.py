@@ -6,45 +6,52 @@
 #   - output_dir: 更新されたExcelを保存するディレクトリ
 
 import os
-import pandas as pd
+import numpy as np
 from openpyxl import load_workbook
-from openpyxl.utils.cell import coordinate_from_string, column_index_from_string, get_column_letter
 import logging
 import traceback
 from module.send_message import send_slack_message
+from module.entry_index import load_entry_index
+from module.heat_layout import HeatLayout, write_heat_cells
+from module.template_cache import get_template_cache
+from module.progress import STAGE_FILL, as_reporter
+from module.config import load_config
+from module.instrumentation import KIND_EVENT, KIND_IO, span
 
 RESULT_DATA_FILE = os.getenv("RESULT_DATA_FILE")
 INPUT_DATA_FILE = os.getenv("INPUT_DATA_FILE")
 DIRECTORY_PATH = os.getenv("DIRECTORY_PATH", "test/")
 MERGED_CSV_DATA_FILE = os.path.join(DIRECTORY_PATH, os.getenv("MERGED_CSV_DATA_FILE"))
 
-def get_player_data_by_id(player_ids, csv_path):
+def get_player_data_by_id(player_ids, csv_path, index=None):
     """
     IDリストに基づき、選手の名前・フリガナ・学校名・学年を取得する。
+    名簿はプロセス内で1回だけ読み込み、組表1枚分のIDを整数ID表でまとめて引く。
 
     引数:
         - player_ids: 選手IDのリスト
         - csv_path: 選手データが格納されたCSVファイルのパス
+        - index: 構築済みのEntryIndex（省略時はcsv_pathから取得し、同一CSVは再利用）
 
     戻り値:
         - 選手IDをキーとした辞書 {ID: (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年)}
     """
-    df = pd.read_csv(csv_path)
+    if index is None:
+        index = load_entry_index(csv_path)
+    player_ids = [str(id_) for id_ in player_ids]
+    return index.get_player_data(player_ids)
 
-    try:
-        df["ID"] = df["ID"].astype(str)
-        player_ids = [str(id_) for id_ in player_ids]
-    except KeyError:
-        raise ValueError("CSV に 'ID' 列が存在しません。")
-
-    id_to_data = {
-        row["ID"]: (row["氏名"], row["ﾌﾘｶﾞﾅ"], row["学校名"], row["学年"])
-        for _, row in df.iterrows()
-    }
-
-    return {id_: id_to_data.get(id_, (None, None, None, None)) for id_ in player_ids}
+def update_excel_with_player_data(excel_path, csv_path, target_cells, result_data_file, index=None):
+    """
+    write_ID が出力したExcelの選手IDを、選手の名前・フリガナ・学校名・学年で置き換えて保存する。
 
-def update_excel_with_player_data(excel_path, csv_path, target_cells, result_data_file):
+    引数:
+        - excel_path: 更新するExcelファイルのパス
+        - csv_path: 選手データが格納されたCSVファイルのパス
+        - target_cells: 選手IDが書かれたセル。組ブロックの配置（HeatLayout）またはセル番地のリスト
+        - result_data_file: 保存先のフォルダ
+        - index: 構築済みのEntryIndex（省略時はcsv_pathから取得）
+    """
     try:
         if not os.path.exists(excel_path):
             logging.error(f"pathが存在しません: {excel_path}")
@@ -54,72 +61,66 @@ def update_excel_with_player_data(excel_path, csv_path, target_cells, result_dat
             logging.error(f"CSVファイルが見つかりません: {csv_path}")
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルが見つかりません: {csv_path}")
             return
-        wb = load_workbook(excel_path)
-        ws = wb.active
-        player_ids = [
-            str(ws[cell].value) if ws[cell].value is not None else None
-            for cell in target_cells
+        with span("load_workbook", KIND_IO, file=os.path.basename(excel_path)):
+            wb = load_workbook(excel_path)
+        # 組が多い種目は続きのシート（50m_2 など）にも書かれているため、全シートを対象にする
+        sheets = wb.worksheets
+        if not isinstance(target_cells, HeatLayout):
+            target_cells = HeatLayout.from_coordinates(sheets[0].title, [[cell] for cell in target_cells])
+        # セルは整数の行・列番号で参照する
+        rows = target_cells.rows.ravel().tolist()
+        cols = np.repeat(target_cells.cols, target_cells.lane_count).tolist()
+        sheet_ids = [
+            [str(value) if value is not None else None for value in (ws.cell(row=row, column=col).value for row, col in zip(rows, cols))]
+            for ws in sheets
         ]
-        id_data_map = get_player_data_by_id(player_ids, csv_path)
-        for cell in target_cells:
-            col_letter, row_number = coordinate_from_string(cell)
-            col_index = column_index_from_string(col_letter)
-            value = ws[cell].value
-            if value is not None and value in id_data_map:
-                name, hurigana, school, grade = id_data_map[value]
-                if name is not None:
-                    ws[cell].value = name
-                if hurigana is not None:
-                    ws[f"{get_column_letter(col_index + 1)}{row_number}"].value = hurigana
-                if school is not None:
-                    ws[f"{get_column_letter(col_index + 2)}{row_number}"].value = school
-                if grade is not None:
-                    ws[f"{get_column_letter(col_index + 3)}{row_number}"].value = grade
+        # 全シートのIDをまとめて1回で引く
+        id_data_map = get_player_data_by_id([player_id for ids in sheet_ids for player_id in ids], csv_path, index)
+        for ws, player_ids in zip(sheets, sheet_ids):
+            hits = [i for i, player_id in enumerate(player_ids) if player_id is not None and player_id in id_data_map]
+            write_heat_cells(ws, [rows[i] for i in hits], [cols[i] for i in hits], [id_data_map[player_ids[i]] for i in hits])
         os.makedirs(result_data_file, exist_ok=True)
         output_path = os.path.join(result_data_file, os.path.basename(excel_path))
-        wb.save(output_path)
+        with span("save_workbook", KIND_IO, rows=len(id_data_map), file=os.path.basename(output_path)):
+            wb.save(output_path)
         logging.info(f"Excelファイルを更新・保存しました: {output_path}")
     except Exception as e:
         logging.error(f"Excel更新処理中にエラー: {e}", exc_info=True)
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excel更新処理中にエラー: {e}\n{traceback.format_exc()}")
 
-def main(result_data_file=None, merged_csv_data_file=None):
+def main(result_data_file=None, merged_csv_data_file=None, template_file=None, progress=None):
     """
     メイン処理:
     1. CSVファイルから選手情報を取得
     2. 競技別にExcelシートを更新
     3. 更新完了のメッセージを出力
+    progress（ProgressReporter またはコールバック）を指定すると、種目ごとに進捗を通知する。
     """
-    from dotenv import load_dotenv
-    load_dotenv()
+    load_config()
     result_data_file = result_data_file or os.getenv("RESULT_DATA_FILE")
     directory_path = os.getenv("DIRECTORY_PATH", "test/")
     merged_csv_data_file = merged_csv_data_file or os.path.join(directory_path, os.getenv("MERGED_CSV_DATA_FILE"))
+    template_file = template_file or os.getenv("TEMPLATE_FILE", "template.xlsx")
     try:
-        cell_config = {
-            50: ["B", "I", "P", "W", "AD", "AK", "AR", "AY", "BF", "BM"],
-            100: ["B", "J", "Q", "Y", "AF", "AN", "AT", "BH", "BO"],
-            200: ["B", "L", "V", "AF", "AP"],
-            400: ["B", "P", "AD"],
-        }
+        # 組ブロックの配置（セルの行・列番号）はテンプレートからシートごとに1回だけ求める
+        template = get_template_cache(template_file)
+        # 結合CSVのインデックスは全イベントで共有する
+        index = load_entry_index(merged_csv_data_file)
         events = [
             (stroke, distance)
             for stroke in ["fly", "ba", "br", "fr", "im"]
             for distance in [50, 100, 200, 400]
+            if f"{distance}m" in template.sheetnames
         ]
+        reporter = as_reporter(progress, [STAGE_FILL])
+        reporter.start_stage(STAGE_FILL, len(events))
         for stroke, distance in events:
-            if distance not in cell_config:
-                continue
-            prefixes = cell_config[distance]
-            target_cells_list = [
-                f"{prefix}{7 + i * 10 + offset}"
-                for prefix in prefixes
-                for i in range(6)
-                for offset in [0, -1, 1, -2, 2, -3]
-            ]
+            reporter.checkpoint()
+            layout = template.layout(f"{distance}m")
             excel_file = os.path.join(result_data_file, f"{distance}{stroke}_id.xlsx")
             try:
-                update_excel_with_player_data(excel_file, merged_csv_data_file, target_cells_list, result_data_file)
+                with span(f"{stroke}{distance}", KIND_EVENT, file=os.path.basename(excel_file)):
+                    update_excel_with_player_data(excel_file, merged_csv_data_file, layout, result_data_file, index)
                 logging.info(f"{stroke}{distance} のExcelファイルの更新が完了しました！")
             except FileNotFoundError as e:
                 logging.error(f"ファイルが見つかりません: {e}")
@@ -127,6 +128,8 @@ def main(result_data_file=None, merged_csv_data_file=None):
             except Exception as e:
                 logging.error(f"{stroke}{distance} の処理中に予期しないエラーが発生しました: {e}", exc_info=True)
                 send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"{stroke}{distance} の処理中に予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
+            reporter.advance(f"{stroke}{distance}")
+        reporter.finish_stage()
     except Exception as e:
         logging.error(f"メイン処理中に予期しないエラーが発生しました: {e}", exc_info=True)
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"メイン処理中に予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
@@ -9,18 +9,18 @@
 import os
 import logging
 from typing import List, Tuple, Dict, Optional, Any
-from dotenv import load_dotenv
-from module.csv_utils import read_csv_data
-from module.player_utils import create_player_from_row
-from module.player_sort_utils import group_and_sort_all_events
-from module.player_data import PlayerData
+from module.config import load_config
+from module.entry_index import load_entry_index
+from module.csv_utils import iter_csv_rows
+from module.roster_cache import load_roster_cache
+from module.roster import PlayerView
 import traceback
 from module.send_message import send_slack_message
 
 # ロガーの設定
 logger = logging.getLogger(__name__)
 
-load_dotenv()
+load_config()
 INPUT_DATA_FILE = os.getenv("INPUT_DATA_FILE", "input_data_folder")
 MERGED_CSV_DATA_FILE = os.path.join(INPUT_DATA_FILE, os.getenv("MERGED_CSV_DATA_FILE", "merged_output.csv"))
 
@@ -41,27 +41,9 @@ def get_player_id(csv_path: str, event: Tuple[str, int], category: str = "mixed"
         - ValueError: イベント情報やカテゴリが正しくない場合
     """
     try:
-        # CSVデータの読み込み
-        data = read_csv_data(csv_path)
-        if len(data) <= 1:  # ヘッダーのみ、またはデータなし
-            logger.warning(f"CSVファイルにデータがありません: {csv_path}")
-            send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルにデータがありません: {csv_path}")
-            return []
-
-        # 選手データの作成
-        players = []
-        for row in data[1:]:  # ヘッダーをスキップ
-            try:
-                player = create_player_from_row(row)
-                players.append(player)
-            except ValueError as e:
-                logger.warning(f"選手データの作成に失敗しました: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"選手データの作成に失敗しました: {e}")
-                continue
-
-        # 選手をグループ化してソート
-        sorted_dict = group_and_sort_all_events(players, category)
-        sorted_players = sorted_dict.get(event, [])
+        # 全種目を一括でソートしたインデックスを取得（同一CSVは再利用）
+        index = load_entry_index(csv_path, category)
+        sorted_players = index.get_players(event)
         
         player_ids = [player.id for player in sorted_players]
         logger.info(f"イベント {event} の選手IDを {len(player_ids)}件 取得しました")
@@ -95,29 +77,37 @@ def get_player_info_by_id(player_id_list: List[str], csv_path: str) -> List[Tupl
         - FileNotFoundError: CSVファイルが存在しない場合
     """
     try:
-        # CSVデータの読み込み
-        data = read_csv_data(csv_path)
-        if len(data) <= 1:  # ヘッダーのみ、またはデータなし
-            logger.warning(f"CSVファイルにデータがありません: {csv_path}")
-            send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルにデータがありません: {csv_path}")
+        wanted = set(player_id_list)
+        players: Dict[str, Tuple[str, str]] = {}
+        roster = load_roster_cache(csv_path)
+        if roster is not None:
+            # 名簿キャッシュがあればCSVを解析せずに参照する
+            row_count = len(roster)
+            for pid in wanted:
+                row = roster.find(pid)
+                if row is not None:
+                    players[pid] = (roster.names[row], roster.sexes[row])
+        else:
+            # ID・氏名・性別の3列だけを1行ずつ読み、指定されたIDの選手だけを保持する
+            row_count = 0
+            duplicates = set()
+            for player_id, name, sex in iter_csv_rows(csv_path, columns=[-1, 1, 5], skip_header=True):
+                row_count += 1
+                if player_id in wanted:
+                    if player_id in players:
+                        duplicates.add(player_id)
+                    players[player_id] = (name, sex)
+            # 名簿（Roster.find）と同じく、空のIDと複数の行にあるIDは該当なしとする
+            for player_id in duplicates | {""}:
+                players.pop(player_id, None)
+        if row_count == 0:
             return []
 
-        # 選手データをID別の辞書に格納
-        players: Dict[str, PlayerData] = {}
-        for row in data[1:]:
-            try:
-                player = create_player_from_row(row)
-                players[player.id] = player
-            except ValueError as e:
-                logger.warning(f"選手データの作成に失敗しました: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"選手データの作成に失敗しました: {e}")
-                continue
-
         # 指定されたIDに対応する選手情報を取得
         result = []
         for pid in player_id_list:
             if pid in players:
-                result.append((pid, players[pid].name, players[pid].sex))
+                result.append((pid, *players[pid]))
             else:
                 logger.warning(f"選手ID '{pid}' に対応する選手が見つかりません")
                 send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"選手ID '{pid}' に対応する選手が見つかりません")
@@ -134,7 +124,7 @@ def get_player_info_by_id(player_id_list: List[str], csv_path: str) -> List[Tupl
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"選手情報取得中に予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
         raise
 
-def get_players_by_event(csv_path: str, event: Tuple[str, int], category: str = "mixed") -> List[PlayerData]:
+def get_players_by_event(csv_path: str, event: Tuple[str, int], category: str = "mixed") -> List[PlayerView]:
     """
     指定したイベントに参加する選手のリストを取得する。
 
@@ -151,27 +141,9 @@ def get_players_by_event(csv_path: str, event: Tuple[str, int], category: str =
         - ValueError: イベント情報やカテゴリが正しくない場合
     """
     try:
-        # CSVデータの読み込み
-        data = read_csv_data(csv_path)
-        if len(data) <= 1:  # ヘッダーのみ、またはデータなし
-            logger.warning(f"CSVファイルにデータがありません: {csv_path}")
-            send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"CSVファイルにデータがありません: {csv_path}")
-            return []
-
-        # 選手データの作成
-        players = []
-        for row in data[1:]:  # ヘッダーをスキップ
-            try:
-                player = create_player_from_row(row)
-                players.append(player)
-            except ValueError as e:
-                logger.warning(f"選手データの作成に失敗しました: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"選手データの作成に失敗しました: {e}")
-                continue
-
-        # 選手をグループ化してソート
-        sorted_dict = group_and_sort_all_events(players, category)
-        sorted_players = sorted_dict.get(event, [])
+        # 全種目を一括でソートしたインデックスを取得（同一CSVは再利用）
+        index = load_entry_index(csv_path, category)
+        sorted_players = index.get_players(event)
         
         logger.info(f"イベント {event} の選手を {len(sorted_players)}件 取得しました")
         return sorted_players
@@ -0,0 +1,157 @@
+# startup_budget.py
+# 役割: GUIの起動時に読み込まれるモジュールを python -X importtime で計測し、
+#       読み込み時間の予算と「起動時に読み込んではいけないモジュール」を確認する。
+#       予算を超えた場合・データ処理のライブラリが読み込まれていた場合は終了コード1で終わる（CIでの確認用）。
+#       同じ確認を test/test_startup_budget.py でも行う。
+# 変数:
+#   - STARTUP_MODULE: 起動時に読み込むモジュール（GUI/apps.py）
+#   - STARTUP_BUDGET_MS: 起動時の読み込み時間の予算（ミリ秒、環境変数で変更可）
+#   - DEFERRED_MODULES: ホーム画面の表示後に読み込むべきモジュール（起動時に読み込まれていたら違反）
+#   - QT_FREE_STARTUP_MODULES: PySide6 がない環境で代わりに計測する、起動時に読み込まれるQt以外のモジュール
+#
+# 実行例:
+#   python -m scripts.startup_budget
+#   python -m scripts.startup_budget --budget-ms 600 --top 15
+
+import argparse
+import os
+import subprocess
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+STARTUP_MODULE = "GUI.apps"
+STARTUP_BUDGET_MS = float(os.getenv("STARTUP_BUDGET_MS", "1000"))
+DEFERRED_MODULES = ("pandas", "numpy", "openpyxl", "requests", "jaconv", "main", "scripts")
+QT_FREE_STARTUP_MODULES = (
+    "module.config",
+    "module.send_message",
+    "module.progress",
+    "GUI.utils.file_manager",
+    "GUI.utils.pipeline_service",
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@dataclass
+class ImportProfile:
+    """
+    python -X importtime の計測結果。
+
+    属性:
+        - modules: 計測対象の import で読み込まれたモジュール名 -> 累積の読み込み時間（ミリ秒）
+        - total_ms: 計測対象の import 全体の読み込み時間（インタプリタ自体の起動分は除く）
+        - error: import に失敗した場合のエラーメッセージ
+    """
+    modules: Dict[str, float] = field(default_factory=dict)
+    total_ms: float = 0.0
+    error: Optional[str] = None
+
+    def deferred_violations(self, deferred: Sequence[str] = DEFERRED_MODULES) -> List[str]:
+        """
+        起動時に読み込まれていた、後から読み込むべきモジュールを返す。
+        """
+        return sorted(name for name in self.modules if name.split(".")[0] in deferred)
+
+
+def _run_importtime(code: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+
+
+def _parse_importtime(stderr: str) -> Dict[str, tuple]:
+    """
+    importtime の出力を モジュール名 -> (累積マイクロ秒, 入れ子の深さ) にする。
+    """
+    entries = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entries[name.strip()] = (int(cumulative), depth)
+    return entries
+
+
+def profile_imports(modules: Sequence[str]) -> ImportProfile:
+    """
+    新しいインタプリタで modules を import し、読み込まれたモジュールと時間を計測する。
+
+    引数:
+        - modules: 計測するモジュール名のリスト
+
+    戻り値:
+        - ImportProfile（import に失敗した場合は error にメッセージを入れる）
+    """
+    baseline = _parse_importtime(_run_importtime("pass").stderr)
+    result = _run_importtime("import " + ", ".join(modules))
+    profile = ImportProfile()
+    if result.returncode != 0:
+        lines = result.stderr.strip().splitlines()
+        profile.error = lines[-1] if lines else f"終了コード {result.returncode}"
+        return profile
+    for name, (cumulative, depth) in _parse_importtime(result.stderr).items():
+        if name in baseline:
+            continue
+        profile.modules[name] = cumulative / 1000
+        if depth == 0:
+            profile.total_ms += cumulative / 1000
+    return profile
+
+
+def profile_startup(module: str = STARTUP_MODULE) -> tuple:
+    """
+    GUIの起動時の読み込みを計測する。PySide6 がない環境では、起動時に読み込まれる
+    Qt以外のモジュール（QT_FREE_STARTUP_MODULES）を代わりに計測する。
+
+    戻り値:
+        - (計測したモジュール名のリスト, ImportProfile)
+    """
+    profile = profile_imports([module])
+    if profile.error and "PySide6" in profile.error:
+        print(f"{module} を読み込めないため、Qt以外の起動時のモジュールを計測します: {profile.error}")
+        return list(QT_FREE_STARTUP_MODULES), profile_imports(QT_FREE_STARTUP_MODULES)
+    return [module], profile
+
+
+def check_startup(profile: ImportProfile, budget_ms: float = STARTUP_BUDGET_MS) -> List[str]:
+    """
+    予算と後から読み込むべきモジュールを確認し、違反の内容を返す（問題がなければ空のリスト）。
+    """
+    if profile.error:
+        return [f"import に失敗しました: {profile.error}"]
+    problems = []
+    if profile.total_ms > budget_ms:
+        problems.append(f"起動時の読み込みが予算を超えています: {profile.total_ms:.1f} ms > {budget_ms:.0f} ms")
+    violations = profile.deferred_violations()
+    if violations:
+        problems.append("起動時に読み込まれています（ホーム画面の表示後に読み込むこと）: " + ", ".join(violations))
+    return problems
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="GUIの起動時の import 時間を計測し、予算を確認する")
+    parser.add_argument("--module", default=STARTUP_MODULE, help="計測する起動モジュール")
+    parser.add_argument("--budget-ms", type=float, default=STARTUP_BUDGET_MS, help="読み込み時間の予算（ミリ秒）")
+    parser.add_argument("--top", type=int, default=10, help="時間のかかったモジュールを表示する件数")
+    args = parser.parse_args()
+
+    targets, profile = profile_startup(args.module)
+    print(f"startup: {', '.join(targets)}")
+    if not profile.error:
+        print(f"  読み込み時間 {profile.total_ms:7.1f} ms（予算 {args.budget_ms:.0f} ms、{len(profile.modules)}モジュール）")
+        for name, ms in sorted(profile.modules.items(), key=lambda item: -item[1])[:args.top]:
+            print(f"  {ms:9.1f} ms  {name}")
+    problems = check_startup(profile, args.budget_ms)
+    for problem in problems:
+        print(f"NG: {problem}")
+    if problems:
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import os
 import logging
-import openpyxl
 import glob
-from typing import List
-from scripts.get_ID import get_player_id
-from dotenv import load_dotenv
+import argparse
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+from openpyxl.utils.cell import coordinate_from_string, column_index_from_string
+from module.entry_index import load_entry_index
+from module.template_cache import get_template_cache
+from module.parallel import resolve_worker_count, run_jobs
+from module.normalize import cache_stats
+from module.progress import STAGE_WRITE, as_reporter
+from module.instrumentation import KIND_EVENT, Span, capture_spans, record_spans, span
+from module.seeding import lane_order, resolve_circle_heats, seed_heats
+from module.xlsx_writer import WRITER_FAST, WRITER_OPENPYXL, resolve_writer
+from module.heat_layout import HeatLayout
+from module.config import load_config
 import traceback
 from module.send_message import send_slack_message
 
@@ -18,74 +28,84 @@ logger.addHandler(handler)
 
 def partition_names(names: List[str]) -> List[List[str]]:
     """
-    名前リスト（早い順）から、最終組を必ず6名にするため、
-    リストを反転（シート上で上が遅い、下が速い）し、
-    余り（r = len % 6）があればそれを1組目（上側）に、
-    残りを6名ずつのグループに分割する。
+    名前リスト（早い順）を、シート上の組（上が遅い、下が速い）ごとに分割する。
+    最終組は必ず6名にし、余り（len % 6）があればそれを1組目（上側）にする。
+    各組の中は遅い順に並べる（組分けは module.seeding で行う）。
     """
-    # 入力は早い順なので反転して遅い順にする
-    names_rev = names[::-1]
-    total = len(names_rev)
-    r = total % 6
-    groups = []
-    start = 0
-    if r != 0:
-        groups.append(names_rev[:r])
-        start = r
-    while start < total:
-        groups.append(names_rev[start : start + 6])
-        start += 6
-    return groups
+    table = seed_heats(len(names)).grid()
+    return [[names[i] for i in sorted(row[row >= 0].tolist(), reverse=True)] for row in table]
 
 def assign_group(group: List[str]) -> List[str]:
     """
     各グループ内で、中心から埋めるように名前を配置する。
     各グループは最終的に6コース（上からコース1～6）に対応するリストを返す。
-    割り当てパターン（速い順に並べた場合のコース割り当て）は：
-      最速 → コース4  
-      2番目 → コース3  
-      3番目 → コース5  
-      4番目 → コース2  
-      5番目 → コース6  
-      6番目 → コース1  
+    割り当てパターンは module.seeding.LANE_ORDERS[6]（最速 → コース4、以降 3, 5, 2, 6, 1）。
     ※グループの人数が6未満の場合は、パターンの先頭分だけ割り当て、残りは空文字列とする。
     """
-    pattern = [4, 3, 5, 2, 6, 1]  # 割り当てるコース番号（1～6）
-    # グループ内を速い順（降順）にする
-    sorted_group = group[::-1]
-    # 結果はコース1～6の順（インデックス0～5）
     result = ["" for _ in range(6)]
-    for i, name in enumerate(sorted_group):
-        if i < len(pattern):
-            course = pattern[i]
-            result[course - 1] = name
+    # グループは遅い順なので、反転して速い順にコースを割り当てる
+    for name, course in zip(group[::-1], lane_order(6)):
+        result[course - 1] = name
     return result
 
+def fill_player_cells(ws, cell: str, data: Tuple) -> None:
+    """
+    IDを書き込んだセルを起点に、選手の名前・フリガナ・学校名・学年を書き込む。
+    名前はIDのセルを上書きし、フリガナ・学校名・学年はその右隣の3列に書き込む。
+    値がNoneの項目は書き込まない。
+
+    引数:
+        - ws: 書き込み先のワークシート
+        - cell: IDを書き込んだセル（例: "B4"）
+        - data: (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年)
+    """
+    col_letter, row_number = coordinate_from_string(cell)
+    col_index = column_index_from_string(col_letter)
+    name, hurigana, school, grade = data
+    if name is not None:
+        ws[cell].value = name
+    if hurigana is not None:
+        ws.cell(row=row_number, column=col_index + 1).value = hurigana
+    if school is not None:
+        ws.cell(row=row_number, column=col_index + 2).value = school
+    if grade is not None:
+        ws.cell(row=row_number, column=col_index + 3).value = grade
+
 def write_to_excel(
     input_filename: str, 
     output_filename: str, 
     sheet_name: str, 
-    cells: List[List[str]], 
+    cells: Optional[List[List[str]]],
     names: List[str],
-    result_data_file: str
+    result_data_file: str,
+    player_data: Optional[Dict[str, Tuple]] = None,
+    circle_heats: int = 0,
+    writer: Optional[str] = None
 ) -> bool:
     """
     指定したExcelのシートに選手IDを記入する。
+    player_data を指定した場合は、IDの代わりに選手情報を配置と同時に書き込み、
+    fill_name による補完済みと同じ内容のワークブックを1回の保存で出力する。
 
     引数:
         - input_filename: 元となるExcelテンプレートファイル
         - output_filename: 出力するExcelファイル名
         - sheet_name: 書き込むシート名
-        - cells: 書き込むセルのリスト（各リストはシート上のコース1～6に対応）
+        - cells: 書き込むセルのリスト（各リストはシート上の1組分で、コース1～の順）。
+                 None の場合はテンプレートのシートから求めた組ブロックの配置を使う
         - names: 書き込む選手IDリスト（早い順）
+        - result_data_file: 出力先フォルダ
+        - player_data: 選手ID -> (氏名, ﾌﾘｶﾞﾅ, 学校名, 学年) の辞書（省略時はIDのみ書き込む）
+        - circle_heats: 最終組から何組をサークルシーディングするか（0 で行わない）
+        - writer: 保存方式（openpyxl / fast、省略時は環境変数 HEAT_SHEET_WRITER）
 
     戻り値:
         - 書き込みに成功した場合はTrue、失敗した場合はFalse
     """
     try:
-        logger.info(f"Excelファイルを読み込み中: {input_filename}")
+        logger.info(f"テンプレートを取得中: {input_filename}")
         try:
-            wb = openpyxl.load_workbook(input_filename)
+            template = get_template_cache(input_filename)
         except FileNotFoundError as e:
             logger.error(f"テンプレートファイルが見つかりません: {input_filename} - {e}")
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"テンプレートファイルが見つかりません: {input_filename} - {e}")
@@ -99,40 +119,42 @@ def write_to_excel(
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"ファイルの読み込み中に予期しないエラーが発生しました: {input_filename} - {e}\n{traceback.format_exc()}")
             return False
 
-        if sheet_name not in wb.sheetnames:
+        if sheet_name not in template.sheetnames:
             logger.error(f"指定されたシート名が存在しません: '{sheet_name}'")
             send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"指定されたシート名が存在しません: '{sheet_name}'")
             raise ValueError(f"シート名 '{sheet_name}' が見つかりません。")
 
-        # 新しいワークブックを作成し、テンプレートシートの内容をコピーする
-        new_wb = openpyxl.Workbook()
-        new_wb.remove(new_wb.active)  # 初期シート削除
-        ws_original = wb[sheet_name]
-        ws_new = new_wb.create_sheet(title=sheet_name)
-        for row in ws_original.iter_rows():
-            for cell in row:
-                ws_new[cell.coordinate] = cell.value
-
         print("入力名前リスト（早い順）の最初の20件:", names[:20])
-        # グループ分け：シート上は上が遅い人、最終組は6名で速い人
-        groups = partition_names(names)
-        print("グループごとの人数:", [len(g) for g in groups])
-        # 各グループ内を、中心から埋める（各グループ結果はコース1～6の順）に再配置
-        assigned_groups = [assign_group(group) for group in groups]
-        print("各グループ再配置後（コース1～6順）の内容:")
-        for idx, grp in enumerate(assigned_groups, start=1):
-            print(f"組 {idx}: {grp}")
-
-        # セル配置情報（cells）とグループごとの名前リストを対応付けて書き込み
-        for cell_group, name_group in zip(cells, assigned_groups):
-            for cell, name in zip(cell_group, name_group):
-                ws_new[cell] = name
+        # 書き込み先の組ブロック（組 × コース の行・列番号）
+        layout = template.layout(sheet_name) if cells is None else HeatLayout.from_coordinates(sheet_name, cells)
+
+        # 組分けとコース配置：シート上は上が遅い組、最終組は満員で速い人
+        assignment = seed_heats(len(names), lanes=layout.lane_count, circle_heats=circle_heats)
+        print("グループごとの人数:", assignment.heat_sizes().tolist())
+
+        # 選手ID（player_data があれば氏名・フリガナ・学校名・学年、氏名がなければIDのまま）を整数の行・列で書き込む
+        if player_data is None:
+            fields = [(player_id,) for player_id in names]
+        else:
+            fields = []
+            for player_id in names:
+                # 空のIDは名簿を引かない（fill_name で補完する場合と同じく何も書き込まれない）
+                data = player_data.get(player_id) if player_id else None
+                if data is None:
+                    fields.append((player_id,))
+                else:
+                    fields.append((player_id if data[0] is None else data[0],) + tuple(data[1:]))
+        # テンプレートシートを書式・列幅ごと複製して書き込み、保存する
+        # （1シートに入りきらない組は、テンプレートシートの複製を追加して続きに書き込む）
+        n_pages = layout.page_count(assignment.n_heats)
+        if n_pages > 1:
+            logger.info(f"{output_filename}: {assignment.n_heats}組を{n_pages}シートに分けて書き込みます")
 
         try:
             os.makedirs(result_data_file, exist_ok=True)
             output_path = os.path.join(result_data_file, output_filename)
-            new_wb.save(output_path)
-            logger.info(f"Excelファイルを保存しました: {output_path}")
+            used = template.save_heats(sheet_name, assignment.heats, assignment.lanes, fields, output_path, layout, writer)
+            logger.info(f"Excelファイルを保存しました: {output_path} ({used})")
             return True
         except PermissionError as e:
             logger.error(f"ファイルへの書き込み権限がありません: {e}")
@@ -147,6 +169,61 @@ def write_to_excel(
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"Excel書き込み処理全体で予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
         return False
 
+@dataclass
+class EventJob:
+    """
+    1イベント分のExcel書き込みに必要な情報（ワーカープロセスへ受け渡す）。
+    """
+    event: Tuple[str, int]
+    template_file: str
+    output_filename: str
+    sheet_name: str
+    cells: Optional[List[List[str]]]
+    ids: List[str]
+    result_data_file: str
+    player_data: Optional[Dict[str, Tuple]] = None
+    circle_heats: int = 0
+    writer: Optional[str] = None
+
+
+@dataclass
+class EventResult:
+    """
+    1イベント分の処理結果。
+    """
+    event: Tuple[str, int]
+    success: bool
+    error: Optional[str] = None
+
+
+def warm_template_cache(template_file: str) -> None:
+    """
+    ワーカープロセスの起動時にテンプレートを解析しておく。
+    """
+    try:
+        get_template_cache(template_file)
+    except Exception as e:
+        logger.warning(f"テンプレートの事前読み込みに失敗しました: {template_file} - {e}")
+
+
+def write_event_job(job: EventJob) -> Tuple[bool, List[Span]]:
+    """
+    1イベント分のExcelを書き込む（run_jobs から呼ばれる）。
+    ワーカープロセスで実行しても計測結果を親プロセスの実行レポートに残せるよう、
+    計測した区間を結果と一緒に返す。
+
+    戻り値:
+        - (書き込みに成功したか, 計測した区間のリスト)
+    """
+    stroke, distance = job.event
+    with capture_spans() as spans:
+        with span(f"{stroke}{distance}", KIND_EVENT, rows=len(job.ids), file=job.output_filename):
+            success = write_to_excel(
+                job.template_file, job.output_filename, job.sheet_name,
+                job.cells, job.ids, job.result_data_file, job.player_data, job.circle_heats, job.writer
+            )
+    return success, spans
+
 def clean_output_directory(directory: str, pattern: str = "*.xlsx") -> int:
     """
     指定ディレクトリ内の特定パターンに一致するファイルを削除する。
@@ -183,15 +260,24 @@ def clean_output_directory(directory: str, pattern: str = "*.xlsx") -> int:
         logger.error(f"ディレクトリのクリーン処理中にエラーが発生しました: {directory} - {e}")
         return deleted_count
 
-def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None, template_file=None) -> None:
+def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None, template_file=None, fill_player_data=False,
+         workers=None, on_event_result: Optional[Callable[["EventResult"], None]] = None, circle_heats=None,
+         writer=None, progress=None) -> None:
     """
     メイン処理:
       1. 競技別に選手ID（名前）を取得
       2. Excelテンプレートの指定シートに選手IDを書き込む
       3. 各イベントごとに処理結果を出力する
+    fill_player_data がTrueの場合は、IDの代わりに選手情報（名前・フリガナ・学校名・学年）を
+    書き込んだ完成版を出力する（fill_name による補完は不要になる）。
+    workers（省略時は環境変数 HEAT_SHEET_WORKERS）が2以上の場合はイベントを並列に書き込む。
+    circle_heats（省略時は環境変数 CIRCLE_SEED_HEATS）を2以上にすると、最終組からその組数をサークルシーディングする。
+    writer（省略時は環境変数 HEAT_SHEET_WRITER）を fast にすると、シートのXMLへ直接値を差し込んで高速に保存する。
+    on_event_result を指定すると、イベントが完了するたびに EventResult を渡して呼び出す。
+    progress（ProgressReporter またはコールバック）を指定すると、イベントごとに進捗を通知する。
     """
     # 引数優先、なければ環境変数
-    load_dotenv()
+    load_config()
     result_data_file = result_data_file or os.getenv("RESULT_DATA_FILE", "result_output_folder")
     input_data_file = input_data_file or os.getenv("INPUT_DATA_FILE", "input_data_folder")
     merged_csv_data_file = merged_csv_data_file or os.path.join(input_data_file, os.getenv("MERGED_CSV_DATA_FILE", "merged_output.csv"))
@@ -226,79 +312,103 @@ def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None,
         deleted_count = clean_output_directory(result_data_file)
         print(f"{result_data_file}内の過去データである.xlsxファイルを{deleted_count}件削除しました。")
 
-        # 各距離に対するセル設定（必要な距離のみ設定）
-        cell_config = {
-            50: ["B", "I", "P", "W", "AD", "AK", "AR", "AY", "BF", "BM"],
-            100: ["B", "J", "Q", "Y", "AF", "AN", "AT", "BH", "BO"],
-            200: ["B", "L", "V", "AF", "AP"],
-            400: ["B", "P", "AD"],
-        }
+        # テンプレートを解析し、距離別シートの組ブロックの配置（セルの行・列番号）はシートごとに1回だけ求める
+        template = get_template_cache(template_file)
+
+        # 結合CSVを一度だけ読み込み、全種目のソート済みリストを構築する
+        index = load_entry_index(merged_csv_data_file, category="mixed")
+        circle_heats = resolve_circle_heats(circle_heats)
+        writer = resolve_writer(writer)
 
         # 全種目の組み合わせを生成
         events = [
             (stroke, distance)
             for stroke in ["im", "fly", "ba", "br", "fr"]
             for distance in [50, 100, 200, 400]
-            if distance in cell_config  # セル設定がある距離のみ対象
+            if f"{distance}m" in template.sheetnames  # テンプレートにシートがある距離のみ対象
         ]
 
+        reporter = as_reporter(progress, [STAGE_WRITE])
+        reporter.start_stage(STAGE_WRITE, len(events))
         successful_events = 0
         failed_events = 0
 
-        # 各種目ごとに選手IDを取得し、Excelに書き込む
+        # 各種目ごとに選手IDを取得し、書き込みジョブを作成する
+        jobs: List[EventJob] = []
         for stroke, distance in events:
+            reporter.checkpoint()
             logger.info(f"イベント {stroke}{distance} の処理を開始")
 
-            # セル設定が存在するか確認
-            if distance not in cell_config:
-                logger.warning(f"距離 {distance}m のセル設定が存在しません")
+            # 組ブロックの配置が求められるか確認（書き込みはワーカー側でも同じ配置を使う）
+            try:
+                template.layout(f"{distance}m")
+            except ValueError as e:
+                logger.warning(f"距離 {distance}m の組ブロックの配置を求められません: {e}")
+                reporter.advance(f"{stroke}{distance}")
                 continue
 
-            prefixes = cell_config[distance]
-            # セルのリストを、各グループ（コース1～6）に対応するよう作成
-            # 【修正】行番号の開始位置を 7 から 4 に変更
-            cells = [
-                [f"{prefix}{4 + i * 10 + j}" for j in range(6)]
-                for prefix in prefixes
-                for i in range(6)
-            ]
-
             # 選手ID（ここでは名前リスト）を取得する
-            ids = get_player_id(merged_csv_data_file, (stroke, distance), category="mixed")
+            ids = index.get_player_ids((stroke, distance))
             if not ids:
                 logger.warning(f"イベント {stroke}{distance} のIDデータが見つかりません")
                 # send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"イベント {stroke}{distance} のIDデータが見つかりません。")
                 failed_events += 1
+                if on_event_result:
+                    on_event_result(EventResult((stroke, distance), False, "IDデータが見つかりません"))
+                reporter.advance(f"{stroke}{distance}")
                 continue
 
-            output_filename = f"{distance}{stroke}_id.xlsx"
-            sheet_name = f"{distance}m"
-            try:
-                success = write_to_excel(template_file, output_filename, sheet_name, cells, ids, result_data_file)
-                if success:
+            jobs.append(EventJob(
+                event=(stroke, distance),
+                template_file=template_file,
+                output_filename=f"{distance}{stroke}_id.xlsx",
+                sheet_name=f"{distance}m",
+                cells=None,
+                ids=ids,
+                result_data_file=result_data_file,
+                player_data=index.get_player_data(ids) if fill_player_data else None,
+                circle_heats=circle_heats,
+                writer=writer,
+            ))
+
+        # 各イベントのExcelを書き込む（ワーカー数が2以上ならプロセスを分けて並列に実行）
+        workers = resolve_worker_count(workers)
+        # 中止が要求された場合は、その時点で実行中のイベントだけを待ち、未着手のイベントは実行しない
+        results = run_jobs(write_event_job, jobs, workers, warm_template_cache, (template_file,))
+        try:
+            for job, outcome, error in results:
+                stroke, distance = job.event
+                success, spans = outcome if outcome is not None else (False, [])
+                record_spans(spans)
+                if error is None and success:
                     successful_events += 1
                     logger.info(f"イベント {stroke}{distance} の処理が成功しました")
-                else:
+                elif error is None:
                     failed_events += 1
                     logger.error(f"イベント {stroke}{distance} の処理が失敗しました")
-            except FileNotFoundError as e:
-                logger.error(f"ファイルが見つかりません: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"ファイルが見つかりません: {e}")
-                failed_events += 1
-                continue
-            except ValueError as e:
-                logger.error(f"イベント {stroke}{distance} の処理中に値エラーが発生しました: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"イベント {stroke}{distance} の処理中に値エラーが発生しました: {e}")
-                failed_events += 1
-                continue
-            except Exception as e:
-                logger.error(f"イベント {stroke}{distance} の処理中に予期しないエラーが発生しました: {e}")
-                send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"イベント {stroke}{distance} の処理中に予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
-                failed_events += 1
-                continue
+                else:
+                    failed_events += 1
+                    detail = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+                    if isinstance(error, FileNotFoundError):
+                        logger.error(f"ファイルが見つかりません: {error}")
+                        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"ファイルが見つかりません: {error}")
+                    elif isinstance(error, ValueError):
+                        logger.error(f"イベント {stroke}{distance} の処理中に値エラーが発生しました: {error}")
+                        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"イベント {stroke}{distance} の処理中に値エラーが発生しました: {error}")
+                    else:
+                        logger.error(f"イベント {stroke}{distance} の処理中に予期しないエラーが発生しました: {error}")
+                        send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"イベント {stroke}{distance} の処理中に予期しないエラーが発生しました: {error}\n{detail}")
+                if on_event_result:
+                    on_event_result(EventResult(job.event, error is None and bool(success), None if error is None else str(error)))
+                reporter.advance(f"{stroke}{distance}")
+                reporter.checkpoint()
+        finally:
+            results.close()
+        reporter.finish_stage()
 
         # 処理結果のサマリーを出力
         logger.info(f"処理完了: 成功={successful_events}件, 失敗={failed_events}件")
+        logger.info(f"文字列正規化キャッシュ: {cache_stats()}")
         if successful_events > 0:
             logger.info(f"処理が完了しました。{successful_events}件のイベントを正常に処理しました。")
         if failed_events > 0:
@@ -309,4 +419,10 @@ def main(result_data_file=None, input_data_file=None, merged_csv_data_file=None,
         send_slack_message(os.getenv("APP_NAME", "AquaProgrammer"), f"予期しないエラーが発生しました: {e}\n{traceback.format_exc()}")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="競技プログラム（種目別Excel）を作成する")
+    parser.add_argument("--workers", default=None, help="並列に書き込むプロセス数（auto でCPU数、省略時は環境変数 HEAT_SHEET_WORKERS）")
+    parser.add_argument("--fill-player-data", action="store_true", help="IDの代わりに選手情報を書き込んだ完成版を出力する")
+    parser.add_argument("--circle-heats", default=None, help="最終組から何組をサークルシーディングするか（省略時は環境変数 CIRCLE_SEED_HEATS、0 で行わない）")
+    parser.add_argument("--writer", default=None, choices=[WRITER_OPENPYXL, WRITER_FAST], help="Excelの保存方式（省略時は環境変数 HEAT_SHEET_WRITER、既定は openpyxl）")
+    args = parser.parse_args()
+    main(fill_player_data=args.fill_player_data, workers=args.workers, circle_heats=args.circle_heats, writer=args.writer)
@@ -0,0 +1,12 @@
+# conftest.py
+# 役割: test/ のテストからリポジトリ直下のパッケージ（module・scripts・GUI）を import できるようにする。
+# 変数:
+#   - REPO_ROOT: リポジトリ直下のパス
+
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
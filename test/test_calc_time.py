@@ -0,0 +1,133 @@
+# test_calc_time.py
+# 役割: タイムの一括変換（parse_times_centis）が、1件ずつの parse_time_str と同じ解釈になることを確認する。
+
+import math
+import random
+import numpy as np
+import pytest
+import module.calc_time as calc_time
+from module.calc_time import parse_time_str, parse_times_centis
+
+
+@pytest.fixture(autouse=True)
+def no_slack(monkeypatch):
+    """ parse_time_str のエラー通知を外に送らない """
+    monkeypatch.setattr(calc_time, "send_slack_message", lambda *args, **kwargs: None)
+
+
+def reference_centis(text):
+    """
+    parse_time_str で1件をセンチ秒に変換する（未エントリーは NaN、解釈できない値は None）
+    """
+    try:
+        seconds = parse_time_str(text)
+    except ValueError:
+        return None
+    if seconds == 999999.9:
+        return math.nan
+    return round(seconds * 100)
+
+
+def random_time(rng):
+    """ 正常な形式と崩れた形式を混ぜたタイム文字列を作る """
+    minutes = rng.choice(["", "0", "1", "2", "12", "007"])
+    seconds = f"{rng.randint(0, 59):0{rng.choice([1, 2])}d}"
+    frac = rng.choice(["", ".", ".5", ".05", ".50", ".123"])
+    body = seconds + frac
+    kind = rng.random()
+    if kind < 0.3:
+        text = body
+    elif kind < 0.6:
+        text = f"{minutes}:{body}"
+    elif kind < 0.7:
+        text = f"{minutes}:{body}:{seconds}"
+    elif kind < 0.8:
+        text = rng.choice(["", "0", " ", "DNS", "1:", ":", "..", "1e2", "-5.0", "+3", "1.2.3"])
+    else:
+        text = body
+    return rng.choice(["", " "]) + text + rng.choice(["", " "])
+
+
+def assert_same(actual, expected):
+    for value, (text, want) in zip(actual, expected):
+        if want is None or math.isnan(want):
+            assert math.isnan(value), text
+        else:
+            assert value == want, text
+
+
+@pytest.mark.parametrize("text, centis", [
+    ("1:23.45", 8345),
+    ("0:59.99", 5999),
+    ("12:05.10", 72510),
+    ("2:20", 14000),
+    ("58.12", 5812),
+    ("58.1", 5810),
+    ("58", 5800),
+    (" 31.07 ", 3107),
+    (":58.12", 5812),
+    (":05.3", 530),
+])
+def test_fixed_formats(text, centis):
+    assert parse_times_centis([text])[0] == centis
+    assert reference_centis(text) == centis
+
+
+@pytest.mark.parametrize("text", ["", "0", " ", " 0 ", None])
+def test_no_entry_is_nan(text):
+    assert math.isnan(parse_times_centis([text])[0])
+
+
+def test_empty_input():
+    assert parse_times_centis([]).shape == (0,)
+    assert parse_times_centis(["", ""]).shape == (2,)
+
+
+@pytest.mark.parametrize("text", ["DNS", "1:2:3", "1.2.3", "1:", ":", "abc"])
+def test_errors_raise(text):
+    with pytest.raises(ValueError):
+        parse_time_str(text)
+    with pytest.raises(ValueError):
+        parse_times_centis(["1:00.00", text])
+
+
+@pytest.mark.parametrize("text", ["DNS", "1:2:3", "1.2.3", "1:", ":", "abc"])
+def test_errors_coerce(text):
+    centis = parse_times_centis(["1:00.00", text, "30.00"], errors="coerce")
+    assert centis[0] == 6000
+    assert math.isnan(centis[1])
+    assert centis[2] == 3000
+
+
+def test_slow_path_formats_match():
+    # 符号・指数・小数第3位以降は1件ずつの解釈に回る
+    texts = ["-5.0", "+3", "1e2", "58.125", "1:05.125", "0058.1"]
+    expected = [(text, reference_centis(text)) for text in texts]
+    assert_same(parse_times_centis(texts), expected)
+
+
+def test_random_inputs_match_parse_time_str():
+    rng = random.Random(0)
+    texts = [random_time(rng) for _ in range(3000)]
+    expected = [(text, reference_centis(text)) for text in texts]
+    assert_same(parse_times_centis(texts, errors="coerce"), expected)
+    valid = [text for text, want in expected if want is not None]
+    assert_same(parse_times_centis(valid), [pair for pair in expected if pair[1] is not None])
+
+
+@pytest.mark.parametrize("value, centis", [
+    (220.0, 14000),
+    (65.3, 6530),
+    (59.99, 5999),
+    (100.0, 6000),
+    (1005.5, 60550),
+    ("220.00", 14000),
+])
+def test_packed_numeric(value, centis):
+    assert parse_times_centis([value], packed_numeric=True)[0] == centis
+
+
+def test_packed_numeric_non_numeric_is_nan():
+    centis = parse_times_centis([220.0, np.nan, "", "DNS"], packed_numeric=True)
+    assert centis[0] == 14000
+    assert np.isnan(centis[1:]).all()
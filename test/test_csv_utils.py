@@ -0,0 +1,66 @@
+# test_csv_utils.py
+# 役割: CSVの読み込み（read_csv_data・iter_csv_rows）のエンコーディング判定とキャッシュを確認する。
+#       判定は先頭 SNIFF_BYTES バイトで行うため、それより後ろにだけ候補でデコードできない文字があるファイルを使う。
+
+import csv
+import pytest
+from module import csv_utils
+from module.csv_utils import SNIFF_BYTES, iter_csv_rows, read_csv_data, read_text
+
+
+@pytest.fixture(autouse=True)
+def clear_encoding_caches():
+    csv_utils._ENCODING_CACHE.clear()
+    csv_utils._STREAM_ENCODING_CACHE.clear()
+    yield
+    csv_utils._ENCODING_CACHE.clear()
+    csv_utils._STREAM_ENCODING_CACHE.clear()
+
+
+def write_late_cp932(path, late_text="①学校"):
+    """
+    先頭 SNIFF_BYTES バイトは shift-jis としても読め、その後ろに cp932 にしかない文字がある約110KBのCSVを書く。
+    """
+    rows = [["ID", "氏名", "学校名"]]
+    size = 0
+    while size < SNIFF_BYTES + 40 * 1024:
+        row = [str(len(rows)), f"選手{len(rows):05d}", "学校"]
+        rows.append(row)
+        size += len(",".join(row).encode("cp932")) + 2
+    rows.append([str(len(rows)), "選手", late_text])
+    with open(path, "w", encoding="cp932", newline="") as f:
+        csv.writer(f).writerows(rows)
+    return rows
+
+
+def test_iter_csv_rows_reads_late_cp932_characters(tmp_path):
+    path = str(tmp_path / "late_cp932.csv")
+    rows = write_late_cp932(path)
+    assert list(iter_csv_rows(path)) == rows
+    assert list(iter_csv_rows(path, columns=[-1, 1], skip_header=True))[-1] == ["①学校", "選手"]
+    # 2回目はキャッシュしたエンコーディングを使う
+    assert csv_utils._STREAM_ENCODING_CACHE[str(tmp_path / "late_cp932.csv")][2] == "cp932"
+    assert list(iter_csv_rows(path)) == rows
+
+
+def test_encoding_is_cached_only_after_full_decode(tmp_path):
+    path = str(tmp_path / "late_cp932.csv")
+    rows = write_late_cp932(path)
+    # 先頭部分だけなら shift-jis と判定される
+    with open(path, "rb") as f:
+        assert csv_utils.detect_encoding(f.read(SNIFF_BYTES)) == "shift-jis"
+
+    text, encoding = read_text(path)
+    assert encoding == "cp932"
+    assert csv_utils._ENCODING_CACHE[path][2] == "cp932"
+    assert read_csv_data(path) == rows
+    # 1行ずつの読み込みは read_text のキャッシュを使わず、別に確かめる
+    assert path not in csv_utils._STREAM_ENCODING_CACHE
+    assert list(iter_csv_rows(path)) == rows
+
+
+def test_iter_csv_rows_rejects_undecodable_file(tmp_path):
+    path = tmp_path / "broken.csv"
+    path.write_bytes(b"ID,name\n1," + b"\x82\xff" * 10 + b"\n")
+    with pytest.raises(UnicodeDecodeError):
+        list(iter_csv_rows(str(path)))
@@ -0,0 +1,72 @@
+# test_data_convert.py
+# 役割: DataConvert のタイム整形（百の位以上を分とする数値 → "m:ss.xx"）と文字列の列の正規化を確認する。
+
+import numpy as np
+import pandas as pd
+import pytest
+from scripts.DataConvert import (
+    convert_csv,
+    convert_frame,
+    convert_time_column,
+    convert_to_time_format,
+    normalize_column,
+)
+
+
+@pytest.mark.parametrize("value, text", [
+    (220.0, "2:20.00"),
+    (105.3, "1:05.30"),
+    (100.0, "1:00.00"),
+    (1005.5, "10:05.50"),
+    (59.99, "59.99"),
+    (58.1, "58.10"),
+    (8.05, "8.05"),
+    (0.0, "0.00"),
+])
+def test_time_format(value, text):
+    assert convert_to_time_format(value) == text
+    assert convert_time_column(pd.Series([value])).tolist() == [text]
+
+
+def test_time_column_keeps_non_numeric_and_missing():
+    series = pd.Series([220.0, "1:05.30", np.nan, "DNS", "31.07", 220.0], name="50Fr")
+    converted = convert_time_column(series)
+    assert converted.name == "50Fr"
+    assert converted.tolist()[:2] == ["2:20.00", "1:05.30"]
+    assert pd.isna(converted.iloc[2])
+    assert converted.tolist()[3:] == ["DNS", "31.07", "2:20.00"]
+    assert pd.isna(convert_to_time_format(np.nan))
+
+
+def test_normalize_column():
+    series = pd.Series(["ヤマダ\u3000タロウ", None, "東京高校", "ヤマダ\u3000タロウ"], index=[3, 5, 7, 9])
+    converted = normalize_column(series)
+    assert converted.index.tolist() == [3, 5, 7, 9]
+    assert converted.tolist()[0] == "ﾔﾏﾀﾞ ﾀﾛｳ"
+    assert pd.isna(converted.iloc[1])
+    assert converted.tolist()[2:] == ["東京高校", "ﾔﾏﾀﾞ ﾀﾛｳ"]
+    assert normalize_column(pd.Series([], dtype=object)).tolist() == []
+
+
+def test_convert_frame_only_touches_strings_and_times(tmp_path):
+    df = pd.DataFrame({
+        "ﾌﾘｶﾞﾅ": ["スズキ\u3000ハナコ", "サトウ\u3000ジロウ"],
+        "学年": [1, 2],
+        "50Fr": [31.07, np.nan],
+        "400Fr": [455.2, 1005.5],
+    })
+    converted = convert_frame(df)
+    assert converted["ﾌﾘｶﾞﾅ"].tolist() == ["ｽｽﾞｷ ﾊﾅｺ", "ｻﾄｳ ｼﾞﾛｳ"]
+    assert converted["学年"].tolist() == [1, 2]
+    assert converted["50Fr"].iloc[0] == "31.07" and pd.isna(converted["50Fr"].iloc[1])
+    assert converted["400Fr"].tolist() == ["4:55.20", "10:05.50"]
+    # 元の DataFrame は変更しない
+    assert df["400Fr"].tolist() == [455.2, 1005.5]
+
+    input_csv = tmp_path / "merged_output.csv"
+    output_csv = tmp_path / "merged_output_converted.csv"
+    df.to_csv(input_csv, index=False, encoding="utf-8-sig")
+    convert_csv(str(input_csv), str(output_csv))
+    written = pd.read_csv(output_csv, encoding="utf-8", dtype=str)
+    assert written["400Fr"].tolist() == ["4:55.20", "10:05.50"]
+    assert written["ﾌﾘｶﾞﾅ"].tolist() == ["ｽｽﾞｷ ﾊﾅｺ", "ｻﾄｳ ｼﾞﾛｳ"]
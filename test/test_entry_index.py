@@ -0,0 +1,54 @@
+# test_entry_index.py
+# 役割: エントリーインデックス（EntryIndex）が組表へ書き込む選手情報を確認する。
+
+import csv
+import os
+import openpyxl
+from module.entry_index import load_entry_index
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def _write_merged_csv(path, edit):
+    with open(os.path.join(TEST_DIR, "merged_output.csv"), encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.reader(f))
+    edit(rows)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(rows)
+
+
+def test_player_data_keeps_csv_strings(tmp_path):
+    # fill_name は結合CSVに書かれた文字列のまま（全角スペースも含めて）組表へ書き込む
+    def edit(rows):
+        rows[1][2] = "ｾﾝｼｭ\u3000N"
+        rows[1][-1] = "1"
+
+    csv_path = str(tmp_path / "merged_output.csv")
+    _write_merged_csv(csv_path, edit)
+    index = load_entry_index(csv_path, use_cache=False)
+
+    assert index.get_player_data(["1", "999"]) == {
+        "1": ("渡邉 斗南", "ｾﾝｼｭ\u3000N", "ｺﾏﾊﾞ", "高2"),
+        "999": (None, None, None, None),
+    }
+    # PlayerData 互換の参照では従来どおり全角スペースを半角にする
+    assert index.roster.view(0).hurigana == "ｾﾝｼｭ N"
+
+
+def test_numeric_grades_are_written_as_numbers(tmp_path):
+    # 従来（pd.read_csv で結合CSVを読んでいた版）は数字だけの学年列を数値として組表に書き込んでいた
+    from scripts.write_ID import main as write_id
+
+    csv_path = os.path.join(TEST_DIR, "synthetic_merged_output.csv")
+    index = load_entry_index(csv_path, use_cache=False)
+    grades = {data[3] for data in index.get_player_data([str(i) for i in range(1, 151)]).values()}
+    assert grades == {1, 2, 3}
+
+    result_dir = str(tmp_path / "result")
+    write_id(result_dir, result_dir, csv_path, os.path.join(os.path.dirname(TEST_DIR), "template.xlsx"), fill_player_data=True, workers=1)
+    expected = openpyxl.load_workbook(os.path.join(TEST_DIR, "expected", "baseline", "50fr_id.xlsx")).active
+    actual = openpyxl.load_workbook(os.path.join(result_dir, "50fr_id.xlsx")).active
+    grade_cells = [cell.coordinate for row in expected.iter_rows(min_col=5, max_col=5) for cell in row if isinstance(cell.value, int)]
+    assert grade_cells
+    for coordinate in grade_cells:
+        assert (actual[coordinate].value, type(actual[coordinate].value)) == (expected[coordinate].value, int)
@@ -0,0 +1,56 @@
+# test_heat_sheet_modes.py
+# 役割: 選手情報を配置と同時に書き込む fused モードと、ID書き込み後に fill_name で補完する two_phase モードの組表を、
+#       従来版の出力（test/expected/baseline/）とセルの値・型まで比べる。
+#       従来版の出力は、test/synthetic_merged_output.csv（scripts.benchmark.write_synthetic_roster で作成した
+#       IDのある150名の名簿）から、変更前の write_ID → fill_name で作成したもの。
+#       200m・400m の6組目以降は従来版の書き込み位置が印刷範囲外だったため、どの種目も5組以内の名簿にしている。
+
+import os
+import openpyxl
+import pytest
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TEST_DIR)
+CSV_PATH = os.path.join(TEST_DIR, "synthetic_merged_output.csv")
+BASELINE_DIR = os.path.join(TEST_DIR, "expected", "baseline")
+TEMPLATE_PATH = os.path.join(REPO_ROOT, "template.xlsx")
+
+
+def run_mode(result_dir, mode, monkeypatch):
+    """ 名簿から全種目の組表を作成する """
+    monkeypatch.setenv("MERGED_CSV_DATA_FILE", CSV_PATH)
+    from scripts.write_ID import main as write_id
+
+    if mode == "fused":
+        write_id(result_dir, result_dir, CSV_PATH, TEMPLATE_PATH, fill_player_data=True, workers=1)
+    else:
+        from scripts.fill_name import main as fill_name
+
+        write_id(result_dir, result_dir, CSV_PATH, TEMPLATE_PATH, workers=1)
+        fill_name(result_dir, CSV_PATH, TEMPLATE_PATH)
+
+
+def read_cells(path):
+    """ 組表の全シートの値のあるセルを シート名 -> {セル番地: (値, 型)} にする """
+    wb = openpyxl.load_workbook(path)
+    return {
+        ws.title: {cell.coordinate: (cell.value, type(cell.value)) for row in ws.iter_rows() for cell in row if cell.value is not None}
+        for ws in wb.worksheets
+    }
+
+
+@pytest.mark.parametrize("mode", ["fused", "two_phase"])
+def test_matches_baseline_output(tmp_path, monkeypatch, mode):
+    result_dir = str(tmp_path / mode)
+    run_mode(result_dir, mode, monkeypatch)
+    expected_files = sorted(name for name in os.listdir(BASELINE_DIR) if name.endswith(".xlsx"))
+    assert sorted(name for name in os.listdir(result_dir) if name.endswith(".xlsx")) == expected_files
+
+    filled = 0
+    for name in expected_files:
+        expected = read_cells(os.path.join(BASELINE_DIR, name))
+        actual = read_cells(os.path.join(result_dir, name))
+        assert actual == expected, name
+        filled += sum(value[0].startswith("選手") for cells in expected.values() for value in cells.values() if isinstance(value[0], str))
+    # 名簿の全エントリー（150名 × 2種目）の氏名が書き込まれていること
+    assert filled == 300
@@ -0,0 +1,69 @@
+# test_pagination.py
+# 役割: テンプレートの組ブロックより組数の多い種目が、続きのシート（"50m_2" など）に漏れなく書き込まれることを確認する。
+
+import os
+import random
+import openpyxl
+import pytest
+from module.csv_utils import write_csv_data
+from module.event_utils import EVENT_NAMES
+from scripts.benchmark import make_time_str
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TEST_DIR)
+TEMPLATE_PATH = os.path.join(REPO_ROOT, "template.xlsx")
+
+# 50m は1シート60組・400m は12組のため、どちらも1シートに入りきらない人数にする
+ENTRIES = {"50Fr": 400, "400Fr": 100}
+
+
+def write_roster(csv_path):
+    """ 50Fr に全員、400Fr に先頭の100名がエントリーした結合CSVを書き出す """
+    rng = random.Random(0)
+    headers = ["No", "氏名", "ﾌﾘｶﾞﾅ", "学校名", "学年", "性別"] + EVENT_NAMES + ["種目数", "ID"]
+    rows = []
+    for i in range(ENTRIES["50Fr"]):
+        times = [""] * len(EVENT_NAMES)
+        times[EVENT_NAMES.index("50Fr")] = make_time_str(50, rng)
+        if i < ENTRIES["400Fr"]:
+            times[EVENT_NAMES.index("400Fr")] = make_time_str(400, rng)
+        rows.append([i % 40 + 1, f"選手{i:05d}", f"ｾﾝｼｭ {i:05d}", f"学校{i % 120:03d}", "高1", "男"] + times + [len([t for t in times if t]), i + 1])
+    write_csv_data(csv_path, rows, headers)
+
+
+def written_names(path):
+    """ 組表の全シートに書き込まれた氏名と、シート名の一覧 """
+    wb = openpyxl.load_workbook(path)
+    names = [
+        cell.value
+        for ws in wb.worksheets
+        for row in ws.iter_rows()
+        for cell in row
+        if isinstance(cell.value, str) and cell.value.startswith("選手")
+    ]
+    return names, wb.sheetnames
+
+
+@pytest.mark.parametrize("mode", ["fused", "two_phase"])
+def test_every_entry_is_written(tmp_path, monkeypatch, mode):
+    csv_path = str(tmp_path / "merged_output.csv")
+    result_dir = str(tmp_path / "result")
+    write_roster(csv_path)
+    monkeypatch.setenv("MERGED_CSV_DATA_FILE", csv_path)
+    from scripts.write_ID import main as write_id
+
+    if mode == "fused":
+        write_id(result_dir, result_dir, csv_path, TEMPLATE_PATH, fill_player_data=True, workers=1)
+    else:
+        from scripts.fill_name import main as fill_name
+
+        write_id(result_dir, result_dir, csv_path, TEMPLATE_PATH, workers=1)
+        fill_name(result_dir, csv_path, TEMPLATE_PATH)
+
+    for event, n_entries in ENTRIES.items():
+        distance = event[:-2]
+        names, sheetnames = written_names(os.path.join(result_dir, f"{distance}fr_id.xlsx"))
+        assert len(sheetnames) > 1, event
+        assert sheetnames[:2] == [distance + "m", f"{distance}m_2"]
+        # 全員が1回ずつ書き込まれていること
+        assert sorted(names) == [f"選手{i:05d}" for i in range(n_entries)], event
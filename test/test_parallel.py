@@ -0,0 +1,64 @@
+# test_parallel.py
+# 役割: イベント単位の並列実行（module.parallel）と、並列に書き込んだ組表が直列実行と同じになることを確認する。
+
+import logging
+import math
+import os
+import openpyxl
+import pytest
+from module.parallel import resolve_worker_count, run_jobs
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_ROOT = os.path.dirname(TEST_DIR)
+CSV_PATH = os.path.join(TEST_DIR, "synthetic_merged_output.csv")
+TEMPLATE_PATH = os.path.join(REPO_ROOT, "template.xlsx")
+
+
+def read_cells(path):
+    """ 組表の全シートの値のあるセルを シート名 -> {セル番地: (値, 型)} にする """
+    wb = openpyxl.load_workbook(path)
+    return {
+        ws.title: {cell.coordinate: (cell.value, type(cell.value)) for row in ws.iter_rows() for cell in row if cell.value is not None}
+        for ws in wb.worksheets
+    }
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_jobs_returns_every_result(workers):
+    jobs = [4.0, 9.0, -1.0, 16.0]
+    results = {job: (result, error) for job, result, error in run_jobs(math.sqrt, jobs, workers)}
+    assert sorted(results) == sorted(jobs)
+    assert [results[job][0] for job in (4.0, 9.0, 16.0)] == [2.0, 3.0, 4.0]
+    # 失敗したジョブは例外として返し、他のジョブは続ける
+    assert results[-1.0][0] is None and isinstance(results[-1.0][1], ValueError)
+
+
+def test_resolve_worker_count(monkeypatch):
+    monkeypatch.setenv("HEAT_SHEET_WORKERS", "3")
+    assert resolve_worker_count() == 3
+    assert resolve_worker_count(2) == 2
+    assert resolve_worker_count("auto") == (os.cpu_count() or 1)
+    with pytest.raises(ValueError):
+        resolve_worker_count("many")
+
+
+@pytest.mark.parametrize("fill_player_data", [False, True])
+def test_parallel_output_matches_serial(tmp_path, monkeypatch, caplog, fill_player_data):
+    monkeypatch.setenv("MERGED_CSV_DATA_FILE", CSV_PATH)
+    from scripts.write_ID import main as write_id
+
+    outputs = {}
+    for workers in (1, 2):
+        result_dir = str(tmp_path / f"workers{workers}")
+        with caplog.at_level(logging.INFO, logger="module.parallel"):
+            caplog.clear()
+            write_id(result_dir, result_dir, CSV_PATH, TEMPLATE_PATH, fill_player_data=fill_player_data, workers=workers)
+            parallel = any("プロセスで並列実行します" in record.getMessage() for record in caplog.records)
+        assert parallel == (workers > 1)
+        outputs[workers] = result_dir
+
+    names = sorted(name for name in os.listdir(outputs[1]) if name.endswith(".xlsx"))
+    assert names
+    assert sorted(name for name in os.listdir(outputs[2]) if name.endswith(".xlsx")) == names
+    for name in names:
+        assert read_cells(os.path.join(outputs[2], name)) == read_cells(os.path.join(outputs[1], name)), name
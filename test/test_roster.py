@@ -0,0 +1,30 @@
+# test_roster.py
+# 役割: 名簿（Roster）の選手IDの照合を確認する。
+
+import pytest
+from module.roster import Roster
+
+
+def make_row(player_id, name):
+    return ["1", name, "ｾﾝｼｭ", "学校", "高1", "男"] + [""] * 17 + [player_id]
+
+
+@pytest.mark.parametrize("ids", [["1", "2", "2", "3"], ["1", "2", "2", "3", "x"]])
+def test_duplicate_and_blank_ids_are_misses(ids):
+    # 整数ID表で引く場合（IDがすべて整数）と辞書で引く場合（整数でないIDがある）の両方
+    roster = Roster.from_rows([make_row(player_id, f"選手{i}") for i, player_id in enumerate(ids)] + [make_row("", "空")])
+    assert roster.find("1") == 0
+    assert roster.find("3") == 3
+    assert roster.find("2") is None
+    assert roster.find("") is None
+    assert roster.find_rows(["3", "2", "", "1", None, "9"]).tolist() == [3, -1, -1, 0, -1, -1]
+
+
+def test_blank_ids_are_silent_misses(monkeypatch):
+    messages = []
+    monkeypatch.setattr("module.roster.send_slack_message", lambda app_name, message: messages.append(message))
+    roster = Roster.from_rows([make_row("", "空1"), make_row("", "空2"), make_row("5", "選手"), make_row("5", "同じID")])
+    assert roster.find("") is None
+    assert roster.find("5") is None
+    # 警告（Slack通知）は重複したID "5" の1件だけで、空のIDは通知しない
+    assert len(messages) == 1 and messages[0].endswith(": 5")
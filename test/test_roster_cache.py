@@ -0,0 +1,138 @@
+# test_roster_cache.py
+# 役割: 名簿キャッシュ（module.roster_cache）が、結合CSVが変わったときに使われず作り直されることを確認する。
+
+import csv
+import os
+import pickle
+import pytest
+import module.roster_cache as roster_cache
+from module.entry_index import load_roster
+from module.roster_cache import (
+    clear_hot_rosters,
+    hot_roster,
+    load_roster_cache,
+    roster_cache_path,
+    write_roster_cache,
+)
+
+HEADER = ["No", "氏名", "ﾌﾘｶﾞﾅ", "学校名", "学年", "性別"] + [f"種目{i}" for i in range(17)] + ["ID"]
+
+
+def write_csv(csv_path, names):
+    with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i, name in enumerate(names, start=1):
+            writer.writerow([str(i), name, "ｾﾝｼｭ", "学校", "高1", "男"] + [""] * 17 + [str(i)])
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture(autouse=True)
+def no_hot_rosters():
+    clear_hot_rosters()
+    yield
+    clear_hot_rosters()
+
+
+@pytest.fixture
+def cached_csv(tmp_path):
+    """ 名簿キャッシュを作成し、メモリ上の名簿を破棄した状態の結合CSV """
+    csv_path = str(tmp_path / "merged_output.csv")
+    write_csv(csv_path, ["選手1", "選手2"])
+    assert write_roster_cache(csv_path) == roster_cache_path(csv_path)
+    clear_hot_rosters()
+    return csv_path
+
+
+def test_cache_is_loaded(cached_csv):
+    roster = load_roster_cache(cached_csv)
+    assert roster.names.tolist() == ["選手1", "選手2"]
+    # 読み込んだ名簿はメモリに保持される
+    assert hot_roster(cached_csv) is roster
+
+
+def test_missing_cache(tmp_path):
+    csv_path = str(tmp_path / "merged_output.csv")
+    write_csv(csv_path, ["選手1"])
+    assert load_roster_cache(csv_path) is None
+    assert load_roster_cache(str(tmp_path / "none.csv")) is None
+
+
+def test_rejected_when_older_than_csv(cached_csv):
+    cache_mtime = os.stat(roster_cache_path(cached_csv)).st_mtime_ns
+    set_mtime(cached_csv, cache_mtime + 10**9)
+    assert load_roster_cache(cached_csv) is None
+
+
+def test_rejected_on_mtime_mismatch(cached_csv):
+    # キャッシュの方が新しくても、記録したCSVの更新時刻と違えば使わない
+    cache_path = roster_cache_path(cached_csv)
+    csv_mtime = os.stat(cached_csv).st_mtime_ns
+    set_mtime(cache_path, csv_mtime + 10 * 10**9)
+    set_mtime(cached_csv, csv_mtime + 10**9)
+    assert load_roster_cache(cached_csv) is None
+
+
+def test_rejected_on_size_mismatch(cached_csv):
+    # 同じ更新時刻のまま内容（サイズ）だけ変わった場合
+    cache_path = roster_cache_path(cached_csv)
+    csv_mtime = os.stat(cached_csv).st_mtime_ns
+    write_csv(cached_csv, ["選手1", "選手2", "選手3"])
+    set_mtime(cached_csv, csv_mtime)
+    set_mtime(cache_path, csv_mtime + 10**9)
+    assert load_roster_cache(cached_csv) is None
+
+
+def test_rejected_on_version_mismatch(cached_csv, monkeypatch):
+    monkeypatch.setattr(roster_cache, "ROSTER_CACHE_VERSION", roster_cache.ROSTER_CACHE_VERSION + 1)
+    assert load_roster_cache(cached_csv) is None
+
+
+def test_rejected_when_broken(cached_csv):
+    cache_path = roster_cache_path(cached_csv)
+    with open(cache_path, "wb") as f:
+        f.write(b"broken")
+    assert load_roster_cache(cached_csv) is None
+    with open(cache_path, "wb") as f:
+        pickle.dump(["not", "a", "dict"], f)
+    assert load_roster_cache(cached_csv) is None
+
+
+def test_hot_roster_checks_digest(tmp_path):
+    csv_path = str(tmp_path / "merged_output.csv")
+    write_csv(csv_path, ["選手1", "選手2"])
+    write_roster_cache(csv_path)
+    roster = hot_roster(csv_path)
+    assert roster is not None
+    os.remove(roster_cache_path(csv_path))
+
+    # 同じ内容で書き直したCSVには、キャッシュファイルがなくてもメモリ上の名簿を使う
+    write_csv(csv_path, ["選手1", "選手2"])
+    assert load_roster_cache(csv_path) is roster
+
+    # 内容が変わったCSVにはメモリ上の名簿を使わない
+    write_csv(csv_path, ["選手1", "選手X"])
+    assert hot_roster(csv_path) is None
+    assert load_roster_cache(csv_path) is None
+
+
+def test_rebuilt_after_csv_is_rewritten(cached_csv):
+    cache_path = roster_cache_path(cached_csv)
+    old_roster = load_roster_cache(cached_csv)
+    clear_hot_rosters()
+
+    write_csv(cached_csv, ["選手A", "選手B", "選手C"])
+    set_mtime(cache_path, os.stat(cached_csv).st_mtime_ns - 10**9)
+    assert load_roster_cache(cached_csv) is None
+    # キャッシュを使えない場合はCSVから作り直す
+    assert load_roster(cached_csv).names.tolist() == ["選手A", "選手B", "選手C"]
+
+    clear_hot_rosters()
+    write_roster_cache(cached_csv)
+    clear_hot_rosters()
+    roster = load_roster_cache(cached_csv)
+    assert roster is not old_roster
+    assert roster.names.tolist() == ["選手A", "選手B", "選手C"]
@@ -0,0 +1,118 @@
+# test_seeding.py
+# 役割: 組分け・コース配置（module.seeding）を、1人ずつ処理する参照実装と比べて確認する。
+#       参照実装は write_ID の従来の partition_names / assign_group をコース数とサークルシーディングに広げたもの。
+
+import random
+import numpy as np
+import pytest
+from module.seeding import LANE_ORDERS, arrange_heats, resolve_circle_heats, seed_heats
+
+LANES = sorted(LANE_ORDERS)
+CIRCLE_HEATS = [0, 1, 2, 3, 4]
+
+
+def legacy_arrange(names):
+    """ 従来の write_ID（6コース固定）の組分け・コース配置 """
+    names_rev = names[::-1]
+    r = len(names_rev) % 6
+    groups = ([names_rev[:r]] if r else []) + [names_rev[i:i + 6] for i in range(r, len(names_rev), 6)]
+    assigned = []
+    for group in groups:
+        row = [""] * 6
+        for name, course in zip(group[::-1], [4, 3, 5, 2, 6, 1]):
+            row[course - 1] = name
+        assigned.append(row)
+    return assigned
+
+
+def reference_seeding(n, lanes, circle_heats):
+    """
+    順位（0 が最速）ごとの (組, コース) を1人ずつ求める。
+    遅い順に並べて端数を最初の組に入れ、サークルシーディングでは上位 k×コース数 名を最終 k 組に順番に振り分ける。
+    """
+    slow = list(range(n))[::-1]
+    r = n % lanes
+    groups = ([slow[:r]] if r else []) + [slow[i:i + lanes] for i in range(r, n, lanes)]
+    n_heats = len(groups)
+    k = min(circle_heats, n_heats - (1 if r else 0))
+    if k > 1:
+        for heat in range(n_heats - k, n_heats):
+            groups[heat] = []
+        for rank in range(k * lanes):
+            groups[n_heats - 1 - rank % k].append(rank)
+    result = {}
+    for heat, group in enumerate(groups):
+        for position, rank in enumerate(sorted(group)):
+            result[rank] = (heat, LANE_ORDERS[lanes][position])
+    return result
+
+
+def cases(seed=0, count=300, max_entries=400):
+    """ 各コース数の小さい人数（端数の組・1組だけの場合を含む）と、乱数で選んだ人数・組数の組み合わせ """
+    small = [(n, lanes, circle) for lanes in LANES for n in range(0, 3 * lanes + 2) for circle in CIRCLE_HEATS]
+    rng = random.Random(seed)
+    rand = [(rng.randrange(max_entries), rng.choice(LANES), rng.choice(CIRCLE_HEATS)) for _ in range(count)]
+    return small + rand
+
+
+@pytest.mark.parametrize("n, lanes, circle", cases())
+def test_matches_reference(n, lanes, circle):
+    a = seed_heats(n, lanes, circle)
+    expected = reference_seeding(n, lanes, circle)
+    assert a.n_heats == -(-n // lanes)
+    assert list(zip(a.heats.tolist(), a.lanes.tolist())) == [expected[rank] for rank in range(n)]
+
+
+@pytest.mark.parametrize("lanes", LANES)
+@pytest.mark.parametrize("n", [1, 5, 7, 13, 29, 61, 100])
+def test_partial_heat_comes_first(n, lanes):
+    a = seed_heats(n, lanes)
+    sizes = a.heat_sizes()
+    # 端数は最初の組（シートの先頭）だけで、最終組を含むそれ以外の組は満員
+    assert sizes[0] == (n % lanes or lanes)
+    assert (sizes[1:] == lanes).all()
+    # 全員がちょうど1つの (組, コース) に入る
+    assert len(set(zip(a.heats.tolist(), a.lanes.tolist()))) == n
+    # 組内では速い順にセンターアウトのコース順で入る
+    for heat_ranks in a.grid():
+        members = sorted(r for r in heat_ranks.tolist() if r >= 0)
+        assert [a.lanes[r] for r in members] == list(LANE_ORDERS[lanes][:len(members)])
+    # 後の組ほど速い
+    assert (np.diff(a.heats) <= 0).all()
+
+
+@pytest.mark.parametrize("n", list(range(0, 40)) + [97, 360])
+def test_six_lanes_matches_legacy_write_id(n):
+    names = [str(i + 1) for i in range(n)]
+    assert arrange_heats(names) == legacy_arrange(names)
+    # サークルシーディング1組は行わない場合と同じ
+    assert arrange_heats(names, circle_heats=1) == legacy_arrange(names)
+
+
+@pytest.mark.parametrize("lanes", LANES)
+def test_circle_seeding_spreads_top_swimmers(lanes):
+    n = 4 * lanes + 3
+    a = seed_heats(n, lanes, circle_heats=3)
+    top = np.arange(3 * lanes)
+    # 1位・2位・3位は最終組・その前・その前の組の中央コース
+    assert a.heats[:3].tolist() == [a.n_heats - 1, a.n_heats - 2, a.n_heats - 3]
+    assert set(a.lanes[:3].tolist()) == {LANE_ORDERS[lanes][0]}
+    assert (a.heats[top] >= a.n_heats - 3).all()
+    assert (a.heats[3 * lanes:] < a.n_heats - 3).all()
+
+
+def test_circle_seeding_skips_partial_heat():
+    # 満員の組が2組だけなら、3組を指定しても満員の2組だけで振り分ける
+    a = seed_heats(15, 6, circle_heats=3)
+    assert a.heat_sizes().tolist() == [3, 6, 6]
+    assert a.heats[:4].tolist() == [2, 1, 2, 1]
+
+
+def test_invalid_arguments():
+    with pytest.raises(ValueError):
+        seed_heats(10, lanes=7)
+    with pytest.raises(ValueError):
+        seed_heats(-1)
+    with pytest.raises(ValueError):
+        resolve_circle_heats("-2")
+    assert resolve_circle_heats("3") == 3
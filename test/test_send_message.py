@@ -0,0 +1,110 @@
+# test_send_message.py
+# 役割: Slack通知の送信スレッド（SlackNotifier）を、ローカルの疑似Slack（scripts.fake_slack）に向けて確認する。
+#       同じ通知のまとめ（×件数）・長い本文の分割・キューがあふれた通知の件数・429 の再送・flush の待ち合わせ。
+
+import time
+from module.send_message import MAX_MESSAGE_CHARS, SlackNotifier, build_digest
+from scripts.fake_slack import FakeSlackServer
+
+
+def make_notifier(server, **kwargs):
+    options = {"batch_interval": 0.2, "min_interval": 0.0, "timeout": 5}
+    options.update(kwargs)
+    return SlackNotifier("token", "#test", api_url=server.url, **options)
+
+
+def test_same_messages_are_coalesced_into_one_post():
+    with FakeSlackServer(latency=0.01) as server:
+        notifier = make_notifier(server)
+        for _ in range(5):
+            notifier.submit("App", "選手ID '7' に対応する選手が見つかりません")
+        notifier.submit("App", "CSVファイルが空です")
+        notifier.submit("Other", "CSVファイルが空です")
+        assert notifier.flush(5)
+
+    assert len(server.received) == 1
+    assert server.received[0].splitlines() == [
+        "7件の通知をまとめて送信します",
+        "[App] 選手ID '7' に対応する選手が見つかりません (×5)",
+        "[App] CSVファイルが空です",
+        "[Other] CSVファイルが空です",
+    ]
+    assert notifier.posted == 1
+
+
+def test_single_message_is_posted_without_header():
+    assert build_digest([("App", "テスト")]) == ["[App] テスト"]
+    assert build_digest([("App", "テスト")] * 3) == ["[App] テスト (×3)"]
+
+
+def test_long_digest_is_split_into_chunks():
+    messages = [("App", f"{i:03d} " + "あ" * 300) for i in range(40)]
+    chunks = build_digest(messages)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= MAX_MESSAGE_CHARS for chunk in chunks)
+    lines = [line for chunk in chunks for line in chunk.splitlines()]
+    assert lines == ["40件の通知をまとめて送信します"] + [f"[App] {text}" for _, text in messages]
+    # 1行が上限を超える場合は上限で切る
+    assert [len(chunk) for chunk in build_digest([("App", "い" * (MAX_MESSAGE_CHARS * 2))])] == [MAX_MESSAGE_CHARS]
+
+    with FakeSlackServer(latency=0.0) as server:
+        notifier = make_notifier(server)
+        for system_name, text in messages:
+            notifier.submit(system_name, text)
+        assert notifier.flush(5)
+    assert server.received == chunks
+
+
+def test_full_queue_drops_and_reports_count(monkeypatch):
+    with FakeSlackServer(latency=0.0) as server:
+        notifier = make_notifier(server, max_queue=2)
+        # 送信スレッドを止めた状態で積み、キューをあふれさせる
+        monkeypatch.setattr(notifier, "_ensure_thread", lambda: None)
+        results = [notifier.submit("App", f"通知{i}") for i in range(5)]
+        assert results == [True, True, False, False, False]
+        monkeypatch.undo()
+        notifier._ensure_thread()
+        assert notifier.flush(5)
+
+    assert len(server.received) == 1
+    assert server.received[0].splitlines() == [
+        "2件の通知をまとめて送信します",
+        "[App] 通知0",
+        "[App] 通知1",
+        "（送信待ちがあふれたため 3件の通知を省略しました）",
+    ]
+
+
+def test_rate_limited_post_is_retried_after_retry_after():
+    with FakeSlackServer(latency=0.0, responses=[(429, {"Retry-After": "0.3"})]) as server:
+        notifier = make_notifier(server)
+        notifier.submit("App", "テスト")
+        assert notifier.flush(5)
+
+    # 1回目は 429、Retry-After の秒数だけ待って同じ本文を1回だけ再送する
+    assert server.received == ["[App] テスト", "[App] テスト"]
+    assert server.received_at[1] - server.received_at[0] >= 0.3
+    assert notifier.posted == 1
+
+
+def test_flush_waits_until_queue_is_empty():
+    with FakeSlackServer(latency=0.3) as server:
+        # まとめる待ち時間が長くても、flush するとすぐに送信して送り終わるまで待つ
+        notifier = make_notifier(server, batch_interval=30)
+        notifier.submit("App", "テスト")
+        start = time.monotonic()
+        assert notifier.flush(5)
+        assert time.monotonic() - start < 5
+        assert server.received == ["[App] テスト"]
+        assert notifier._queue.empty() and notifier._pending == 0
+
+        # 送り終わる前に timeout になった場合は False を返す
+        notifier.submit("App", "2通目")
+        assert not notifier.flush(0.05)
+        assert notifier.flush(5)
+        assert server.received == ["[App] テスト", "[App] 2通目"]
+
+
+def test_flush_without_messages_returns_immediately():
+    notifier = SlackNotifier("token", "#test", api_url="http://127.0.0.1:9/unused")
+    assert notifier.flush(0)
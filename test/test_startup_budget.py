@@ -0,0 +1,38 @@
+# test_startup_budget.py
+# 役割: GUIの起動時に読み込むモジュールを新しいインタプリタで import し（scripts.startup_budget）、
+#       読み込み時間が予算（STARTUP_BUDGET_MS）に収まることと、データ処理のライブラリを読み込まないことを確認する。
+#       PySide6 がない環境では、起動時に読み込まれるQt以外のモジュールで確認する。
+
+import subprocess
+import sys
+import pytest
+from scripts.startup_budget import DEFERRED_MODULES, REPO_ROOT, STARTUP_BUDGET_MS, check_startup, profile_startup
+
+
+@pytest.fixture(scope="module")
+def startup():
+    return profile_startup()
+
+
+def test_startup_within_budget(startup):
+    targets, profile = startup
+    assert profile.error is None, profile.error
+    assert profile.modules, targets
+    assert profile.total_ms <= STARTUP_BUDGET_MS, f"{', '.join(targets)}: {profile.total_ms:.1f} ms"
+    assert check_startup(profile) == []
+
+
+def test_heavy_modules_are_not_loaded_at_startup(startup):
+    targets, _ = startup
+    code = (
+        "import sys\n"
+        f"import {', '.join(targets)}\n"
+        "print('\\n'.join(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    loaded = {name.split(".")[0] for name in result.stdout.split()}
+    for name in ("pandas", "openpyxl", "numpy"):
+        assert name in DEFERRED_MODULES
+        assert name not in loaded, f"{name} は起動時に読み込まれています（{', '.join(targets)}）"
+
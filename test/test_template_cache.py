@@ -0,0 +1,47 @@
+# test_template_cache.py
+# 役割: テンプレートの複製（TemplateCache）が、値・書式以外のシート設定（入力規則・改ページ・条件付き書式）も
+#       テンプレートと同じに保つことを確認する。
+
+import os
+import openpyxl
+import pytest
+from module.template_cache import TemplateCache
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "template.xlsx")
+TEMPLATE = openpyxl.load_workbook(TEMPLATE_PATH)
+
+
+def sheet_settings(ws):
+    """ 複製で保つべきシート設定を比較できる形にまとめる """
+    return {
+        "validations": [
+            (dv.type, dv.formula1, dv.allow_blank, str(dv.sqref)) for dv in ws.data_validations.dataValidation
+        ],
+        "col_breaks": [(brk.id, brk.min, brk.max, brk.man) for brk in ws.col_breaks.brk],
+        "row_breaks": [(brk.id, brk.min, brk.max, brk.man) for brk in ws.row_breaks.brk],
+        "conditional_formatting": [
+            (str(cf.sqref), rule.type, rule.formula and tuple(rule.formula)) for cf in ws.conditional_formatting for rule in cf.rules
+        ],
+    }
+
+
+@pytest.mark.parametrize("sheet_name", TEMPLATE.sheetnames)
+def test_cloned_sheet_keeps_settings(tmp_path, sheet_name):
+    cache = TemplateCache(TEMPLATE_PATH)
+    wb, _ = cache.new_workbook(sheet_name)
+    # 2ページ目以降のシートも同じ複製を使う
+    cache.add_sheet(wb, sheet_name, title=f"{sheet_name} (2)")
+    output_path = str(tmp_path / "clone.xlsx")
+    wb.save(output_path)
+
+    expected = sheet_settings(TEMPLATE[sheet_name])
+    saved = openpyxl.load_workbook(output_path)
+    for ws in saved.worksheets:
+        assert sheet_settings(ws) == expected
+
+
+def test_template_has_grade_dropdown_and_breaks():
+    # 上の比較が空同士にならないよう、テンプレート側の設定が読めていることを確認する
+    for sheet_name in ("50m", "100m", "200m", "400m"):
+        assert any(dv.type == "list" for dv in TEMPLATE[sheet_name].data_validations.dataValidation)
+    assert [brk.id for brk in TEMPLATE["50m"].col_breaks.brk] == [14, 28, 42]
@@ -0,0 +1,89 @@
+# test_xlsx_writer.py
+# 役割: 組表の保存（TemplateCache.save_heats）の openpyxl と高速パス（module.xlsx_writer）の出力を、
+#       リポジトリに保存した期待値のExcel（test/expected/）と比べる。
+#       セル値・書式・結合セル・寸法・印刷設定に加え、テンプレートの入力規則と改ページも比べる。
+#       期待値を作り直す場合は UPDATE_EXPECTED=1 を指定して実行する（openpyxl の出力を保存する）。
+
+import os
+import openpyxl
+import pytest
+from module.seeding import seed_heats
+from module.template_cache import TemplateCache
+from module.xlsx_writer import WRITER_FAST, WRITER_OPENPYXL
+
+TEST_DIR = os.path.dirname(os.path.abspath(__file__))
+EXPECTED_DIR = os.path.join(TEST_DIR, "expected")
+TEMPLATE_PATH = os.path.join(os.path.dirname(TEST_DIR), "template.xlsx")
+
+# (シート名, 出場者数, サークルシーディングの組数)。400m の100名は続きのシート（400m_2）にまたがる
+CASES = [("50m", 70, 0), ("100m", 33, 2), ("400m", 100, 3)]
+
+
+def make_fields(n_entries):
+    """ 組表に書き込む選手情報（XMLでエスケープが必要な文字・全角スペース・数値の学年を含む） """
+    return [
+        (f"選手{i:03d}" + (" <&>" if i % 10 == 0 else ""), f"ｾﾝｼｭ\u3000{i:03d}", f"学校{i % 7}", i % 3 + 1 if i % 2 else f"高{i % 3 + 1}")
+        for i in range(n_entries)
+    ]
+
+
+def workbook_contents(path):
+    """ Excelで開いたときに見える内容をシートごとにまとめる """
+    wb = openpyxl.load_workbook(path)
+    return {
+        ws.title: {
+            "cells": {(cell.row, cell.column): (cell.value, cell.style_id) for row in ws.iter_rows() for cell in row},
+            "merged": sorted(str(merged) for merged in ws.merged_cells.ranges),
+            "row_heights": {row: dim.height for row, dim in ws.row_dimensions.items()},
+            "column_widths": {col: dim.width for col, dim in ws.column_dimensions.items()},
+            "print_area": ws.print_area,
+            "page_setup": (ws.page_setup.orientation, ws.page_setup.paperSize, ws.page_setup.scale, ws.page_setup.fitToWidth),
+            "validations": [(dv.type, dv.formula1, str(dv.sqref)) for dv in ws.data_validations.dataValidation],
+            "col_breaks": [brk.id for brk in ws.col_breaks.brk],
+            "row_breaks": [brk.id for brk in ws.row_breaks.brk],
+        }
+        for ws in wb.worksheets
+    }
+
+
+@pytest.fixture(scope="module")
+def template():
+    return TemplateCache(TEMPLATE_PATH)
+
+
+@pytest.mark.parametrize("sheet_name, n_entries, circle_heats", CASES)
+def test_writers_match_expected(tmp_path, template, sheet_name, n_entries, circle_heats):
+    assignment = seed_heats(n_entries, circle_heats=circle_heats)
+    fields = make_fields(n_entries)
+    expected_path = os.path.join(EXPECTED_DIR, f"heats_{sheet_name}_{n_entries}.xlsx")
+    if os.getenv("UPDATE_EXPECTED"):
+        os.makedirs(EXPECTED_DIR, exist_ok=True)
+        template.save_heats(sheet_name, assignment.heats, assignment.lanes, fields, expected_path, writer=WRITER_OPENPYXL)
+    expected = workbook_contents(expected_path)
+
+    for writer in (WRITER_OPENPYXL, WRITER_FAST):
+        output_path = str(tmp_path / f"{writer}.xlsx")
+        assert template.save_heats(sheet_name, assignment.heats, assignment.lanes, fields, output_path, writer=writer) == writer
+        assert workbook_contents(output_path) == expected, writer
+
+
+def test_expected_files_keep_template_settings():
+    # 期待値のExcel自体がテンプレートの入力規則・改ページを保っていること
+    template = openpyxl.load_workbook(TEMPLATE_PATH)
+    titles = {}
+    for sheet_name, n_entries, _ in CASES:
+        wb = openpyxl.load_workbook(os.path.join(EXPECTED_DIR, f"heats_{sheet_name}_{n_entries}.xlsx"))
+        original = template[sheet_name]
+        titles[sheet_name] = wb.sheetnames
+        for ws in wb.worksheets:
+            assert [str(dv.sqref) for dv in ws.data_validations.dataValidation] == [str(dv.sqref) for dv in original.data_validations.dataValidation]
+            assert [brk.id for brk in ws.col_breaks.brk] == [brk.id for brk in original.col_breaks.brk]
+    assert titles["400m"] == ["400m", "400m_2"]
+
+
+def test_fast_writer_falls_back_for_unsupported_values(tmp_path, template):
+    # 高速パスで書き出せない値（NaN）がある場合は openpyxl の保存に切り替わる
+    assignment = seed_heats(6)
+    fields = [(f"選手{i}", None, None, float("nan") if i == 0 else i) for i in range(6)]
+    path = str(tmp_path / "fallback.xlsx")
+    assert template.save_heats("50m", assignment.heats, assignment.lanes, fields, path, writer=WRITER_FAST) == WRITER_OPENPYXL